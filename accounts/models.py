@@ -12,10 +12,20 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True)
     address = models.TextField(blank=True)
     profile_pic = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Content hash naming the pre-rendered thumbnails (library_management/thumbnails.py)
+    profile_pic_digest = models.CharField(max_length=20, blank=True, editable=False)
     membership_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
     date_of_birth = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Name prefix search for the issue form's student picker (circulation/autocomplete.py);
+            # username and membership_id are already indexed by their unique constraints
+            models.Index(fields=['role', 'first_name', 'last_name'], name='user_role_first_name_idx'),
+            models.Index(fields=['role', 'last_name', 'first_name'], name='user_role_last_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_full_name()} ({self.role})"
 
@@ -0,0 +1,6 @@
+from library_management import thumbnails
+from .models import User
+
+PROFILE_PIC_WIDTHS = (48, 96, 192)
+
+thumbnails.watch(User, 'profile_pic', 'profile_pic_digest', PROFILE_PIC_WIDTHS)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ActivityLog
+from .models import ActivityLog, LogArchive
 
 
 @admin.register(ActivityLog)
@@ -11,4 +11,13 @@ class ActivityLogAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
 
     def has_add_permission(self, request):
-        return False  # Logs should only be created by the system
\ No newline at end of file
+        return False  # Logs should only be created by the system
+
+
+@admin.register(LogArchive)
+class LogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('month', 'rows', 'file', 'created_at')
+    readonly_fields = ('month', 'file', 'rows', 'last_id', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,158 @@
+"""
+Monthly activity log archives.
+
+The hot ``ActivityLog`` table keeps the last ``ACTIVITY_LOG_RETENTION_MONTHS``
+months.  ``archive_activity_log`` streams each older month into a gzipped
+NDJSON file under ``media/activitylog/archive/`` and then deletes those rows,
+so the table stays small while old history stays readable through
+``read_archives``.
+"""
+
+import gzip
+import io
+import json
+from datetime import datetime, time, timedelta
+from tempfile import TemporaryFile
+
+from django.core.files import File
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from .models import ActivityLog, LogArchive
+
+EXPORT_CHUNK_SIZE = 2000
+DELETE_BATCH_SIZE = 5000
+ARCHIVE_FIELDS = ('id', 'timestamp', 'user_id', 'user__username', 'user__first_name',
+                  'user__last_name', 'action', 'description', 'ip_address')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def day_bounds(day):
+    """Half-open ``[start, end)`` aware datetimes covering ``day``."""
+    return _midnight(day), _midnight(day + timedelta(days=1))
+
+
+def month_bounds(month):
+    """Half-open ``[start, end)`` aware datetimes covering ``month``."""
+    return _midnight(month_start(month)), _midnight(next_month(month))
+
+
+def retention_cutoff(months, today=None):
+    """First day of the oldest month that stays in the hot table."""
+    cutoff = month_start(today or timezone.localdate())
+    for _ in range(months):
+        cutoff = month_start(cutoff - timedelta(days=1))
+    return cutoff
+
+
+def _delete_archived(archive):
+    start, end = month_bounds(archive.month)
+    rows = ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end, id__lte=archive.last_id)
+    deleted = 0
+    while True:
+        pks = list(rows.values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+        if not pks:
+            return deleted
+        deleted += ActivityLog.objects.filter(pk__in=pks).delete()[0]
+
+
+def archive_month(month):
+    """Write one month to an archive file and delete it from the hot table."""
+    start, end = month_bounds(month)
+    rows = (ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+            .order_by('id').values(*ARCHIVE_FIELDS))
+
+    count, last_id = 0, None
+    with TemporaryFile() as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            out = io.TextIOWrapper(gz, encoding='utf-8')
+            for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                row['timestamp'] = row['timestamp'].isoformat()
+                out.write(json.dumps(row, separators=(',', ':')) + '\n')
+                count, last_id = count + 1, row['id']
+            out.flush()
+            out.detach()
+        if not count:
+            return None
+        raw.seek(0)
+        # The catalog row is only written once the file is safely stored; a
+        # crash before this leaves an orphan file that nothing reads.
+        archive = LogArchive(month=month, rows=count, last_id=last_id)
+        archive.file.save(f"{month:%Y-%m}.ndjson.gz", File(raw), save=False)
+        archive.save()
+
+    _delete_archived(archive)
+    return archive
+
+
+def archive_old_months(months, today=None):
+    """
+    Archive every month older than the retention window.  Also finishes any
+    deletes a previous, interrupted run left behind.  Returns the new archives.
+    """
+    cutoff = retention_cutoff(months, today)
+    for archive in LogArchive.objects.filter(month__lt=cutoff):
+        _delete_archived(archive)
+
+    created = []
+    oldest = ActivityLog.objects.filter(timestamp__lt=month_bounds(cutoff)[0]).order_by('timestamp').first()
+    if oldest is None:
+        return created
+    month = month_start(timezone.localtime(oldest.timestamp).date())
+    while month < cutoff:
+        if not LogArchive.objects.filter(month=month).exists():
+            archive = archive_month(month)
+            if archive:
+                created.append(archive)
+        month = next_month(month)
+    return created
+
+
+def _to_instance(row):
+    """Rebuild an unsaved ActivityLog (with a detached user) from an archive line."""
+    log = ActivityLog(id=row['id'], action=row['action'], description=row['description'],
+                      ip_address=row['ip_address'], timestamp=parse_datetime(row['timestamp']),
+                      user_id=row['user_id'])
+    if row['user_id'] is not None:
+        log.user = User(pk=row['user_id'], username=row['user__username'] or '',
+                        first_name=row['user__first_name'] or '', last_name=row['user__last_name'] or '')
+    return log
+
+
+def read_archives(start, end, action=None, search=None):
+    """
+    Yield archived entries with ``start <= timestamp < end`` (aware datetimes),
+    newest first, as unsaved ``ActivityLog`` instances.  ``action`` and a
+    case-insensitive ``search`` over username/name/description filter lines
+    as they are read.
+    """
+    first = month_start(timezone.localtime(start).date())
+    archives = LogArchive.objects.filter(month__gte=first, month__lt=timezone.localtime(end).date())
+    search = search.lower() if search else None
+
+    for archive in archives.order_by('-month'):
+        matches = []
+        with archive.file.open('rb') as fh, gzip.open(fh, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                row = json.loads(line)
+                if action and row['action'] != action:
+                    continue
+                if search and not any(search in (row[f] or '').lower() for f in
+                                      ('user__username', 'user__first_name', 'description')):
+                    continue
+                log = _to_instance(row)
+                if start <= log.timestamp < end:
+                    matches.append(log)
+        yield from reversed(matches)
@@ -0,0 +1,142 @@
+"""
+Buffered activity log writer.
+
+``log_activity`` used to INSERT one row inside every login, issue, return and
+fine action.  Events are now put on an in-process queue and a daemon thread
+writes them with ``bulk_create`` once ``ACTIVITY_LOG_BATCH_SIZE`` events are
+waiting or ``ACTIVITY_LOG_FLUSH_INTERVAL`` seconds have passed, whichever
+comes first.  Whatever is still queued is flushed at interpreter exit.
+
+Set ``ACTIVITY_LOG_ASYNC = False`` (tests, management shells) to write each
+event synchronously as before.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Failed batches are retried this many times before falling back to row-by-row
+FLUSH_RETRIES = 3
+
+
+class LogBuffer:
+    def __init__(self, batch_size, interval):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.pid = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    def put(self, entry):
+        self._ensure_thread()
+        self.queue.put(entry)
+        if self.queue.qsize() >= self.batch_size:
+            self.wakeup.set()
+
+    def _ensure_thread(self):
+        # A forked worker inherits the parent's queue object but not its
+        # thread, so each process starts its own writer on first use.
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+                self.pid = os.getpid()
+                self.thread = None
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='activitylog-writer', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Activity log flush failed")
+            finally:
+                close_old_connections()
+
+    def _drain(self):
+        entries = []
+        while True:
+            try:
+                entries.append(self.queue.get_nowait())
+            except queue.Empty:
+                return entries
+
+    def flush(self):
+        """Write everything queued so far. Returns the number of rows written."""
+        with self.flush_lock:
+            entries = self._drain()
+            written = 0
+            for start in range(0, len(entries), self.batch_size):
+                written += write_entries(entries[start:start + self.batch_size], requeue=self.queue.put)
+            return written
+
+
+def write_entries(entries, requeue=None):
+    """
+    Insert ``entries``; returns how many were written.  Rows the database
+    rejects are dropped, rows that failed for any other reason (the server
+    being unreachable, say) are handed to ``requeue`` for the next flush.
+    """
+    from .models import ActivityLog
+
+    for attempt in range(FLUSH_RETRIES):
+        try:
+            ActivityLog.objects.bulk_create([ActivityLog(**e) for e in entries])
+            return len(entries)
+        except Exception:
+            logger.warning("Activity log batch of %d failed (attempt %d)", len(entries), attempt + 1,
+                           exc_info=True)
+            close_old_connections()
+            time.sleep(0.1 * (attempt + 1))
+
+    # Isolate whichever row is poisoning the batch so the rest are kept
+    written = 0
+    for e in entries:
+        try:
+            ActivityLog.objects.create(**e)
+            written += 1
+        except (DataError, IntegrityError):
+            logger.error("Dropped activity log entry %r", e, exc_info=True)
+        except Exception:
+            if requeue is None:
+                logger.error("Dropped activity log entry %r", e, exc_info=True)
+            else:
+                requeue(e)
+    return written
+
+
+_buffer = LogBuffer(
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100),
+    interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 2.0),
+)
+
+
+def enqueue(entry):
+    """Record one activity log entry (a dict of ActivityLog field values)."""
+    if getattr(settings, 'ACTIVITY_LOG_ASYNC', True):
+        _buffer.put(entry)
+    else:
+        write_entries([entry])
+
+
+def flush():
+    return _buffer.flush()
+
+
+atexit.register(flush)
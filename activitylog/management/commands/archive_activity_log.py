@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from activitylog.archive import archive_old_months, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = ('Move activity log months older than the retention window into '
+            'compressed NDJSON archives under media storage.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.ACTIVITY_LOG_RETENTION_MONTHS,
+                            help='Whole months (besides the current one) kept in the database.')
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options['months'])
+        archives = archive_old_months(options['months'])
+        for archive in archives:
+            self.stdout.write(f'{archive.month:%Y-%m}: {archive.rows} entries -> {archive.file.name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {len(archives)} month(s); keeping entries from {cutoff:%d %b %Y}.'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('book_added', 'Book Added'), ('book_edited', 'Book Edited'), ('book_deleted', 'Book Deleted'), ('book_issued', 'Book Issued'), ('book_returned', 'Book Returned'), ('fine_paid', 'Fine Marked Paid'), ('fine_waived', 'Fine Waived'), ('user_added', 'User Added'), ('user_edited', 'User Edited'), ('user_deleted', 'User Deleted'), ('user_login', 'User Login'), ('user_logout', 'User Logout')], max_length=50)),
+                ('description', models.TextField()),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activity_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+    ]
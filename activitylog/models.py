@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import User
 
 
@@ -21,7 +22,8 @@ class ActivityLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='activity_logs')
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     description = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Stamped when the event happens, not when the buffered writer flushes it
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
     def __str__(self):
@@ -29,6 +31,29 @@ class ActivityLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['action', 'timestamp'], name='activitylog_action_ts_idx'),
+            models.Index(fields=['user', 'timestamp'], name='activitylog_user_ts_idx'),
+        ]
+
+
+class LogArchive(models.Model):
+    """
+    One month of activity log moved out of the hot table into a gzipped
+    NDJSON file (see activitylog/archive.py).  Rows with ids up to
+    ``last_id`` in that month are deleted from ``ActivityLog``.
+    """
+    month = models.DateField(unique=True, help_text="First day of the archived month.")
+    file = models.FileField(upload_to='activitylog/archive/')
+    rows = models.PositiveIntegerField(default=0)
+    last_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"Activity archive {self.month:%b %Y} — {self.rows} entries"
 
 
 ACTION_ICONS = {
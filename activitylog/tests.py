@@ -1,3 +1,166 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import IntegrityError, OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from . import archive, buffer
+from .models import ActivityLog, LogArchive
+
+
+def entry(n, **fields):
+    return {'user_id': None, 'action': 'user_login', 'description': f'event {n}',
+            'ip_address': None, 'timestamp': timezone.now(), **fields}
+
+
+class LogBufferTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.object(buffer.time, 'sleep'))
+        self.enterContext(mock.patch.object(buffer, 'close_old_connections'))
+
+    def descriptions(self):
+        return sorted(ActivityLog.objects.values_list('description', flat=True))
+
+    def test_writer_thread_flushes_once_a_batch_is_waiting(self):
+        flushed = threading.Event()
+        batches = []
+
+        def write(entries, requeue=None):
+            batches.append([e['description'] for e in entries])
+            flushed.set()
+            return len(entries)
+
+        log = buffer.LogBuffer(batch_size=3, interval=60)
+        with mock.patch.object(buffer, 'write_entries', write):
+            log.put(entry(1))
+            log.put(entry(2))
+            self.assertFalse(flushed.wait(0.2))
+            log.put(entry(3))
+            self.assertTrue(flushed.wait(5))
+        self.assertEqual(batches, [['event 1', 'event 2', 'event 3']])
+
+    @override_settings(ACTIVITY_LOG_ASYNC=True)
+    def test_flush_writes_whatever_is_queued(self):
+        log = buffer.LogBuffer(batch_size=2, interval=60)
+        with mock.patch.object(buffer, '_buffer', log), mock.patch.object(log, '_ensure_thread'):
+            for n in range(5):
+                buffer.enqueue(entry(n))
+            self.assertEqual(ActivityLog.objects.count(), 0)
+            self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(self.descriptions(), [f'event {n}' for n in range(5)])
+
+    def test_interpreter_exit_flushes_the_queue(self):
+        script = (
+            "import django; django.setup()\n"
+            "from activitylog import buffer\n"
+            "buffer.write_entries = lambda entries, requeue=None: print(len(entries)) or len(entries)\n"
+            "buffer.enqueue({'description': 'a'}); buffer.enqueue({'description': 'b'})\n"
+        )
+        env = {**os.environ, 'ACTIVITY_LOG_ASYNC': 'True', 'ACTIVITY_LOG_FLUSH_INTERVAL': '60'}
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.stdout.split(), ['2'], result.stderr)
+
+    def test_failed_batch_keeps_its_entries(self):
+        bulk_create = ActivityLog.objects.bulk_create
+        attempts = []
+
+        def fail_first(objs):
+            attempts.append(len(objs))
+            if len(attempts) == 1:
+                raise OperationalError('gone away')
+            return bulk_create(objs)
+
+        with mock.patch.object(ActivityLog.objects, 'bulk_create', fail_first), self.assertLogs(buffer.logger):
+            self.assertEqual(buffer.write_entries([entry(1), entry(2)]), 2)
+        self.assertEqual(attempts, [2, 2])
+        self.assertEqual(self.descriptions(), ['event 1', 'event 2'])
+
+    def test_rejected_row_is_dropped_and_the_rest_kept(self):
+        create = ActivityLog.objects.create
+
+        def reject_second(**fields):
+            if fields['description'] == 'event 2':
+                raise IntegrityError('bad row')
+            return create(**fields)
+
+        with mock.patch.object(ActivityLog.objects, 'bulk_create', side_effect=IntegrityError('bad batch')), \
+                mock.patch.object(ActivityLog.objects, 'create', reject_second), self.assertLogs(buffer.logger):
+            self.assertEqual(buffer.write_entries([entry(1), entry(2), entry(3)]), 2)
+        self.assertEqual(self.descriptions(), ['event 1', 'event 3'])
+
+    def test_flush_during_an_outage_keeps_entries_for_the_next_one(self):
+        log = buffer.LogBuffer(batch_size=10, interval=60)
+        with mock.patch.object(log, '_ensure_thread'):
+            log.put(entry(1))
+            log.put(entry(2))
+        down = OperationalError('server has gone away')
+        with mock.patch.object(ActivityLog.objects, 'bulk_create', side_effect=down), \
+                mock.patch.object(ActivityLog.objects, 'create', side_effect=down), self.assertLogs(buffer.logger):
+            self.assertEqual(log.flush(), 0)
+        self.assertEqual(ActivityLog.objects.count(), 0)
+
+        self.assertEqual(log.flush(), 2)
+        self.assertEqual(self.descriptions(), ['event 1', 'event 2'])
+
+
+class ArchiveTests(TestCase):
+    FIELDS = ('id', 'timestamp', 'user_id', 'action', 'description', 'ip_address')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('asha', first_name='Asha', role='student')
+        start, end = archive.month_bounds(date(2026, 9, 1))
+
+        def log(timestamp, **fields):
+            return ActivityLog.objects.create(**{'timestamp': timestamp, 'action': 'user_login',
+                                                 'description': 'signed in', **fields})
+
+        cls.september = [
+            log(start, user=cls.user, ip_address='10.0.0.7'),
+            log(start + timedelta(days=12), action='fine_paid', description='Paid ₹40 — "late"'),
+            log(end - timedelta(microseconds=1), user=cls.user),
+        ]
+        cls.kept = [log(start - timedelta(microseconds=1)), log(end)]
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def values(self, logs):
+        return [tuple(getattr(log, f) for f in self.FIELDS) for log in logs]
+
+    def test_archived_month_is_deleted_and_read_back_intact(self):
+        delete_archived = archive._delete_archived
+
+        def written_meanwhile(log_archive):
+            # A late row for the month lands after the file was written
+            self.late = ActivityLog.objects.create(timestamp=self.september[1].timestamp,
+                                                   action='user_logout', description='late')
+            return delete_archived(log_archive)
+
+        with mock.patch.object(archive, '_delete_archived', written_meanwhile):
+            log_archive = archive.archive_month(date(2026, 9, 1))
+
+        self.assertEqual((log_archive.rows, log_archive.last_id), (3, self.september[-1].pk))
+        self.assertEqual(LogArchive.objects.get(), log_archive)
+        self.assertCountEqual(ActivityLog.objects.values_list('pk', flat=True),
+                              [log.pk for log in self.kept] + [self.late.pk])
+
+        start, end = archive.month_bounds(date(2026, 9, 1))
+        read = list(archive.read_archives(start, end))
+        self.assertEqual(self.values(read), self.values(reversed(self.september)))
+        self.assertEqual(read[0].user.username, 'asha')
+        self.assertIsNone(read[1].user_id)
+
+        self.assertEqual(self.values(archive.read_archives(start, end, action='fine_paid')),
+                         self.values(self.september[1:2]))
+        self.assertEqual(self.values(archive.read_archives(start, end, search='ASHA')),
+                         self.values([self.september[2], self.september[0]]))
@@ -1,4 +1,6 @@
-from .models import ActivityLog
+from django.utils import timezone
+
+from .buffer import enqueue
 
 
 def log_activity(user, action, description, request=None):
@@ -8,9 +10,10 @@ def log_activity(user, action, description, request=None):
         x_forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
         ip = x_forwarded.split(',')[0] if x_forwarded else request.META.get('REMOTE_ADDR')
 
-    ActivityLog.objects.create(
-        user=user,
-        action=action,
-        description=description,
-        ip_address=ip
-    )
\ No newline at end of file
+    enqueue({
+        'user_id': getattr(user, 'pk', None),
+        'action': action,
+        'description': description,
+        'ip_address': ip,
+        'timestamp': timezone.now(),
+    })
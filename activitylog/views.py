@@ -1,7 +1,14 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-from .models import ActivityLog, ACTION_ICONS
+from django.utils.dateparse import parse_date
+from library_management.pagination import KeysetPaginator, estimate_count, filter_querystring
+from .archive import day_bounds, month_start, read_archives
+from .models import ActivityLog, LogArchive, ACTION_ICONS
+
+LOGS_PER_PAGE = 50
+# Above this many matches the header shows "1000+" instead of an exact COUNT
+COUNT_CAP = 1000
 
 
 @login_required
@@ -27,12 +34,31 @@ def activity_log_list(request):
         )
     if action_filter:
         logs = logs.filter(action=action_filter)
-    if date_filter:
-        logs = logs.filter(timestamp__date=date_filter)
+    try:
+        day = parse_date(date_filter) if date_filter else None
+    except ValueError:
+        day = None
+    archive_month = None
+    page = None
+    if day and LogArchive.objects.filter(month=month_start(day)).exists():
+        # That month has been moved out of the database; read it from its archive
+        archive_month = month_start(day)
+        entries = list(read_archives(*day_bounds(day), action_filter or None, search or None))
+        total_count, count_exact = len(entries), True
+    else:
+        if day:
+            # A half-open range keeps the timestamp indexes usable (unlike __date)
+            start, end = day_bounds(day)
+            logs = logs.filter(timestamp__gte=start, timestamp__lt=end)
+        page = KeysetPaginator(logs, ordering=('-timestamp', '-id'), per_page=LOGS_PER_PAGE).page(
+            request.GET.get('cursor'))
+        entries = page.items
+        total_count, count_exact = estimate_count(
+            logs, cap=COUNT_CAP, unfiltered=not (search or action_filter or day))
 
     # Add icon and color to each log
     logs_with_icons = []
-    for log in logs[:200]:  # limit to 200 for performance
+    for log in entries:
         icon, color = ACTION_ICONS.get(log.action, ('bi-activity', 'secondary'))
         logs_with_icons.append({
             'log': log,
@@ -42,10 +68,14 @@ def activity_log_list(request):
 
     context = {
         'logs': logs_with_icons,
+        'page': page,
+        'filter_qs': filter_querystring(request),
         'search': search,
         'action_filter': action_filter,
         'date_filter': date_filter,
         'action_choices': ActivityLog.ACTION_CHOICES,
-        'total_count': logs.count(),
+        'total_count': total_count,
+        'count_exact': count_exact,
+        'archive_month': archive_month,
     }
-    return render(request, 'activitylog/activity_log.html', context)
\ No newline at end of file
+    return render(request, 'activitylog/activity_log.html', context)
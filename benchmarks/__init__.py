@@ -0,0 +1,14 @@
+"""
+Offline benchmark suite: seeded synthetic data on SQLite plus timed requests
+against the list views, the dashboard, the activity log and every report
+export.
+
+    python -m benchmarks run --size 10k --size 100k --out bench.json
+    python -m benchmarks compare before.json after.json
+
+Each size gets its own database under ``var/benchmarks/`` (generated once
+and reused while the seed and generator version match) and runs in its own
+process, so caches start cold and memory figures don't leak between sizes.
+Results are JSON: latency percentiles, query counts, response size and
+peak Python memory per scenario.
+"""
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_size(text):
+    """'1k' → 1000, '250k' → 250000, '1m' → 1000000, '5000' → 5000."""
+    text = text.strip().lower()
+    if text[-1:] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def database_path(loans, seed):
+    return BASE_DIR / 'var' / 'benchmarks' / f'bench-{loans}-s{seed}.sqlite3'
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ─────────────────────────────────────────
+# run: one child process per size
+# ─────────────────────────────────────────
+def run(args):
+    sizes = [parse_size(s) for s in args.size or ['1k']]
+    report = {'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'commit': git_commit(), 'seed': args.seed,
+              'iterations': args.iterations, 'warmup': args.warmup, 'sizes': [], 'results': []}
+    for loans in sizes:
+        print(f'== {loans} circulation records', file=sys.stderr)
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+            out = tmp.name
+        command = [sys.executable, '-m', 'benchmarks', '_size', str(loans), out, '--seed', str(args.seed),
+                   '--iterations', str(args.iterations), '--warmup', str(args.warmup)]
+        if args.rebuild:
+            command.append('--rebuild')
+        for name in args.only or []:
+            command += ['--only', name]
+        try:
+            subprocess.run(command, cwd=BASE_DIR, check=True)
+            child = json.loads(Path(out).read_text())
+        finally:
+            Path(out).unlink(missing_ok=True)
+        report['environment'] = child.pop('environment')
+        report['results'].extend(child.pop('results'))
+        report['sizes'].append(child)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + '\n')
+        print(f'Wrote {args.out}', file=sys.stderr)
+    else:
+        print(text)
+
+
+def run_one_size(args):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCH_DB'] = str(database_path(args.loans, args.seed))
+    import django
+    django.setup()
+    from . import runner
+
+    def progress(message):
+        print(message, file=sys.stderr, flush=True)
+
+    result = runner.run_size(args.loans, args.seed, args.iterations, args.warmup,
+                             rebuild=args.rebuild, only=set(args.only or ()), progress=progress)
+    result['environment'] = runner.environment()
+    Path(args.out).write_text(json.dumps(result))
+
+
+# ─────────────────────────────────────────
+# compare: two result files side by side
+# ─────────────────────────────────────────
+def compare(args):
+    def load(path):
+        return {(r['size'], r['scenario']): r for r in json.loads(Path(path).read_text())['results']}
+
+    before, after = load(args.before), load(args.after)
+    print(f'{"size":>8}  {"scenario":<24} {"p50 before":>11} {"p50 after":>10} {"change":>8}  '
+          f'{"queries":>11}  {"peak KiB":>15}')
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        b, a = before[key], after[key]
+        old, new = b['latency_ms']['p50'], a['latency_ms']['p50']
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ''
+        if change > args.threshold or a['queries'] > b['queries']:
+            flag, regressions = '  <-- slower', regressions + 1
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f'{key[0]:>8}  {key[1]:<24} {old:>11.2f} {new:>10.2f} {change:>+7.1f}%  '
+              f'{b["queries"]:>5}→{a["queries"]:<5}  {b["peak_memory_kb"]:>7}→{a["peak_memory_kb"]:<7}{flag}')
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f'{key[0]:>8}  {key[1]:<24} only in {"before" if key in before else "after"}')
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('run', help='Generate data (if needed) and time every scenario.')
+    p.add_argument('--size', action='append',
+                   help='Circulation records, e.g. 1k, 100k, 1m. Repeatable; default 1k.')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--iterations', type=int, default=20)
+    p.add_argument('--warmup', type=int, default=2)
+    p.add_argument('--only', action='append', help='Run just this scenario. Repeatable.')
+    p.add_argument('--rebuild', action='store_true', help='Regenerate the data even if cached.')
+    p.add_argument('--out', help='Write the JSON result here instead of stdout.')
+    p.set_defaults(func=run)
+
+    p = commands.add_parser('_size')   # internal: one size, in its own process
+    p.add_argument('loans', type=int)
+    p.add_argument('out')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--iterations', type=int, default=20)
+    p.add_argument('--warmup', type=int, default=2)
+    p.add_argument('--only', action='append')
+    p.add_argument('--rebuild', action='store_true')
+    p.set_defaults(func=run_one_size)
+
+    p = commands.add_parser('compare', help='Compare two result files.')
+    p.add_argument('before')
+    p.add_argument('after')
+    p.add_argument('--threshold', type=float, default=10.0, help='Percent p50 change to flag (default 10).')
+    p.add_argument('--fail-on-regression', action='store_true')
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Seeded synthetic library data, written with ``bulk_create``.
+
+Everything is scaled from one number, the count of circulation records
+(loans).  The same seed and size always produce the same rows, so two
+benchmark runs on different code see identical data.
+"""
+
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from activitylog.models import ActivityLog
+from books.copies import barcode
+from books.models import Book, BookCopy, Category, Publisher
+from books.sequences import allocate_book_ids
+from circulation.models import Fine, IssuedBook
+from reservation.models import Reservation
+from reviews.models import Review
+
+# Bump when the shape of the generated data changes, so cached databases are rebuilt
+VERSION = 2
+BATCH = 5000
+LOAN_DAYS = 14
+HISTORY_DAYS = 730
+
+WORDS = ('river', 'shadow', 'garden', 'empire', 'silent', 'winter', 'code', 'light', 'storm',
+         'quantum', 'history', 'journey', 'machine', 'ocean', 'forest', 'secret', 'modern',
+         'theory', 'glass', 'iron', 'city', 'night', 'data', 'music', 'stone', 'island', 'fire',
+         'logic', 'memory', 'garden', 'design', 'mountain', 'signal', 'market', 'dream', 'atlas')
+FIRST = ('Asha', 'Ravi', 'Meera', 'Arjun', 'Priya', 'Kiran', 'Neha', 'Vikram', 'Anita', 'Rahul',
+         'Sara', 'John', 'Li', 'Maria', 'Omar', 'Yuki', 'Elena', 'Tomas', 'Fatima', 'David')
+LAST = ('Sharma', 'Patel', 'Iyer', 'Khan', 'Gupta', 'Nair', 'Singh', 'Das', 'Rao', 'Menon',
+        'Smith', 'Garcia', 'Chen', 'Silva', 'Novak', 'Kim', 'Okafor', 'Muller', 'Rossi', 'Ali')
+CATEGORIES = ('Fiction', 'Science', 'History', 'Technology', 'Mathematics', 'Philosophy',
+              'Biography', 'Poetry', 'Economics', 'Engineering', 'Art', 'Reference')
+
+
+def sizes_for(loans):
+    """Row counts for every table, derived from the number of loans."""
+    return {
+        'loans': loans,
+        'books': max(200, loans // 10),
+        'students': max(100, loans // 20),
+        'reservations': max(50, loans // 20),
+        'reviews': max(100, loans // 5),
+        'logs': loans,
+        'categories': len(CATEGORIES),
+    }
+
+
+def _bulk(model, rows):
+    """Insert ``rows`` in batches, each batch in its own transaction."""
+    for start in range(0, len(rows), BATCH):
+        with transaction.atomic():
+            model.objects.bulk_create(rows[start:start + BATCH])
+
+
+def _name(rng):
+    return rng.choice(FIRST), rng.choice(LAST)
+
+
+def generate(loans, seed=42, progress=print, counts=None, history_days=HISTORY_DAYS):
+    """
+    Fill an empty, migrated database. Returns the row counts.
+
+    ``counts`` overrides the table sizes derived from ``loans`` (the query
+    budget tests use a few rows per table), and loans are spread over the
+    last ``history_days``; only those from the last 45 days can still be out.
+    """
+    rng = random.Random(seed)
+    counts = dict(counts or sizes_for(loans))
+    today = timezone.localdate()
+    started = time.monotonic()
+
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = OFF')
+
+    def step(label):
+        progress(f'  {label:<14} {time.monotonic() - started:7.1f}s')
+
+    # Staff, categories, publishers
+    admin = User.objects.create_user('bench-admin', password='bench', role='admin',
+                                     first_name='Bench', last_name='Admin')
+    librarian = User.objects.create_user('bench-librarian', password='bench', role='librarian',
+                                         first_name='Bench', last_name='Librarian')
+    Category.objects.bulk_create([
+        Category(name=CATEGORIES[i % len(CATEGORIES)] + (f' {i // len(CATEGORIES) + 1}' if i >= len(CATEGORIES) else ''))
+        for i in range(counts.get('categories', len(CATEGORIES)))
+    ])
+    Publisher.objects.bulk_create([Publisher(name=f'{rng.choice(WORDS).title()} Press {i}') for i in range(40)])
+    category_ids = list(Category.objects.values_list('pk', flat=True))
+    publisher_ids = list(Publisher.objects.values_list('pk', flat=True))
+
+    # Students
+    students = []
+    for i in range(counts['students']):
+        first, last = _name(rng)
+        students.append(User(username=f'student{i:07d}', first_name=first, last_name=last,
+                             email=f'student{i}@example.org', role='student',
+                             membership_id=f'MEM{i:07d}', password='!'))
+    _bulk(User, students)
+    student_ids = list(User.objects.filter(role='student').order_by('pk').values_list('pk', flat=True))
+    step('students')
+
+    # Books and their physical copies (marked on loan once the loans are known)
+    book_ids = allocate_book_ids(counts['books'])
+    books, stock = [], {}
+    for i, book_id in enumerate(book_ids):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+        first, last = _name(rng)
+        books.append(Book(book_id=book_id, title=title, author=f'{first} {last}', isbn=f'979{seed % 100:02d}{i:09d}',
+                          category_id=rng.choice(category_ids), publisher_id=rng.choice(publisher_ids),
+                          rack_number=f'R{rng.randint(1, 60)}',
+                          description=' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 40)))))
+        stock[book_id] = rng.randint(2, 6)
+    _bulk(Book, books)
+    pk_of = dict(Book.objects.values_list('book_id', 'pk'))
+    _bulk(BookCopy, [BookCopy(book_id=pk_of[book_id], barcode=barcode(book_id, n))
+                     for book_id in book_ids for n in range(1, stock[book_id] + 1)])
+    shelf = {pk: [] for pk in pk_of.values()}
+    for copy_pk, book_pk in BookCopy.objects.order_by('pk').values_list('pk', 'book_id').iterator():
+        shelf[book_pk].append(copy_pk)
+    book_pks = sorted(shelf)
+    step('books')
+
+    # Loans: most returned, the recent ones still out (some overdue)
+    on_loan, loans_rows, late = [], [], []
+    for i in range(counts['loans']):
+        issue = today - timedelta(days=int(history_days * (1 - i / counts['loans'])))
+        due = issue + timedelta(days=LOAN_DAYS)
+        book = rng.choice(book_pks)
+        loan = IssuedBook(student_id=rng.choice(student_ids), book_id=book, issued_by_id=librarian.pk,
+                          issue_date=issue, due_date=due)
+        recent = (today - issue).days < 45
+        if recent and rng.random() < 0.6 and shelf[book]:
+            loan.copy_id = shelf[book].pop()
+            on_loan.append(loan.copy_id)
+            loan.status = 'overdue' if due < today else 'issued'
+        else:
+            loan.status = 'returned'
+            loan.return_date = min(today, issue + timedelta(days=rng.randint(1, LOAN_DAYS + 7)))
+        loans_rows.append(loan)
+    _bulk(IssuedBook, loans_rows)
+    step('loans')
+
+    # Fines for late returns and overdue loans
+    fine_per_day = Decimal('2.00')
+    for row in IssuedBook.objects.order_by('pk').values_list('pk', 'student_id', 'due_date', 'return_date').iterator():
+        days = ((row[3] or today) - row[2]).days
+        if days > 0:
+            late.append((row[0], row[1], days))
+    fines = []
+    for loan_id, student_id, days in late:
+        status = rng.choices(('paid', 'unpaid', 'waived'), weights=(6, 3, 1))[0]
+        fines.append(Fine(issued_book_id=loan_id, student_id=student_id, amount=fine_per_day * days,
+                          overdue_days=days, fine_per_day=fine_per_day, status=status,
+                          paid_at=timezone.now() if status == 'paid' else None,
+                          paid_by_id=librarian.pk if status == 'paid' else None))
+    _bulk(Fine, fines)
+    step('fines')
+
+    # The copies of loans still out
+    with transaction.atomic():
+        for start_at in range(0, len(on_loan), BATCH):
+            BookCopy.objects.filter(pk__in=on_loan[start_at:start_at + BATCH]).update(state=BookCopy.ON_LOAN)
+    step('copies')
+
+    # Reservations and reviews
+    now = timezone.now()
+    _bulk(Reservation, [
+        Reservation(user_id=rng.choice(student_ids), book_id=rng.choice(book_pks),
+                    status=rng.choice(('pending', 'ready', 'fulfilled', 'cancelled', 'expired')),
+                    expires_on=now + timedelta(days=rng.randint(-30, 7)))
+        for _ in range(counts['reservations'])
+    ])
+    pairs = set()
+    while len(pairs) < min(counts['reviews'], len(student_ids) * len(book_pks)):
+        pairs.add((rng.choice(student_ids), rng.choice(book_pks)))
+    _bulk(Review, [Review(user_id=u, book_id=b, rating=rng.choices((1, 2, 3, 4, 5), weights=(1, 1, 3, 5, 4))[0],
+                          comment=' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 20))))
+                   for u, b in sorted(pairs)])
+    step('reviews')
+
+    # Activity log, spread over the retention window
+    actions = [code for code, _ in ActivityLog.ACTION_CHOICES]
+    window = 180 * 24 * 3600
+    start = timezone.make_aware(datetime.combine(today, dt_time.min)) - timedelta(seconds=window)
+    _bulk(ActivityLog, [
+        ActivityLog(user_id=rng.choice(student_ids) if rng.random() < 0.7 else librarian.pk,
+                    action=rng.choice(actions), description=f'Synthetic event {i}',
+                    timestamp=start + timedelta(seconds=window * i / counts['logs']),
+                    ip_address=f'10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}')
+        for i in range(counts['logs'])
+    ])
+    step('activity log')
+
+    # Derived data the views read
+    from books import search
+    from reviews import ratings
+    ratings.rebuild()
+    search.rebuild_index()
+    step('indexes')
+
+    counts.update(admin=admin.pk, fines=len(fines), copies=sum(stock.values()))
+    return counts
+
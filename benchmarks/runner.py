@@ -0,0 +1,150 @@
+"""
+Time every scenario against one generated database.
+
+Runs inside a process whose settings are ``benchmarks.settings`` and whose
+``BENCH_DB`` points at the database for this size (see ``__main__``).
+"""
+
+import json
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from . import data
+from .scenarios import SCENARIOS
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class QueryCounter:
+    """An ``execute_wrapper`` that only counts, so it barely affects the timings."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def latency_summary(samples):
+    ordered = sorted(samples)
+    summary = {'min': ordered[0], 'mean': statistics.fmean(ordered), 'max': ordered[-1]}
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+        summary.update({f'p{p}': cuts[p - 1] for p in PERCENTILES})
+    else:
+        summary.update({f'p{p}': ordered[0] for p in PERCENTILES})
+    return {key: round(value, 3) for key, value in summary.items()}
+
+
+def prepare_database(path, loans, seed, rebuild=False, progress=print):
+    """Generate the database at ``path`` unless an identical one is already there."""
+    meta_path = Path(f'{path}.json')
+    wanted = {'loans': loans, 'seed': seed, 'generator': data.VERSION}
+    if not rebuild and meta_path.exists() and Path(path).exists():
+        meta = json.loads(meta_path.read_text())
+        if {k: meta.get(k) for k in wanted} == wanted:
+            return meta['counts']
+
+    connection.close()
+    for suffix in ('', '-wal', '-shm', '.json'):
+        Path(f'{path}{suffix}').unlink(missing_ok=True)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    progress(f'Generating {loans} loans (seed {seed}) into {path}')
+    call_command('migrate', verbosity=0)
+    counts = data.generate(loans, seed=seed, progress=progress)
+    meta_path.write_text(json.dumps({**wanted, 'counts': counts}, indent=2))
+    return counts
+
+
+def _fetch(client, url):
+    response = client.get(url)
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return response.status_code, len(body)
+
+
+def run_scenario(client, scenario, iterations, warmup):
+    url = reverse(scenario.url_name)
+    if scenario.query:
+        url += '?' + urlencode(scenario.query)
+
+    for _ in range(warmup):
+        _fetch(client, url)
+
+    timings, queries = [], []
+    for _ in range(iterations):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            status, size = _fetch(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+
+    # One extra, untimed pass with allocation tracing for the memory peak
+    tracemalloc.start()
+    try:
+        _fetch(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'scenario': scenario.name,
+        'url': url,
+        'status': status,
+        'iterations': iterations,
+        'latency_ms': latency_summary(timings),
+        'queries': int(statistics.median(queries)),
+        'queries_max': max(queries),
+        'bytes': size,
+        'peak_memory_kb': round(peak / 1024),
+    }
+
+
+def run_size(loans, seed, iterations, warmup, rebuild=False, only=None, progress=print):
+    from accounts.models import User
+
+    counts = prepare_database(settings.DATABASES['default']['NAME'], loans, seed, rebuild, progress)
+    client = Client()
+    client.force_login(User.objects.get(username='bench-admin'))
+
+    results = []
+    for scenario in SCENARIOS:
+        if only and scenario.name not in only:
+            continue
+        result = run_scenario(client, scenario, iterations, warmup)
+        progress(f'  {scenario.name:<24} p50 {result["latency_ms"]["p50"]:9.2f} ms  '
+                 f'p95 {result["latency_ms"]["p95"]:9.2f} ms  {result["queries"]:4d} queries  '
+                 f'{result["peak_memory_kb"]:7d} KiB')
+        results.append({'size': loans, **result})
+
+    return {
+        'size': loans,
+        'rows': counts,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'results': results,
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
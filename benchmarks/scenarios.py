@@ -0,0 +1,35 @@
+"""The requests each benchmark run times, all made as an admin."""
+
+from typing import NamedTuple
+
+
+class Scenario(NamedTuple):
+    name: str
+    url_name: str
+    query: dict = {}
+
+
+SCENARIOS = [
+    # Catalog
+    Scenario('book_list', 'books:book_list'),
+    Scenario('book_list_search', 'books:book_list', {'q': 'river shadow'}),
+    Scenario('book_list_available', 'books:book_list', {'availability': 'available'}),
+    # Circulation
+    Scenario('issued_list', 'circulation:issued_list'),
+    Scenario('issued_list_overdue', 'circulation:issued_list', {'status': 'overdue'}),
+    Scenario('issued_list_search', 'circulation:issued_list', {'search': 'Sharma'}),
+    Scenario('fine_list', 'circulation:fine_list'),
+    Scenario('fine_list_unpaid', 'circulation:fine_list', {'status': 'unpaid'}),
+    # Dashboard and activity log
+    Scenario('dashboard', 'dashboard:home'),
+    Scenario('activity_log_list', 'activitylog:activity_log_list'),
+    Scenario('activity_log_filtered', 'activitylog:activity_log_list', {'action': 'book_issued'}),
+    # Reports (every export streams the whole file)
+    Scenario('reports_home', 'reports:reports_home'),
+    Scenario('export_issued_excel', 'reports:export_issued_excel'),
+    Scenario('export_issued_pdf', 'reports:export_issued_pdf'),
+    Scenario('export_fines_excel', 'reports:export_fines_excel'),
+    Scenario('export_fines_pdf', 'reports:export_fines_pdf'),
+    Scenario('export_books_excel', 'reports:export_books_excel'),
+    Scenario('export_overdue_pdf', 'reports:export_overdue_pdf'),
+]
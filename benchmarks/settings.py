@@ -0,0 +1,36 @@
+"""Project settings pointed at a throwaway SQLite database for benchmarking."""
+
+import os
+
+from library_management.settings import *  # noqa: F401,F403
+from library_management.settings import BASE_DIR
+
+BENCH_DIR = BASE_DIR / 'var' / 'benchmarks'
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB', str(BENCH_DIR / 'bench.sqlite3')),
+        'OPTIONS': {'timeout': 30},
+    }
+}
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+MEDIA_ROOT = BENCH_DIR / 'media'
+SIMILARITY_INDEX_DIR = str(BENCH_DIR / 'index')
+
+# Measure the views, not background writers or the instrumentation itself
+ACTIVITY_LOG_ASYNC = False
+THUMBNAIL_ASYNC = False
+QUERY_INSTRUMENTATION = False
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'null': {'class': 'logging.NullHandler'}},
+    'root': {'handlers': ['null']},
+}
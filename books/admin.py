@@ -2,7 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import Book, Category, Publisher
+from .models import Book, BookCopy, Category, Publisher, CoBorrowRun
 
 
 @admin.register(Category)
@@ -17,10 +17,36 @@ class PublisherAdmin(admin.ModelAdmin):
     search_fields = ['name']
 
 
+class BookCopyInline(admin.TabularInline):
+    model = BookCopy
+    fields = ['barcode', 'state', 'added_on']
+    readonly_fields = ['added_on']
+    extra = 0
+
+
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
     list_display = ['book_id', 'title', 'author', 'category',
                     'total_copies', 'available_copies', 'date_added']
     list_filter = ['category', 'date_added']
     search_fields = ['title', 'author', 'isbn', 'book_id']
-    readonly_fields = ['book_id', 'date_added']
\ No newline at end of file
+    readonly_fields = ['book_id', 'date_added']
+    inlines = [BookCopyInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_copies()
+
+
+@admin.register(BookCopy)
+class BookCopyAdmin(admin.ModelAdmin):
+    list_display = ['barcode', 'book', 'state', 'added_on']
+    list_filter = ['state']
+    search_fields = ['barcode', 'book__title', 'book__book_id']
+    list_select_related = ['book']
+    raw_id_fields = ['book']
+
+
+@admin.register(CoBorrowRun)
+class CoBorrowRunAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'full', 'last_issue_id', 'books_updated', 'duration_ms']
+    readonly_fields = ['started_at', 'full', 'last_issue_id', 'books_updated', 'duration_ms']
@@ -0,0 +1,205 @@
+"""
+Barcode lookup for the circulation desk, served from process memory.
+
+Desk scanners read a copy's spine barcode (books/copies.py), a ``book_id``
+or an ISBN, often the bare EAN-13 digits of an ISBN stored with hyphens.
+Each worker keeps a hash index from every form of those codes to the book,
+its available copies and, for a spine barcode, that copy and its state.
+The index is loaded with one ``values_list`` query over books and their
+copies (at startup from wsgi.py/asgi.py, or on first use), so a scan is a
+dict lookup and no query.
+
+Freshness works like circulation/policy.py: a version number in the shared
+cache, bumped after every committed change.  Each bump also stores the
+primary keys of the books that changed (a change to a copy counts as one
+to its book), so a worker a few versions behind re-reads just those books
+and their copies (one small query) instead of the whole table.  A
+worker that finds a change record missing, or is more than ``MAX_DELTA``
+versions behind, reloads everything.  Book and copy save/delete
+(books/signals.py), stock changes (books/copies.py), checkouts and returns
+(circulation/signals.py) and the catalog importer publish changes.
+"""
+
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+
+from . import importer
+from .models import Book, BookCopy
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'books:barcodes:version'
+CHANGE_KEY = 'books:barcodes:change:{}'
+CHANGE_TIMEOUT = 3600
+MAX_DELTA = 200
+
+FIELDS = ('pk', 'book_id', 'isbn', 'copies__pk', 'copies__barcode', 'copies__state')
+
+
+class Hit(NamedTuple):
+    pk: int
+    book_id: str
+    isbn: str
+    available_copies: int
+    # Set when a copy's spine barcode was scanned
+    copy_id: int | None = None
+    barcode: str | None = None
+    state: str | None = None
+
+
+def codes_for(book_id, isbn):
+    """Every key a scan of this title may arrive as."""
+    keys = {book_id.upper(), isbn.strip().upper()}
+    digits = importer.normalize_isbn(isbn)
+    if digits:
+        keys.add(digits)
+    return keys
+
+
+class BarcodeIndex:
+    def __init__(self, version):
+        self.version = version
+        self.codes = {}     # scanned code → (book pk, copy pk or None for a title code)
+        self.books = {}     # book pk → (book_id, isbn, available_copies, {copy pk: (barcode, state)})
+
+    @staticmethod
+    def _keys(book_id, isbn, copies):
+        keys = dict.fromkeys(codes_for(book_id, isbn))
+        keys.update((barcode.upper(), copy_pk) for copy_pk, (barcode, state) in copies.items())
+        return keys
+
+    def put(self, pk, book_id, isbn, copies):
+        # New entries go in before stale codes come out, so a concurrent
+        # lookup never misses a book that is only being updated
+        old = self.books.get(pk)
+        available = sum(state == BookCopy.AVAILABLE for barcode, state in copies.values())
+        self.books[pk] = (book_id, isbn, available, copies)
+        keys = self._keys(book_id, isbn, copies)
+        for key, copy_pk in keys.items():
+            self.codes[key] = (pk, copy_pk)
+        if old:
+            self._forget(pk, self._keys(old[0], old[1], old[3]).keys() - keys.keys())
+
+    def drop(self, pk):
+        old = self.books.pop(pk, None)
+        if old:
+            self._forget(pk, self._keys(old[0], old[1], old[3]))
+
+    def _forget(self, pk, keys):
+        for key in keys:
+            if self.codes.get(key, (None,))[0] == pk:
+                del self.codes[key]
+
+    def lookup(self, code):
+        code = code.strip().upper()
+        entry = self.codes.get(code) or self.codes.get(importer.normalize_isbn(code))
+        row = self.books.get(entry[0]) if entry else None
+        if row is None:
+            return None
+        book_id, isbn, available, copies = row
+        if entry[1] is None:
+            return Hit(entry[0], book_id, isbn, available)
+        copy = copies.get(entry[1])
+        return Hit(entry[0], book_id, isbn, available, entry[1], *copy) if copy else None
+
+
+_lock = threading.Lock()
+_index: BarcodeIndex | None = None
+
+
+def current_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeded from the clock, as in circulation/policy.py
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _read(books):
+    """``(pk, book_id, isbn, {copy pk: (barcode, state)})`` for each of ``books``, from one LEFT JOIN."""
+    rows = {}
+    for pk, book_id, isbn, copy_pk, barcode, state in books.values_list(*FIELDS).iterator(chunk_size=5000):
+        row = rows.setdefault(pk, (pk, book_id, isbn, {}))
+        if copy_pk is not None:
+            row[3][copy_pk] = (barcode, state)
+    return rows.values()
+
+
+def load(version) -> BarcodeIndex:
+    index = BarcodeIndex(version)
+    for row in _read(Book.objects.all()):
+        index.put(*row)
+    return index
+
+
+def _catch_up(index, version):
+    """Apply the change records between ``index.version`` and ``version``; None if any is gone."""
+    if not 0 < version - index.version <= MAX_DELTA:
+        return None
+    keys = [CHANGE_KEY.format(v) for v in range(index.version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    pks = set().union(*changes.values())
+    seen = set()
+    for row in _read(Book.objects.filter(pk__in=pks)):
+        index.put(*row)
+        seen.add(row[0])
+    for pk in pks - seen:
+        index.drop(pk)
+    index.version = version
+    return index
+
+
+def get_index() -> BarcodeIndex:
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = (_index is not None and _catch_up(_index, version)) or load(version)
+        return _index
+
+
+def lookup(code) -> Hit | None:
+    return get_index().lookup(code)
+
+
+def warm():
+    """Load the index before the first scan; called once per process at startup."""
+    try:
+        index = get_index()
+        logger.info("Barcode index loaded: %d books", len(index.books))
+    except DatabaseError as e:     # e.g. not migrated yet; the first scan loads it instead
+        logger.warning("Barcode index not loaded at startup: %s", e)
+    finally:
+        # A server that forks workers after loading the app must not share this connection
+        connections.close_all()
+
+
+# ─────────────────────────────────────────
+# PUBLISHING CHANGES
+# ─────────────────────────────────────────
+def _publish(pks):
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:  # key missing or evicted: every worker reloads anyway
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        return
+    cache.set(CHANGE_KEY.format(version), pks, timeout=CHANGE_TIMEOUT)
+
+
+def changed(pks):
+    """Tell every worker these books changed, once the current transaction commits."""
+    pks = list(pks)
+    if pks:
+        transaction.on_commit(lambda: _publish(pks))
+
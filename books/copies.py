@@ -0,0 +1,63 @@
+"""
+Physical copies of a title: creating, numbering and withdrawing them.
+
+Each copy's barcode is its book ID plus a three-digit copy number
+(``LIB-0042-003``), printed on the spine label and scanned at the desk.
+A book's availability is derived from its copies' ``state`` (see
+``Book.objects.with_copies()``); checkout and return in
+circulation/services.py flip the state of one copy row.
+
+Writes here use ``bulk_create`` / ``update``, which send no model signals,
+so they tell the barcode index (books/barcodes.py) themselves.
+"""
+
+from . import barcodes
+from .models import BookCopy
+
+
+def barcode(book_id, number):
+    return f'{book_id}-{number:03d}'
+
+
+def new_copies(books_and_counts):
+    """Unsaved copies for freshly created books: ``[(book, count)]`` → BookCopy list, numbered from 1."""
+    return [BookCopy(book_id=book.pk, barcode=barcode(book.book_id, number))
+            for book, count in books_and_counts for number in range(1, count + 1)]
+
+
+def add_copies(book, count):
+    """Create ``count`` available copies of ``book``, numbered after the ones it has. Returns them."""
+    taken = set(book.copies.values_list('barcode', flat=True))
+    copies, number = [], 0
+    while len(copies) < count:
+        number += 1
+        code = barcode(book.book_id, number)
+        if code not in taken:
+            copies.append(BookCopy(book=book, barcode=code))
+    BookCopy.objects.bulk_create(copies)
+    barcodes.changed([book.pk])
+    return copies
+
+
+def set_stock(book, total):
+    """
+    Add copies, or withdraw available ones (highest numbers first), until
+    ``total`` are in stock.  Raises ValueError if that would mean
+    withdrawing copies that are on loan; run it in a transaction so a
+    failure leaves nothing half done.
+    """
+    in_stock = book.copies.filter(state__in=BookCopy.IN_STOCK)
+    current = in_stock.count()
+    if total > current:
+        add_copies(book, total - current)
+    elif total < current:
+        surplus = list(in_stock.filter(state=BookCopy.AVAILABLE)
+                       .order_by('-barcode').values_list('pk', flat=True)[:current - total])
+        if len(surplus) < current - total:
+            raise ValueError(f'{current - len(surplus)} copies are on loan; stock cannot go below that.')
+        withdrawn = BookCopy.objects.filter(pk__in=surplus, state=BookCopy.AVAILABLE).update(
+            state=BookCopy.WITHDRAWN)
+        if withdrawn < len(surplus):
+            raise ValueError('A copy went out on loan while the stock was being changed; try again.')
+        barcodes.changed([book.pk])
+    book.refresh_from_db(fields=['book_id'])    # drops the cached copy counts
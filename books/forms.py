@@ -1,5 +1,7 @@
 from django import forms
-from .models import Book, Category, Publisher
+from django.db import transaction
+from .models import Book, BookCopy, Category, Publisher
+from .copies import set_stock
 
 
 class CategoryForm(forms.ModelForm):
@@ -24,21 +26,74 @@ class PublisherForm(forms.ModelForm):
 
 
 class BookForm(forms.ModelForm):
+    # Not a Book column: the number of BookCopy rows in stock (books/copies.py)
+    copies = forms.IntegerField(
+        min_value=1, initial=1, label='Copies in stock',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+    )
+
     class Meta:
         model = Book
         fields = ['title', 'author', 'isbn', 'category', 'publisher',
-                  'total_copies', 'available_copies', 'rack_number',
-                  'cover_image', 'description']
+                  'rack_number', 'cover_image', 'description']
         widgets = {
             'title':            forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Book title'}),
             'author':           forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Author name'}),
             'isbn':             forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'ISBN number'}),
             'category':         forms.Select(attrs={'class': 'form-select'}),
             'publisher':        forms.Select(attrs={'class': 'form-select'}),
-            'total_copies':     forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
-            'available_copies': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
             'rack_number':      forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. A-12'}),
             'cover_image':      forms.FileInput(attrs={'class': 'form-control'}),
             'description':      forms.Textarea(attrs={'class': 'form-control', 'rows': 4,
                                                       'placeholder': 'Short description of the book'}),
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['copies'].initial = self.instance.total_copies
+
+    def clean_copies(self):
+        copies = self.cleaned_data['copies']
+        if self.instance.pk:
+            on_loan = self.instance.copies.filter(state=BookCopy.ON_LOAN).count()
+            if copies < on_loan:
+                raise forms.ValidationError(f'{on_loan} copies are on loan; stock cannot go below that.')
+        return copies
+
+    def save(self, commit=True):
+        """
+        Save the book and bring its copies to the requested stock together.
+        Returns None, with the error on ``copies``, if copies went out on
+        loan after validation and the stock can no longer be met.
+        """
+        if not commit:
+            return super().save(commit)
+        try:
+            with transaction.atomic():
+                book = super().save()
+                set_stock(book, self.cleaned_data['copies'])
+        except ValueError as e:
+            self.add_error('copies', str(e))
+            return None
+        return book
+
+
+class CatalogImportForm(forms.Form):
+    FORMAT_CHOICES = [('', 'Detect from file name'), ('json', 'JSON'), ('csv', 'CSV'), ('marc', 'MARC 21 (.mrc)')]
+
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control'}))
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False,
+                               widget=forms.Select(attrs={'class': 'form-select'}))
+    dry_run = forms.BooleanField(required=False, label='Validate only (dry run)',
+                                 widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+
+    def clean(self):
+        cleaned = super().clean()
+        upload = cleaned.get('file')
+        if upload and not cleaned.get('format'):
+            from .importer import detect_format
+            cleaned['format'] = detect_format(upload.name)
+            if cleaned['format'] is None:
+                raise forms.ValidationError('Cannot tell the format from the file name; choose one.')
+        return cleaned
@@ -0,0 +1,319 @@
+"""
+Bulk catalog import from JSON, CSV or MARC 21 (ISO 2709) feeds.
+
+Records are parsed one at a time from the open file, so memory stays flat
+however large the feed is.  Categories and publishers are resolved through
+in-memory name → id maps (created once when first seen), duplicates are
+caught against a set of normalised ISBNs loaded up front, and books are
+written with ``bulk_create`` in batches, each in its own transaction,
+together with one ``BookCopy`` row per copy.  A batch the database rejects
+is retried row by row, so one bad row is reported and the rest still saved.
+
+Input record fields (CSV header / JSON keys): ``title``, ``author``,
+``isbn``, ``category``, ``publisher``, ``copies`` (or ``total_copies``),
+``rack_number``, ``description``.  Django fixtures such as
+``templates/books/fixtures/books_data.json`` are accepted too.
+"""
+
+import csv
+import io
+import json
+import re
+import time
+
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .copies import new_copies
+from .models import Book, BookCopy, Category, Publisher
+from . import barcodes, search
+from .sequences import allocate_book_ids
+
+BATCH_SIZE = 500
+MAX_ERRORS_REPORTED = 200
+FORMATS = ('json', 'csv', 'marc')
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.duplicates = 0
+        self.errors = []          # (row number, message)
+        self.error_count = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS_REPORTED:
+            self.errors.append((row, message))
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.rows} record(s) in {self.elapsed:.2f}s ({self.rows_per_second:.0f}/s): "
+                f"{self.created} created, {self.duplicates} duplicate ISBN(s) skipped, "
+                f"{self.error_count} error(s)")
+
+
+def detect_format(filename):
+    ext = filename.rsplit('.', 1)[-1].lower()
+    return {'json': 'json', 'ndjson': 'json', 'csv': 'csv', 'mrc': 'marc', 'marc': 'marc'}.get(ext)
+
+
+def normalize_isbn(isbn):
+    return re.sub(r'[^0-9X]', '', (isbn or '').upper())
+
+
+# ─────────────────────────────────────────
+# PARSERS — each yields plain dicts from a binary file object
+# ─────────────────────────────────────────
+def iter_json(fh, chunk_size=64 * 1024):
+    """
+    Yield the objects of a top-level JSON array (or NDJSON lines) without
+    loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(fh, encoding='utf-8-sig')
+    buffer, pos, eof = '', 0, False
+    while True:
+        # Skip separators between values
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = reader.read(chunk_size), 0
+            eof = not buffer
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = reader.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+
+
+def iter_csv(fh):
+    yield from csv.DictReader(io.TextIOWrapper(fh, encoding='utf-8-sig', newline=''))
+
+
+MARC_RECORD_END, MARC_FIELD_END, MARC_SUBFIELD = b'\x1d', b'\x1e', b'\x1f'
+
+
+def _marc_fields(record):
+    base = int(record[12:17])
+    directory = record[24:base - 1]
+    for i in range(0, len(directory) - 11, 12):
+        tag = directory[i:i + 3].decode()
+        length, start = int(directory[i + 3:i + 7]), int(directory[i + 7:i + 12])
+        data = record[base + start:base + start + length].rstrip(MARC_FIELD_END)
+        subfields = {}
+        for chunk in data.split(MARC_SUBFIELD)[1:]:
+            code, value = chr(chunk[0]), chunk[1:].decode('utf-8', 'replace').strip()
+            subfields.setdefault(code, value)
+        yield tag, subfields
+
+
+def iter_marc(fh):
+    """Yield book dicts from MARC 21 transmission format, one record at a time."""
+    while True:
+        leader = fh.read(5)
+        if not leader.strip():
+            return
+        record = leader + fh.read(int(leader) - 5)
+        fields = {}
+        for tag, subfields in _marc_fields(record):
+            fields.setdefault(tag, subfields)
+
+        def first(*pairs):
+            for tag, code in pairs:
+                value = fields.get(tag, {}).get(code)
+                if value:
+                    return value.rstrip(' /:;,.')
+            return ''
+
+        title = first(('245', 'a'))
+        subtitle = first(('245', 'b'))
+        yield {
+            'title': f'{title}: {subtitle}' if subtitle else title,
+            'author': first(('100', 'a'), ('110', 'a'), ('111', 'a'), ('700', 'a')),
+            'isbn': first(('020', 'a')).split(' ')[0],
+            'publisher': first(('264', 'b'), ('260', 'b')),
+            'category': first(('650', 'a'), ('082', 'a')),
+            'description': first(('520', 'a')),
+        }
+
+
+PARSERS = {'json': iter_json, 'csv': iter_csv, 'marc': iter_marc}
+
+
+# ─────────────────────────────────────────
+# IMPORT
+# ─────────────────────────────────────────
+class CatalogImporter:
+    def __init__(self, batch_size=BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.categories = {c.name.casefold(): c.pk for c in Category.objects.only('pk', 'name')}
+        self.publishers = {}
+        for pk, name in Publisher.objects.order_by('-pk').values_list('pk', 'name'):
+            self.publishers[name.casefold()] = pk      # lowest pk wins for duplicate names
+        self.fixture_categories = {}   # fixture pk → name, for fixture book rows
+        self.fixture_publishers = {}
+        self.isbns = {normalize_isbn(i) for i in Book.objects.values_list('isbn', flat=True).iterator()}
+
+    def _lookup(self, cache, model, name):
+        name = (name or '').strip()[:model._meta.get_field('name').max_length]
+        if not name:
+            return None
+        key = name.casefold()
+        if key not in cache:
+            cache[key] = None if self.dry_run else self._create(model, name)
+        return cache[key]
+
+    def _create(self, model, name):
+        try:
+            with transaction.atomic():
+                return model.objects.create(name=name).pk
+        except IntegrityError:
+            # Added since the maps were loaded (another import, the admin) or
+            # differing only in case under a case-insensitive collation
+            return model.objects.filter(name__iexact=name).order_by('pk').values_list('pk', flat=True).first()
+
+    def _from_fixture(self, record):
+        """Turn a ``{"model": ..., "fields": ...}`` fixture entry into a flat record (or None)."""
+        model, fields = record.get('model'), record.get('fields', {})
+        if model == 'books.category':
+            self.fixture_categories[record.get('pk')] = fields.get('name')
+            self._lookup(self.categories, Category, fields.get('name'))
+            return None
+        if model == 'books.publisher':
+            self.fixture_publishers[record.get('pk')] = fields.get('name')
+            return None
+        if model != 'books.book':
+            return None
+        flat = dict(fields)
+        flat['category'] = self.fixture_categories.get(fields.get('category'), '')
+        flat['publisher'] = self.fixture_publishers.get(fields.get('publisher'), '')
+        return flat
+
+    def build_book(self, record):
+        """Validate one record; returns an unsaved Book or raises ValueError."""
+        def text(key, limit=None):
+            value = str(record.get(key) or '').strip()
+            return value[:limit] if limit else value
+
+        title, author, isbn = text('title', 300), text('author', 200), text('isbn', 20)
+        missing = [name for name, value in (('title', title), ('author', author), ('isbn', isbn)) if not value]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+
+        copies = record.get('copies', record.get('total_copies')) or 1
+        try:
+            copies = int(copies)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid copies {copies!r}")
+        if copies < 1:
+            raise ValueError("copies must be at least 1")
+
+        book = Book(
+            title=title, author=author, isbn=isbn,
+            category_id=self._lookup(self.categories, Category, text('category')),
+            publisher_id=self._lookup(self.publishers, Publisher, text('publisher')),
+            rack_number=text('rack_number', 20), description=text('description'),
+        )
+        book.total_copies = book.available_copies = copies     # the BookCopy rows made on flush
+        return book
+
+    def _write(self, books):
+        """Insert ``books`` with their copies and search postings, all or nothing."""
+        with transaction.atomic():
+            created = Book.objects.bulk_create(books)
+            if any(book.pk is None for book in created):   # backends without RETURNING
+                pks = dict(Book.objects.filter(book_id__in=[b.book_id for b in books])
+                           .values_list('book_id', 'pk'))
+                for book in created:
+                    book.pk = pks[book.book_id]
+            BookCopy.objects.bulk_create(new_copies((book, book.total_copies) for book in created),
+                                         batch_size=self.batch_size)
+            search.index_new_books(created)
+            barcodes.changed(book.pk for book in created)
+
+    def _flush(self, batch, report):
+        """Write ``batch``, a list of ``(row number, book)``."""
+        if not batch:
+            return
+        if self.dry_run:
+            report.created += len(batch)
+            batch.clear()
+            return
+        books = [book for row, book in batch]
+        for book, book_id in zip(books, allocate_book_ids(len(books))):
+            book.book_id = book_id
+        try:
+            self._write(books)
+            report.created += len(books)
+        except DatabaseError:
+            # One bad row (an ISBN another user added meanwhile, a value too
+            # long for its column) fails the whole batch: retry it row by row
+            for row, book in batch:
+                book.pk, book._state.adding = None, True
+                try:
+                    self._write([book])
+                except DatabaseError as e:
+                    report.error(row, f"not saved: {e}")
+                else:
+                    report.created += 1
+        batch.clear()
+
+    def run(self, records):
+        report = ImportReport()
+        batch = []
+        row = 0
+        try:
+            for row, record in enumerate(records, start=1):
+                if isinstance(record, dict) and 'model' in record and 'fields' in record:
+                    record = self._from_fixture(record)
+                    if record is None:
+                        continue
+                report.rows += 1
+                if not isinstance(record, dict):
+                    report.error(row, "not an object")
+                    continue
+                try:
+                    book = self.build_book(record)
+                except ValueError as e:
+                    report.error(row, str(e))
+                    continue
+
+                key = normalize_isbn(book.isbn)
+                if key in self.isbns:
+                    report.duplicates += 1
+                    continue
+                self.isbns.add(key)
+                batch.append((row, book))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, report)
+        except (ValueError, IndexError, UnicodeDecodeError, csv.Error) as e:
+            # A feed that stops parsing part-way keeps everything read before it
+            report.error(row + 1, f"could not parse the rest of the file: {e}")
+        self._flush(batch, report)
+        return report.finish()
+
+
+def import_file(fh, fmt, batch_size=BATCH_SIZE, dry_run=False):
+    """Import every record in binary file ``fh`` of format ``fmt``; returns an ImportReport."""
+    return CatalogImporter(batch_size=batch_size, dry_run=dry_run).run(PARSERS[fmt](fh))
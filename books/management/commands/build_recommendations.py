@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from books import recommendations
+
+
+class Command(BaseCommand):
+    help = ('Update "also borrowed" recommendations from circulation history. '
+            'Folds in new issues since the last run unless --full is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every book from scratch.')
+        parser.add_argument('--every', type=int, default=0, metavar='SECONDS',
+                            help='Keep running, refreshing every SECONDS (0 = run once).')
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            run = recommendations.rebuild() if full else recommendations.refresh()
+            kind = 'Rebuilt' if run.full else 'Refreshed'
+            self.stdout.write(f'{kind} recommendations for {run.books_updated} book(s) in '
+                              f'{run.duration_ms} ms (issues up to #{run.last_issue_id}).')
+            if not options['every']:
+                break
+            full = False
+            time.sleep(options['every'])
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from books import similarity
+
+
+class Command(BaseCommand):
+    help = 'Build the TF-IDF "similar titles" matrix for the whole catalog.'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        books, terms, nnz = similarity.build()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {books} book(s), {terms} term(s), {nnz} weight(s) in '
+            f'{time.monotonic() - started:.2f}s -> {similarity.index_path()}'
+        ))
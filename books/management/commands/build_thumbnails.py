@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from library_management import thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Render the thumbnail sizes of existing book covers and profile pictures '
+            '(uploads get theirs automatically).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Also re-check images that already have thumbnails.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            for spec in thumbnails.SPECS.values():
+                rows = spec.model._default_manager.exclude(**{spec.field: ''}).exclude(**{f'{spec.field}__isnull': True})
+                if not options['all']:
+                    rows = rows.filter(**{spec.digest_field: ''})
+                futures = {}
+                for pk, name in rows.values_list('pk', spec.field).iterator():
+                    source = os.path.join(settings.MEDIA_ROOT, name)
+                    futures[pool.submit(thumbnails.render, source, str(settings.MEDIA_ROOT), spec.widths)] = (pk, name)
+                for future in as_completed(futures):
+                    pk, name = futures[future]
+                    try:
+                        thumbnails.record(spec, pk, name, future.result())
+                        done += 1
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'  {spec.model.__name__} {pk} ({name}): {e}')
+
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(f'Rendered thumbnails for {done} image(s), {failed} failed, '
+                                f'in {time.monotonic() - started:.2f}s'))
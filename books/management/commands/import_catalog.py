@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.importer import BATCH_SIZE, FORMATS, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import books from a JSON, CSV or MARC 21 (.mrc) file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+        try:
+            with open(options['path'], 'rb') as fh:
+                report = import_file(fh, fmt, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for row, message in report.errors:
+            self.stderr.write(f'  row {row}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'  ... and {report.error_count - len(report.errors)} more')
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        style = self.style.WARNING if report.error_count else self.style.SUCCESS
+        self.stdout.write(style(prefix + report.summary()))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_co_borrow_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_digest',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+    ]
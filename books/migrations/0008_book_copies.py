@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_book_title_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookCopy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=40, unique=True)),
+                ('state', models.CharField(choices=[('available', 'Available'), ('on_loan', 'On loan'), ('lost', 'Lost'), ('withdrawn', 'Withdrawn')], default='available', max_length=20)),
+                ('added_on', models.DateField(auto_now_add=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='copies', to='books.book')),
+            ],
+            options={
+                'verbose_name_plural': 'Book copies',
+                'indexes': [models.Index(fields=['book', 'state'], name='bookcopy_book_state_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_book_copies'),
+        # Copies are made from these counters before they go
+        ('circulation', '0003_issuedbook_copy'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='book',
+            name='available_copies',
+        ),
+        migrations.RemoveField(
+            model_name='book',
+            name='total_copies',
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+from books.search import book_terms
+
+BATCH = 1000
+
+
+def backfill(apps, schema_editor):
+    """Index every book that has no search document yet, so search works right after deploy."""
+    Book = apps.get_model('books', 'Book')
+    SearchDocument = apps.get_model('books', 'SearchDocument')
+    SearchPosting = apps.get_model('books', 'SearchPosting')
+
+    last = 0
+    while True:
+        books = list(Book.objects.filter(pk__gt=last, search_document__isnull=True).order_by('pk')
+                     .only('pk', 'title', 'author', 'isbn', 'book_id', 'description')[:BATCH])
+        if not books:
+            break
+        last = books[-1].pk
+        postings, documents = [], []
+        for book in books:
+            terms = book_terms(book)
+            postings.extend(SearchPosting(term=term, book_id=book.pk, frequency=freq)
+                            for term, freq in terms.items())
+            documents.append(SearchDocument(book_id=book.pk, length=sum(terms.values())))
+        SearchPosting.objects.bulk_create(postings, batch_size=BATCH)
+        SearchDocument.objects.bulk_create(documents, batch_size=BATCH)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_remove_book_copy_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
 class Category(models.Model):
@@ -21,6 +23,55 @@ class Publisher(models.Model):
         return self.name
 
 
+def _copy_count(*states):
+    """Correlated count of a book's copies in ``states``: an index-only lookup on (book, state)."""
+    copies = (BookCopy.objects.filter(book=OuterRef('pk'), state__in=states)
+              .order_by().values('book').annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(copies), 0)
+
+
+def has_available_copy():
+    """``EXISTS`` an available copy of the outer book: a seek on the (book, state) index."""
+    return Exists(BookCopy.objects.filter(book=OuterRef('pk'), state=BookCopy.AVAILABLE))
+
+
+class BookQuerySet(models.QuerySet):
+    def with_copies(self):
+        """Annotate ``total_copies`` and ``available_copies`` from the copies' states."""
+        return self.annotate(total_copies=_copy_count(*BookCopy.IN_STOCK),
+                             available_copies=_copy_count(BookCopy.AVAILABLE))
+
+    def available(self):
+        return self.filter(has_available_copy())
+
+    def unavailable(self):
+        return self.exclude(has_available_copy())
+
+
+class CopyCount:
+    """
+    ``book.total_copies`` / ``book.available_copies``: set by
+    ``Book.objects.with_copies()``, otherwise counted on first access.
+    """
+
+    def __init__(self, *states):
+        self.states = states
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.name not in instance.__dict__:
+            instance.__dict__[self.name] = (instance.copies.filter(state__in=self.states).count()
+                                            if instance.pk else 0)
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
 class Book(models.Model):
     book_id = models.CharField(max_length=20, unique=True, editable=False)
     title = models.CharField(max_length=300)
@@ -29,23 +80,177 @@ class Book(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     publisher = models.ForeignKey(Publisher, on_delete=models.SET_NULL,
                                   null=True, blank=True)
-    total_copies = models.PositiveIntegerField(default=1)
-    available_copies = models.PositiveIntegerField(default=1)
     rack_number = models.CharField(max_length=20, blank=True)
     cover_image = models.ImageField(upload_to='book_covers/', blank=True, null=True)
+    # Content hash naming the pre-rendered thumbnails (library_management/thumbnails.py)
+    cover_digest = models.CharField(max_length=20, blank=True, editable=False)
     description = models.TextField(blank=True)
     date_added = models.DateField(auto_now_add=True)
 
+    # Rating aggregates, kept up to date by reviews/ratings.py on every review
+    # save/delete and rebuilt by `manage.py reconcile_ratings`
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, editable=False)
+
+    # Derived from the BookCopy rows; nothing on the Book row changes on checkout
+    total_copies = CopyCount('available', 'on_loan')
+    available_copies = CopyCount('available')
+
+    objects = BookQuerySet.as_manager()
+
+    RATING_FIELDS = ('rating_count', 'rating_sum', 'rating_1', 'rating_2',
+                     'rating_3', 'rating_4', 'rating_5', 'rating_avg')
+    # Written behind the instance's back with queryset updates
+    DERIVED_FIELDS = RATING_FIELDS + ('cover_digest',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rating_avg', 'rating_count'], name='book_top_rated_idx'),
+            # Title prefix search for the issue form's book picker (circulation/autocomplete.py)
+            models.Index(fields=['title'], name='book_title_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.book_id:
-            last = Book.objects.order_by('-id').first()
-            next_id = (last.id + 1) if last else 1
-            self.book_id = f"LIB-{next_id:04d}"
+            from .sequences import next_book_id
+            self.book_id = next_book_id()
+        # Updating a book (e.g. from the edit form) must not write back rating
+        # counters or a cover digest that reviews or the thumbnail worker may
+        # have changed since this instance was loaded
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [f.name for f in self._meta.concrete_fields
+                                       if not f.primary_key and f.name not in self.DERIVED_FIELDS]
+            if not self.cover_image or not self.cover_image._committed:
+                # A new or cleared cover resets the digest (library_management/thumbnails.py)
+                kwargs['update_fields'].append('cover_digest')
         super().save(*args, **kwargs)
 
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop('total_copies', None)
+        self.__dict__.pop('available_copies', None)
+
     @property
     def is_available(self):
         return self.available_copies > 0
 
+    @property
+    def on_loan_copies(self):
+        return self.total_copies - self.available_copies
+
+    @property
+    def rating_histogram(self):
+        """``[(stars, count, percent)]`` from 5 stars down to 1."""
+        return [
+            (stars, count, round(100 * count / self.rating_count) if self.rating_count else 0)
+            for stars in range(5, 0, -1)
+            for count in [getattr(self, f'rating_{stars}')]
+        ]
+
+    def __str__(self):
+        return f"{self.title} by {self.author}"
+
+
+# ─────────────────────────────────────────
+# PHYSICAL COPIES (see books/copies.py)
+# ─────────────────────────────────────────
+class BookCopy(models.Model):
+    """One physical item of a title, identified by the barcode on its spine label."""
+    AVAILABLE, ON_LOAN, LOST, WITHDRAWN = 'available', 'on_loan', 'lost', 'withdrawn'
+    STATE_CHOICES = [
+        (AVAILABLE, 'Available'),
+        (ON_LOAN, 'On loan'),
+        (LOST, 'Lost'),
+        (WITHDRAWN, 'Withdrawn'),
+    ]
+    IN_STOCK = (AVAILABLE, ON_LOAN)     # what a book's total_copies counts
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='copies')
+    barcode = models.CharField(max_length=40, unique=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=AVAILABLE)
+    added_on = models.DateField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Book copies"
+        indexes = [
+            # Availability counts and checkout's "first available copy of this book"
+            models.Index(fields=['book', 'state'], name='bookcopy_book_state_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.barcode} ({self.get_state_display()})"
+
+
+class IdSequence(models.Model):
+    """Next free number of a named ID sequence; handed out in blocks by books/sequences.py."""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+# ─────────────────────────────────────────
+# SEARCH INDEX (see books/search.py)
+# ─────────────────────────────────────────
+class SearchDocument(models.Model):
+    book = models.OneToOneField(Book, on_delete=models.CASCADE, primary_key=True,
+                                related_name='search_document')
+    length = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.book_id} ({self.length} terms)"
+
+
+class SearchPosting(models.Model):
+    term = models.CharField(max_length=64)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ['term', 'book']  # also the term lookup index
+
+    def __str__(self):
+        return f"{self.term} → {self.book_id} ×{self.frequency}"
+
+
+# ─────────────────────────────────────────
+# "ALSO BORROWED" RECOMMENDATIONS (see books/recommendations.py)
+# ─────────────────────────────────────────
+class CoBorrow(models.Model):
+    """One of a book's top-K neighbours by shared borrowers."""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='co_borrowed')
+    neighbour = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    co_borrowers = models.PositiveIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['book', 'rank']
+        unique_together = ['book', 'rank']  # also the book-detail lookup index
+
+    def __str__(self):
+        return f"{self.book_id} #{self.rank} → {self.neighbour_id} ({self.co_borrowers})"
+
+
+class CoBorrowRun(models.Model):
+    """One run of ``manage.py build_recommendations``; the last one is the watermark."""
+    started_at = models.DateTimeField()
+    full = models.BooleanField(default=False)
+    last_issue_id = models.BigIntegerField(default=0,
+                                           help_text="Highest IssuedBook id included.")
+    books_updated = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
     def __str__(self):
-        return f"{self.title} by {self.author}"
\ No newline at end of file
+        kind = 'Full' if self.full else 'Incremental'
+        return f"{kind} run {self.started_at:%d %b %Y %H:%M} — {self.books_updated} books"
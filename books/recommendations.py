@@ -0,0 +1,151 @@
+"""
+"Students who borrowed this also borrowed" recommendations.
+
+Built offline from the distinct (student, book) pairs in ``IssuedBook``.
+Conceptually this is ``Aᵀ·A`` for the sparse student × book matrix ``A``:
+each student's set of books contributes one to every pair in the set.  The
+pair counts are normalised by each book's borrower count (cosine similarity)
+and only the top ``TOP_K`` neighbours per book are kept in ``CoBorrow``, so
+book detail needs a single indexed lookup.
+
+Incremental runs only recompute the rows that can have changed: books
+co-borrowed with any book issued since the last run.
+"""
+
+import heapq
+import math
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from circulation.models import IssuedBook
+from .models import CoBorrow, CoBorrowRun
+
+TOP_K = 10
+# Pairs shared by fewer students than this are treated as noise
+MIN_CO_BORROWERS = 2
+# A student's history is capped so one heavy reader can't dominate (or make
+# the pair count quadratic in the size of the whole catalog)
+MAX_BOOKS_PER_STUDENT = 200
+# Incremental runs touching more books than this just rebuild everything
+INCREMENTAL_LIMIT = 5000
+WRITE_BATCH_SIZE = 1000
+
+
+def _books_by_student(pairs):
+    baskets = defaultdict(set)
+    for student_id, book_id in pairs:
+        if len(baskets[student_id]) < MAX_BOOKS_PER_STUDENT:
+            baskets[student_id].add(book_id)
+    return baskets
+
+
+def co_occurrence(baskets, rows=None):
+    """
+    Return ``({book: Counter(neighbour: shared borrowers)}, {book: borrowers})``.
+    With ``rows`` given, only those books' rows are accumulated.
+    """
+    counts = defaultdict(Counter)
+    borrowers = Counter()
+    for books in baskets.values():
+        borrowers.update(books)
+        for a, b in combinations(sorted(books), 2):
+            if rows is None or a in rows:
+                counts[a][b] += 1
+            if rows is None or b in rows:
+                counts[b][a] += 1
+    return counts, borrowers
+
+
+def top_neighbours(book_id, row, borrowers):
+    scored = (
+        (shared / math.sqrt(borrowers[book_id] * borrowers[other]), shared, other)
+        for other, shared in row.items() if shared >= MIN_CO_BORROWERS
+    )
+    return [
+        CoBorrow(book_id=book_id, neighbour_id=other, rank=rank, co_borrowers=shared, score=score)
+        for rank, (score, shared, other) in enumerate(heapq.nlargest(TOP_K, scored), start=1)
+    ]
+
+
+def _write(book_ids, counts, borrowers, replace_all=False):
+    rows = []
+    for book_id in book_ids:
+        rows.extend(top_neighbours(book_id, counts.get(book_id, {}), borrowers))
+    with transaction.atomic():
+        stale = CoBorrow.objects.all() if replace_all else CoBorrow.objects.filter(book_id__in=book_ids)
+        stale.delete()
+        CoBorrow.objects.bulk_create(rows, batch_size=WRITE_BATCH_SIZE)
+
+
+def _borrower_counts(last_issue_id):
+    """Distinct borrowers per book, for normalising scores in incremental runs."""
+    return Counter(dict(
+        IssuedBook.objects.filter(id__lte=last_issue_id).values('book_id').order_by()
+        .annotate(n=Count('student_id', distinct=True)).values_list('book_id', 'n')
+    ))
+
+
+def _pairs(queryset):
+    return (queryset.values_list('student_id', 'book_id').distinct()
+            .order_by('student_id', 'book_id').iterator(chunk_size=5000))
+
+
+def rebuild():
+    """Recompute every book's neighbours from the whole circulation history."""
+    started = time.monotonic()
+    run = CoBorrowRun(started_at=timezone.now(), full=True)
+    run.last_issue_id = IssuedBook.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    baskets = _books_by_student(_pairs(IssuedBook.objects.filter(id__lte=run.last_issue_id)))
+    counts, borrowers = co_occurrence(baskets)
+    _write(list(borrowers), counts, borrowers, replace_all=True)
+
+    run.books_updated = len(borrowers)
+    run.duration_ms = int((time.monotonic() - started) * 1000)
+    run.save()
+    return run
+
+
+def refresh():
+    """Fold in issues made since the last run; falls back to ``rebuild()``."""
+    last = CoBorrowRun.objects.first()
+    if last is None:
+        return rebuild()
+
+    started = time.monotonic()
+    run = CoBorrowRun(started_at=timezone.now())
+    new = IssuedBook.objects.filter(id__gt=last.last_issue_id)
+    run.last_issue_id = new.order_by('-id').values_list('id', flat=True).first() or last.last_issue_id
+
+    # A new issue changes its book's borrower count, which rescales that
+    # book's score in the row of every book it was co-borrowed with
+    history = IssuedBook.objects.filter(id__lte=run.last_issue_id)
+    new_books = set(new.filter(id__lte=run.last_issue_id).values_list('book_id', flat=True))
+    affected = set(history.filter(
+        student_id__in=history.filter(book_id__in=new_books).values('student_id')
+    ).values_list('book_id', flat=True)) if new_books else set()
+    if len(affected) > INCREMENTAL_LIMIT:
+        return rebuild()
+
+    if affected:
+        # Every borrower of an affected book contributes to its row
+        baskets = _books_by_student(_pairs(history.filter(
+            student_id__in=history.filter(book_id__in=affected).values('student_id'),
+        )))
+        counts, _ = co_occurrence(baskets, rows=affected)
+        _write(affected, counts, _borrower_counts(run.last_issue_id))
+
+    run.books_updated = len(affected)
+    run.duration_ms = int((time.monotonic() - started) * 1000)
+    run.save()
+    return run
+
+
+def also_borrowed(book, limit=TOP_K):
+    return [c.neighbour for c in
+            CoBorrow.objects.filter(book=book).select_related('neighbour')[:limit]]
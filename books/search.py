@@ -0,0 +1,190 @@
+"""
+Catalog search: a small inverted index kept in the database.
+
+Every book is tokenized into (term, frequency) postings; a query looks up
+only the postings for its own terms (an index seek on ``term``) and ranks
+the matching books with BM25.  Works the same on MySQL and SQLite.
+
+The index is updated from the Book save signal (see books/signals.py),
+filled for existing books by migration 0010, and can be rebuilt from
+scratch with ``manage.py rebuild_search_index``.
+
+A term found in more than ``MAX_POSTINGS_PER_TERM`` books carries little
+weight (a low IDF), so only its strongest postings are read: a query costs
+about the same however common its words are.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from .models import Book, SearchDocument, SearchPosting
+
+# Field weights: a hit in the title counts three times a hit in the description
+FIELD_WEIGHTS = {
+    'title': 3,
+    'author': 2,
+    'isbn': 3,
+    'book_id': 3,
+    'description': 1,
+}
+INDEXED_FIELDS = list(FIELD_WEIGHTS)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+MAX_RESULTS = 500
+MAX_POSTINGS_PER_TERM = 5000
+MAX_PREFIX_EXPANSIONS = 30
+MAX_TERM_LENGTH = SearchPosting._meta.get_field('term').max_length
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in into is it of on or the to with'.split()
+)
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall((text or '').lower()):
+        if token in STOPWORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        tokens.append(token[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def compact(value):
+    """'978-0-13-468599-1' → '9780134685991', 'LIB-0042' → 'lib0042'."""
+    return re.sub(r'[^a-z0-9]', '', (value or '').lower())[:MAX_TERM_LENGTH]
+
+
+def book_terms(book):
+    """Weighted term frequencies for one book."""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = getattr(book, field)
+        for token in tokenize(value):
+            terms[token] += weight
+        # Identifiers are also indexed whole so "9780134685991" or "lib0042" match
+        if field in ('isbn', 'book_id') and compact(value):
+            terms[compact(value)] += weight
+    return terms
+
+
+def _postings_for(book, terms):
+    return [SearchPosting(term=term, book_id=book.pk, frequency=freq)
+            for term, freq in terms.items()]
+
+
+def index_book(book):
+    terms = book_terms(book)
+    with transaction.atomic():
+        SearchPosting.objects.filter(book_id=book.pk).delete()
+        SearchPosting.objects.bulk_create(_postings_for(book, terms))
+        SearchDocument.objects.update_or_create(
+            book_id=book.pk, defaults={'length': sum(terms.values())}
+        )
+
+
+def index_new_books(books, batch_size=1000):
+    """Bulk-index books that have no postings yet (e.g. rows from the catalog importer)."""
+    postings, documents = [], []
+    for book in books:
+        terms = book_terms(book)
+        postings.extend(_postings_for(book, terms))
+        documents.append(SearchDocument(book_id=book.pk, length=sum(terms.values())))
+    SearchPosting.objects.bulk_create(postings, batch_size=batch_size)
+    SearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index the whole catalog. Returns the number of books indexed."""
+    indexed = 0
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+
+        postings, documents = [], []
+        books = Book.objects.only('pk', *INDEXED_FIELDS).order_by('pk')
+        for book in books.iterator(chunk_size=batch_size):
+            terms = book_terms(book)
+            postings.extend(_postings_for(book, terms))
+            documents.append(SearchDocument(book_id=book.pk, length=sum(terms.values())))
+            indexed += 1
+            if len(documents) >= batch_size:
+                SearchPosting.objects.bulk_create(postings, batch_size=batch_size)
+                SearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+                postings, documents = [], []
+        SearchPosting.objects.bulk_create(postings, batch_size=batch_size)
+        SearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+    return indexed
+
+
+def _next_prefix(prefix):
+    # Smallest string greater than every string starting with ``prefix``
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def query_terms(query):
+    """
+    Terms to look up for a query.  The last word is also treated as a prefix
+    ("pyth" → "python") using a range scan on the term index, so partial
+    words still match while the user is typing.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    whole = compact(query)
+    if whole and whole not in terms and len(terms) > 1:
+        terms.append(whole)   # e.g. a hyphenated ISBN typed in full
+
+    if terms and len(terms[-1]) >= 3:
+        prefix = terms[-1]
+        expansions = (SearchPosting.objects
+                      .filter(term__gte=prefix, term__lt=_next_prefix(prefix))
+                      .values_list('term', flat=True)
+                      .distinct()
+                      .order_by('term')[:MAX_PREFIX_EXPANSIONS])
+        terms.extend(t for t in expansions if t not in terms)
+    return terms
+
+
+def search(query, limit=MAX_RESULTS):
+    """Return ``[(book_pk, score), ...]`` best match first."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    stats = SearchDocument.objects.aggregate(n=Count('pk'), avg=Avg('length'))
+    total_docs, avg_length = stats['n'], stats['avg'] or 1
+    if not total_docs:
+        return []
+
+    doc_freq = dict(
+        SearchPosting.objects.filter(term__in=terms)
+        .values_list('term')
+        .annotate(df=Count('id'))
+        .order_by()
+    )
+    idf = {
+        term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        for term, df in doc_freq.items()
+    }
+
+    fields = ('book_id', 'term', 'frequency', 'book__search_document__length')
+    rare = [term for term, df in doc_freq.items() if df <= MAX_POSTINGS_PER_TERM]
+    postings = [SearchPosting.objects.filter(term__in=rare).values_list(*fields)] if rare else []
+    postings += [SearchPosting.objects.filter(term=term).order_by('-frequency', 'book_id')
+                 .values_list(*fields)[:MAX_POSTINGS_PER_TERM]
+                 for term, df in doc_freq.items() if df > MAX_POSTINGS_PER_TERM]
+
+    scores = defaultdict(float)
+    for queryset in postings:
+        for book_id, term, freq, length in queryset:
+            norm = K1 * (1 - B + B * (length or 0) / avg_length)
+            scores[book_id] += idf[term] * freq * (K1 + 1) / (freq + norm)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+    return ranked[:limit]
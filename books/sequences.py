@@ -0,0 +1,123 @@
+"""
+Block-based ID allocation for ``Book.book_id``.
+
+Each process reserves a block of numbers with one short UPDATE on the
+``IdSequence`` row and then hands them out from memory, so inserts don't
+query the books table and concurrent inserts can't pick the same number.
+Numbers left in a block when a process exits are simply skipped.
+
+A block must never outlive a rollback of the UPDATE that reserved it, or
+another process would be handed the same numbers.  So a caller inside a
+transaction (an importer batch, an atomic view) reserves on a connection of
+its own that commits at once, which also keeps the row lock short.  SQLite
+allows one writer at a time, so there the block is reserved in the caller's
+transaction and its remainder only kept once that commits.
+"""
+
+import functools
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+from django.db.models import F, Max
+
+from .models import Book, IdSequence
+
+BOOK_ID_SEQUENCE = 'book_id'
+BOOK_ID_FORMAT = 'LIB-{:04d}'
+
+_lock = threading.Lock()
+_blocks = {}   # sequence name → (pid, next, end)
+
+
+def _initial_value(name):
+    # Start past every number already used, whether as a pk or inside a book_id
+    if name != BOOK_ID_SEQUENCE:
+        return 1
+    highest = Book.objects.aggregate(m=Max('id'))['m'] or 0
+    for book_id in Book.objects.values_list('book_id', flat=True).iterator():
+        match = re.search(r'(\d+)$', book_id or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def reserve_block(name, size):
+    """Reserve ``size`` consecutive numbers, committed at once; returns the first one."""
+    if connection.in_atomic_block and connection.vendor != 'sqlite':
+        return _reserve_apart(name, size)
+    if not IdSequence.objects.filter(name=name).exists():
+        try:
+            with transaction.atomic():
+                IdSequence.objects.create(name=name, next_value=_initial_value(name))
+        except IntegrityError:
+            pass   # another process seeded it first
+
+    with transaction.atomic():
+        IdSequence.objects.filter(name=name).update(next_value=F('next_value') + size)
+        end = IdSequence.objects.values_list('next_value', flat=True).get(name=name)
+    return end - size
+
+
+def _reserve_apart(name, size):
+    """``reserve_block`` on a fresh connection, outside the caller's transaction."""
+    own = connections.create_connection(DEFAULT_DB_ALIAS)
+    table = own.ops.quote_name(IdSequence._meta.db_table)
+    try:
+        own.set_autocommit(False)
+        with own.cursor() as cursor:
+            cursor.execute(f'UPDATE {table} SET next_value = next_value + %s WHERE name = %s', [size, name])
+            if cursor.rowcount:
+                cursor.execute(f'SELECT next_value FROM {table} WHERE name = %s', [name])
+                end = cursor.fetchone()[0]
+            else:
+                end = _initial_value(name) + size
+                cursor.execute(f'INSERT INTO {table} (name, next_value) VALUES (%s, %s)', [name, end])
+        own.commit()
+    except IntegrityError:
+        own.rollback()      # another process seeded it first
+        return _reserve_apart(name, size)
+    finally:
+        own.close()
+    return end - size
+
+
+def _keep(name, block):
+    _blocks[name] = block
+
+
+def allocate(name, count=1):
+    """Return ``count`` unused numbers from the named sequence."""
+    block_size = max(count, settings.BOOK_ID_BLOCK_SIZE)
+    pid = os.getpid()
+    numbers = []
+    with _lock:
+        while len(numbers) < count:
+            owner, nxt, end = _blocks.get(name, (None, 0, 0))
+            tentative = False
+            # A forked child must not reuse its parent's block
+            if owner != pid or nxt >= end:
+                tentative = connection.in_atomic_block and connection.vendor == 'sqlite'
+                nxt = reserve_block(name, block_size)
+                end = nxt + block_size
+            take = min(count - len(numbers), end - nxt)
+            numbers.extend(range(nxt, nxt + take))
+            if tentative:
+                # Reserved in the caller's transaction: a rollback takes the
+                # numbers back, so the rest of the block waits for the commit
+                _blocks.pop(name, None)
+                transaction.on_commit(functools.partial(_keep, name, (pid, nxt + take, end)))
+            else:
+                _blocks[name] = (pid, nxt + take, end)
+    return numbers
+
+
+def next_book_id():
+    return BOOK_ID_FORMAT.format(allocate(BOOK_ID_SEQUENCE)[0])
+
+
+def allocate_book_ids(count):
+    """``book_id`` values for ``count`` new books, e.g. before ``bulk_create``."""
+    return [BOOK_ID_FORMAT.format(n) for n in allocate(BOOK_ID_SEQUENCE, count)]
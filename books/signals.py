@@ -0,0 +1,50 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from library_management import thumbnails
+from .models import Book, BookCopy
+from . import barcodes, search, similarity
+
+COVER_WIDTHS = (160, 320, 640)
+
+thumbnails.watch(Book, 'cover_image', 'cover_digest', COVER_WIDTHS)
+
+
+@receiver(post_save, sender=Book)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    # Saves that only touch counters (e.g. the rating aggregates) don't change the text
+    if update_fields and not set(update_fields) & set(search.INDEXED_FIELDS):
+        return
+    search.index_book(instance)
+
+
+@receiver(post_save, sender=Book)
+def update_similarity_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(similarity.FIELD_WEIGHTS):
+        return
+    similarity.fold_in(instance)
+
+
+@receiver(post_delete, sender=Book)
+def remove_from_similarity_index(sender, instance, **kwargs):
+    similarity.remove(instance.pk)
+
+
+@receiver(post_save, sender=Book)
+def update_barcode_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & {'book_id', 'isbn'}:
+        return
+    barcodes.changed([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def remove_from_barcode_index(sender, instance, **kwargs):
+    barcodes.changed([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=BookCopy)
+def update_barcode_availability(sender, instance, **kwargs):
+    barcodes.changed([instance.book_id])
+
+
+# Deleting a Book cascades to its SearchPosting / SearchDocument rows.
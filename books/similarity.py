@@ -0,0 +1,318 @@
+"""
+"Similar titles" from TF-IDF vectors over title, author, category and
+description.
+
+``manage.py build_similarity_index`` vectorises the whole catalog in one pass
+and writes a single binary file holding the L2-normalised TF-IDF matrix
+twice: by row (CSR) to fetch a book's own vector, and by term (CSC) so a
+query only touches the books that share its terms.  Workers ``mmap`` the
+file, so the matrix is shared between processes and never parsed.
+
+Books saved or deleted after a build are folded in, once the change
+commits, through an append-only delta file next to it (one JSON line per
+change, weighted with the build's IDF); those rows override the matrix until
+the next build.  Each worker reads only the lines appended since its last
+look and keeps them in a small inverted index of its own, so a query scores
+the delta through the postings of its terms, not by scanning every row.
+
+File layout (little endian, sections 8-byte aligned)::
+
+    header   magic, version, n_rows, n_terms, nnz
+    int64    book_ids[n_rows]      row_ptr[n_rows + 1]
+    int32    row_terms[nnz]        float32 row_weights[nnz]
+    int64    col_ptr[n_terms + 1]
+    int32    col_rows[nnz]         float32 col_weights[nnz]
+    float32  idf[n_terms]
+    int64    vocab_bytes, then the terms, newline-separated UTF-8
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Book
+from .search import tokenize
+
+FIELD_WEIGHTS = {
+    'title': 2.0,
+    'author': 1.5,
+    'category': 1.5,
+    'description': 1.0,
+}
+# Only a book's strongest terms are used as the query; the weak ones cost
+# postings scans without changing the top results
+QUERY_TERMS = 32
+# Terms in more than this share of the catalog carry no signal
+MAX_DF_RATIO = 0.5
+
+MAGIC = b'LMSTFIDF'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIQ')
+
+_lock = threading.Lock()
+_loaded = None
+
+
+def index_path():
+    return Path(settings.SIMILARITY_INDEX_DIR) / 'similar_books.idx'
+
+
+def delta_path():
+    return Path(settings.SIMILARITY_INDEX_DIR) / 'similar_books.delta'
+
+
+def book_term_counts(book):
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = getattr(book, field)
+        for token in tokenize(str(value) if value else ''):
+            counts[token] += weight
+    return counts
+
+
+def weigh(counts, idf):
+    """Sublinear TF × IDF, L2-normalised. ``idf`` maps term → weight."""
+    vector = {term: (1 + math.log(tf)) * idf[term] for term, tf in counts.items() if term in idf}
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {term: w / norm for term, w in vector.items()} if norm else {}
+
+
+# ─────────────────────────────────────────
+# BUILD
+# ─────────────────────────────────────────
+def _catalog():
+    return Book.objects.select_related('category').only(
+        'pk', 'title', 'author', 'description', 'category__name'
+    ).order_by('pk').iterator(chunk_size=2000)
+
+
+def _align(fh):
+    fh.write(b'\0' * (-fh.tell() % 8))
+
+
+def build(path=None):
+    """Vectorise the whole catalog and atomically replace the index file."""
+    path = Path(path or index_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    delta = delta_path()
+    delta_offset = delta.stat().st_size if delta.exists() else 0
+
+    book_ids, docs, df = [], [], Counter()
+    for book in _catalog():
+        counts = book_term_counts(book)
+        book_ids.append(book.pk)
+        docs.append(counts)
+        df.update(counts.keys())
+
+    n = len(book_ids)
+    vocab = sorted(t for t, d in df.items() if n < 10 or d <= MAX_DF_RATIO * n)
+    term_ids = {t: i for i, t in enumerate(vocab)}
+    idf = {t: math.log((1 + n) / (1 + df[t])) + 1 for t in vocab}
+
+    row_ptr, row_terms, row_weights = array('q', [0]), array('i'), array('f')
+    columns = defaultdict(list)
+    for row, counts in enumerate(docs):
+        for term, weight in sorted(weigh(counts, idf).items(), key=lambda tw: term_ids[tw[0]]):
+            row_terms.append(term_ids[term])
+            row_weights.append(weight)
+            columns[term_ids[term]].append((row, weight))
+        row_ptr.append(len(row_terms))
+
+    col_ptr, col_rows, col_weights = array('q', [0]), array('i'), array('f')
+    for term_id in range(len(vocab)):
+        for row, weight in columns.get(term_id, ()):
+            col_rows.append(row)
+            col_weights.append(weight)
+        col_ptr.append(len(col_rows))
+
+    vocab_blob = '\n'.join(vocab).encode()
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as fh:
+        fh.write(HEADER.pack(MAGIC, VERSION, n, len(vocab), len(row_terms)))
+        for section in (array('q', book_ids), row_ptr, row_terms, row_weights,
+                        col_ptr, col_rows, col_weights, array('f', (idf[t] for t in vocab))):
+            _align(fh)
+            section.tofile(fh)
+        _align(fh)
+        fh.write(struct.pack('<Q', len(vocab_blob)))
+        fh.write(vocab_blob)
+
+    # Keep changes folded in while this build was reading the catalog
+    tail = b''
+    if delta.exists():
+        with open(delta, 'rb') as fh:
+            fh.seek(delta_offset)
+            tail = fh.read()
+    delta_tmp = delta.with_name(delta.name + '.tmp')
+    delta_tmp.write_bytes(tail)
+    os.replace(tmp, path)
+    os.replace(delta_tmp, delta)
+    return n, len(vocab), len(row_terms)
+
+
+# ─────────────────────────────────────────
+# LOAD
+# ─────────────────────────────────────────
+class SimilarityIndex:
+    def __init__(self, path):
+        self.path = path
+        self.stat = os.stat(path)
+        with open(path, 'rb') as fh:
+            self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mm)
+        magic, version, n, n_terms, nnz = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a similarity index (version {VERSION})")
+
+        offset = HEADER.size
+
+        def section(fmt, count):
+            nonlocal offset
+            offset += -offset % 8
+            size = struct.calcsize(fmt) * count
+            data = view[offset:offset + size].cast(fmt)
+            offset += size
+            return data
+
+        self.book_ids = section('q', n)
+        self.row_ptr = section('q', n + 1)
+        self.row_terms = section('i', nnz)
+        self.row_weights = section('f', nnz)
+        self.col_ptr = section('q', n_terms + 1)
+        self.col_rows = section('i', nnz)
+        self.col_weights = section('f', nnz)
+        idf = section('f', n_terms)
+        blob_len = section('Q', 1)[0]
+        vocab = bytes(view[offset:offset + blob_len]).decode().split('\n') if blob_len else []
+
+        self.term_ids = {t: i for i, t in enumerate(vocab)}
+        self.idf = {t: idf[i] for t, i in self.term_ids.items()}
+        self.rows = {book_id: row for row, book_id in enumerate(self.book_ids)}
+        self.delta = {}          # book_id → {term_id: weight}, or None if deleted
+        self.delta_postings = defaultdict(dict)     # term_id → {book_id: weight}, for the delta rows
+        self.delta_inode = None
+        self.delta_offset = 0
+
+    def _set_delta(self, book_id, vector):
+        for term_id in self.delta.get(book_id) or ():
+            del self.delta_postings[term_id][book_id]
+        self.delta[book_id] = vector
+        for term_id, weight in (vector or {}).items():
+            self.delta_postings[term_id][book_id] = weight
+
+    def refresh_delta(self):
+        """Read delta lines appended since the last call."""
+        try:
+            with open(delta_path(), 'rb') as fh:
+                inode = os.fstat(fh.fileno()).st_ino
+                if inode != self.delta_inode:     # replaced by a build
+                    self.delta, self.delta_inode, self.delta_offset = {}, inode, 0
+                    self.delta_postings = defaultdict(dict)
+                fh.seek(self.delta_offset)
+                chunk = fh.read()
+        except FileNotFoundError:
+            return
+        complete = chunk.rfind(b'\n') + 1   # ignore a half-written last line
+        for line in chunk[:complete].splitlines():
+            entry = json.loads(line)
+            vector = entry.get('v')
+            # Delta vectors are keyed by term, so they survive a rebuild that
+            # renumbers the vocabulary; terms it doesn't know are dropped
+            self._set_delta(entry['book'], None if vector is None else {
+                self.term_ids[t]: w for t, w in vector.items() if t in self.term_ids
+            })
+        self.delta_offset += complete
+
+    def vector_for(self, book):
+        """``{term_id: weight}`` for ``book``: from the delta, the matrix, or computed."""
+        if book.pk in self.delta:
+            return self.delta[book.pk] or {}
+        row = self.rows.get(book.pk)
+        if row is not None:
+            start, end = self.row_ptr[row], self.row_ptr[row + 1]
+            return dict(zip(self.row_terms[start:end], self.row_weights[start:end]))
+        return self.vectorise(book)
+
+    def vectorise(self, book):
+        weights = weigh(book_term_counts(book), self.idf)
+        return {self.term_ids[t]: w for t, w in weights.items()}
+
+    def similar(self, book, limit=6):
+        """``[(book_id, score)]`` of the books most similar to ``book``."""
+        query = heapq.nlargest(QUERY_TERMS, self.vector_for(book).items(), key=lambda tw: tw[1])
+        scores = defaultdict(float)
+        changed = self.delta
+        for term_id, q in query:
+            for k in range(self.col_ptr[term_id], self.col_ptr[term_id + 1]):
+                book_id = self.book_ids[self.col_rows[k]]
+                # Rows changed since the build are scored from their delta vectors instead
+                if book_id not in changed:
+                    scores[book_id] += q * self.col_weights[k]
+            for book_id, weight in self.delta_postings.get(term_id, {}).items():
+                scores[book_id] += q * weight
+        scores.pop(book.pk, None)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def get_index():
+    """The process-wide index, reopened when the file is rebuilt; None if never built."""
+    global _loaded
+    path = index_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _lock:
+        if _loaded is None or (_loaded.stat.st_ino, _loaded.stat.st_mtime_ns) != (stat.st_ino, stat.st_mtime_ns):
+            _loaded = SimilarityIndex(path)
+        _loaded.refresh_delta()
+        return _loaded
+
+
+# ─────────────────────────────────────────
+# INCREMENTAL UPDATES
+# ─────────────────────────────────────────
+def _append_delta(entry):
+    path = delta_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One write on an O_APPEND file, so concurrent workers don't interleave lines
+    with open(path, 'ab') as fh:
+        fh.write(json.dumps(entry, separators=(',', ':')).encode() + b'\n')
+
+
+def fold_in(book):
+    """Re-vectorise one book against the built vocabulary and record it in the delta on commit."""
+    def record():
+        index = get_index()
+        if index is not None:
+            vector = weigh(book_term_counts(book), index.idf)
+            _append_delta({'book': book.pk, 'v': {t: round(w, 6) for t, w in vector.items()}})
+    transaction.on_commit(record)
+
+
+def remove(book_id):
+    """Record a deleted book in the delta once the delete commits."""
+    def record():
+        if get_index() is not None:
+            _append_delta({'book': book_id, 'v': None})
+    transaction.on_commit(record)
+
+
+def similar_books(book, limit=6):
+    """Books most similar to ``book``, best first (empty until the index is built)."""
+    index = get_index()
+    if index is None:
+        return []
+    ranked = [book_id for book_id, score in index.similar(book, limit)]
+    found = Book.objects.in_bulk(ranked)
+    return [found[pk] for pk in ranked if pk in found]
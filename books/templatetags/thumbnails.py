@@ -0,0 +1,51 @@
+"""
+Template helpers for the pre-rendered image sizes (library_management/thumbnails.py).
+
+    {% load thumbnails %}
+    {% thumbnail book.cover_image sizes="(min-width: 768px) 25vw, 50vw" class="card-img-top" alt=book.title %}
+    <img srcset="{% srcset user.profile_pic %}" ...>
+"""
+
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from library_management.thumbnails import variants
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(image, fmt='webp'):
+    """``url 160w, url 320w, ...`` for one format, or the original's URL if none are rendered yet."""
+    for ext, mime, urls in variants(image):
+        if ext == fmt:
+            return ', '.join(f'{url} {width}w' for url, width in urls)
+    return image.url if image else ''
+
+
+@register.simple_tag
+def thumbnail(image, sizes='100vw', **attrs):
+    """
+    A ``<picture>`` offering WebP and JPEG at every rendered width, so the
+    browser fetches the smallest file that fills ``sizes``.  Falls back to a
+    plain ``<img>`` of the original until the thumbnails exist.
+    """
+    if not image:
+        return ''
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    found = variants(image)
+    if not found:
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+
+    *sources, (_, _, fallback) = found
+    source_tags = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, ', '.join(f'{url} {width}w' for url, width in urls), sizes) for _, mime, urls in sources),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        source_tags, fallback[len(fallback) // 2][0],
+        ', '.join(f'{url} {width}w' for url, width in fallback), sizes, flatatt(attrs),
+    )
@@ -1,3 +1,222 @@
-from django.test import TestCase
+import importlib
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from . import search, sequences, similarity
+from .copies import add_copies, set_stock
+from .importer import CatalogImporter
+from .forms import BookForm
+from library_management import thumbnails
+from .models import Book, BookCopy, Category, IdSequence, SearchDocument, SearchPosting
+
+
+class SequenceTests(TestCase):
+    def setUp(self):
+        sequences._blocks.clear()
+
+    def test_block_from_rolled_back_transaction_is_not_kept(self):
+        with transaction.atomic():
+            first = sequences.allocate('test')
+            transaction.set_rollback(True)
+        self.assertNotIn('test', sequences._blocks)
+        # The counter went back with the rollback, and so did the numbers
+        self.assertEqual(sequences.allocate('test'), first)
+        self.assertGreater(IdSequence.objects.get(name='test').next_value, first[0])
+
+    def test_block_kept_once_transaction_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                first = sequences.allocate('test', 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(sequences.allocate('test'), [first[-1] + 1])
+
+
+class ReserveApartTests(TransactionTestCase):
+    def test_reserves_on_its_own_connection(self):
+        self.assertEqual(sequences._reserve_apart('test', 5), 1)
+        self.assertEqual(sequences._reserve_apart('test', 5), 6)
+        self.assertEqual(IdSequence.objects.get(name='test').next_value, 11)
+
+
+class StockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.book = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593',
+                                       category=Category.objects.create(name='Fiction'))
+        add_copies(cls.book, 4)
+
+    def states(self):
+        return list(self.book.copies.order_by('barcode').values_list('state', flat=True))
+
+    def test_shrinking_withdraws_the_highest_shelf_copies(self):
+        self.book.copies.filter(barcode__endswith='-004').update(state=BookCopy.ON_LOAN)
+        set_stock(self.book, 2)
+        self.assertEqual(self.states(), ['available', 'withdrawn', 'withdrawn', 'on_loan'])
+        self.assertEqual((self.book.total_copies, self.book.available_copies), (2, 1))
+
+    def test_cannot_shrink_below_the_copies_on_loan(self):
+        self.book.copies.exclude(barcode__endswith='-001').update(state=BookCopy.ON_LOAN)
+        with self.assertRaises(ValueError):
+            set_stock(self.book, 2)
+        self.assertEqual(self.states(), ['available', 'on_loan', 'on_loan', 'on_loan'])
+
+    def test_growing_numbers_after_existing_copies(self):
+        set_stock(self.book, 1)
+        set_stock(self.book, 5)
+        self.assertEqual(self.book.copies.filter(state__in=BookCopy.IN_STOCK).count(), 5)
+        self.assertTrue(self.book.copies.filter(barcode=f'{self.book.book_id}-005').exists())
+
+    def test_form_reports_copies_lent_out_after_validation(self):
+        data = {'title': 'Dune Messiah', 'author': self.book.author, 'isbn': self.book.isbn,
+                'category': self.book.category_id, 'copies': 1}
+        form = BookForm(data, instance=Book.objects.get(pk=self.book.pk))
+        self.assertTrue(form.is_valid())
+        self.book.copies.update(state=BookCopy.ON_LOAN)     # checked out meanwhile
+        self.assertIsNone(form.save())
+        self.assertIn('on loan', form.errors['copies'][0])
+        self.assertEqual(Book.objects.get(pk=self.book.pk).title, 'Dune')
+
+
+class ImporterTests(TestCase):
+    def test_batch_rejected_by_the_database_is_saved_row_by_row(self):
+        importer = CatalogImporter(batch_size=10)
+        # Added by someone else after the importer loaded the known ISBNs
+        Book.objects.create(title='Emma', author='Jane Austen', isbn='978-0141439587')
+        report = importer.run([
+            {'title': 'Dune', 'author': 'Frank Herbert', 'isbn': '978-0441013593', 'copies': 2},
+            {'title': 'Emma', 'author': 'Jane Austen', 'isbn': '978-0141439587'},
+            {'title': 'Ulysses', 'author': 'James Joyce', 'isbn': '978-0199535675'},
+        ])
+        self.assertEqual(report.created, 2)
+        self.assertEqual([row for row, message in report.errors], [2])
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ['Dune', 'Emma', 'Ulysses'])
+        self.assertEqual(BookCopy.objects.filter(book__title='Dune').count(), 2)
+
+    def test_category_added_meanwhile_is_reused_and_names_keep_their_full_length(self):
+        importer = CatalogImporter()
+        science = Category.objects.create(name='Science')
+        publisher = 'The Very Long Name of a University Press ' * 4
+        report = importer.run([{'title': 'Cosmos', 'author': 'Carl Sagan', 'isbn': '978-0345539434',
+                                'category': 'Science', 'publisher': publisher}])
+
+        self.assertEqual((report.created, report.errors), (1, []))
+        book = Book.objects.get(title='Cosmos')
+        self.assertEqual(book.category, science)
+        self.assertEqual(book.publisher.name, publisher.strip())
+
+
+class SimilarityIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        titles = [('Dune', 'desert planet spice empire'), ('Dune Messiah', 'desert planet spice emperor'),
+                  ('Emma', 'matchmaking village marriage'), ('Persuasion', 'navy marriage village'),
+                  ('Ulysses', 'dublin day odyssey')]
+        # No shared author or category, so only the descriptions are shared
+        cls.books = {title: Book.objects.create(title=title, author=title, isbn=title, description=description)
+                     for title, description in titles}
+
+    def setUp(self):
+        scratch = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(SIMILARITY_INDEX_DIR=scratch))
+        similarity.build()
+
+    def similar(self, title):
+        return [book.title for book in similarity.similar_books(Book.objects.get(pk=self.books[title].pk))]
+
+    def test_built_index_ranks_shared_terms_first(self):
+        self.assertEqual(self.similar('Dune')[0], 'Dune Messiah')
+        self.assertEqual(self.similar('Emma')[0], 'Persuasion')
+
+    def test_saves_and_deletes_reach_the_delta_only_on_commit(self):
+        ulysses = self.books['Ulysses']
+        ulysses.description = 'desert planet spice'
+        with transaction.atomic():
+            ulysses.save()
+            transaction.set_rollback(True)
+        self.assertFalse(similarity.delta_path().exists() and similarity.delta_path().read_bytes())
+        self.assertNotIn('Ulysses', self.similar('Dune'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ulysses.save()
+        self.assertIn('Ulysses', self.similar('Dune'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.get(pk=self.books['Dune Messiah'].pk).delete()
+        self.assertNotIn('Dune Messiah', self.similar('Dune'))
+
+    def test_rebuild_absorbs_the_delta(self):
+        ulysses = self.books['Ulysses']
+        ulysses.description = 'desert planet spice'
+        with self.captureOnCommitCallbacks(execute=True):
+            ulysses.save()
+        similarity.build()
+        self.assertEqual(similarity.delta_path().read_bytes(), b'')
+        self.assertIn('Ulysses', self.similar('Dune'))
+        self.assertEqual(similarity.get_index().delta, {})
+
+
+class CoverDigestTests(TestCase):
+    def setUp(self):
+        book = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593')
+        Book.objects.filter(pk=book.pk).update(cover_image='book_covers/dune.jpg')
+        self.stale = Book.objects.get(pk=book.pk)
+        # The thumbnail worker finishes after the edit form loaded the book
+        spec = thumbnails.spec_for(self.stale.cover_image)
+        thumbnails.record(spec, book.pk, 'book_covers/dune.jpg', 'abc123')
+
+    def test_saving_a_stale_instance_keeps_the_digest(self):
+        self.stale.title = 'Dune (1965)'
+        self.stale.save()
+        self.assertEqual(Book.objects.values_list('title', 'cover_digest').get(),
+                         ('Dune (1965)', 'abc123'))
+
+    def test_clearing_the_cover_resets_the_digest(self):
+        self.stale.cover_image = None
+        self.stale.save()
+        self.assertEqual(Book.objects.values_list('cover_digest', flat=True).get(), '')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dune = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593',
+                                       description='A desert planet and its spice.')
+        cls.guide = Book.objects.create(title='Desert Survival Guide', author='Ann Smith', isbn='978-1',
+                                        description='Water, shade and navigation.')
+        cls.atlas = Book.objects.create(title='World Atlas', author='Cartographers', isbn='978-2',
+                                        description='Every desert, ocean and mountain range.')
+
+    def titles(self, query):
+        found = Book.objects.in_bulk([pk for pk, score in search.search(query)])
+        return [found[pk].title for pk, score in search.search(query)]
+
+    def test_title_hits_outrank_description_hits(self):
+        self.assertEqual(self.titles('desert'), ['Desert Survival Guide', 'Dune', 'World Atlas'])
+
+    def test_rarer_term_decides_the_ranking(self):
+        self.assertEqual(self.titles('desert spice')[0], 'Dune')
+
+    def test_index_follows_save_and_delete(self):
+        self.dune.title = 'Children of Dune'
+        self.dune.save()
+        self.assertEqual(self.titles('children'), ['Children of Dune'])
+        self.dune.delete()
+        self.assertEqual(self.titles('children'), [])
+        self.assertFalse(SearchPosting.objects.filter(book_id=self.dune.pk).exists())
+
+    def test_common_term_reads_only_its_strongest_postings(self):
+        with mock.patch.object(search, 'MAX_POSTINGS_PER_TERM', 1):
+            self.assertEqual(self.titles('desert'), ['Desert Survival Guide'])
+
+    def test_migration_backfills_books_without_a_document(self):
+        # As if the atlas had been added before the index existed
+        SearchPosting.objects.filter(book=self.atlas).delete()
+        SearchDocument.objects.filter(book=self.atlas).delete()
+        migration = importlib.import_module('books.migrations.0010_backfill_search_index')
+        migration.backfill(apps, None)
+        self.assertEqual(self.titles('cartographers'), ['World Atlas'])
+        self.assertEqual(self.titles('desert'), ['Desert Survival Guide', 'Dune', 'World Atlas'])
@@ -5,8 +5,10 @@ app_name = 'books'
 
 urlpatterns = [
     path('',                        views.book_list,           name='book_list'),
+    path('more/',                   views.book_list_more,      name='book_list_more'),
     path('<int:pk>/',               views.book_detail,         name='book_detail'),
     path('add/',                    views.book_add,            name='book_add'),
+    path('import/',                 views.book_import,         name='book_import'),
     path('<int:pk>/edit/',          views.book_edit,           name='book_edit'),
     path('<int:pk>/delete/',        views.book_delete,         name='book_delete'),
     path('categories/',             views.category_list,       name='category_list'),
@@ -1,57 +1,121 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Case, Count, IntegerField, Value, When
 from .models import Book, Category, Publisher
-from .forms import BookForm, CategoryForm, PublisherForm
+from . import recommendations, search, similarity
+from .forms import BookForm, CatalogImportForm, CategoryForm, PublisherForm
+from .importer import import_file
+from circulation.models import IssuedBook
+from circulation.services import ACTIVE_STATUSES
+from library_management.pagination import KeysetPaginator, filter_querystring
 
 
 # ─────────────────────────────────────────
 # BOOK LIST + SEARCH + FILTER
 # ─────────────────────────────────────────
-@login_required
-def book_list(request):
-    books = Book.objects.select_related('category', 'publisher').all()
-    categories = Category.objects.all()
+BOOKS_PER_PAGE = 24
+RATING_FILTERS = ('4', '3', '2', '1')
+# Books shown in each of the "also borrowed" / "similar titles" strips
+ALSO_BORROWED_SHOWN = 6
+
 
-    # Search
-    query = request.GET.get('q', '')
+def filter_books(request):
+    """Apply the q / category / availability / rating filters from the query string."""
+    books = Book.objects.select_related('category', 'publisher').with_copies()
+
+    # Search — ranked by relevance through the inverted index (books/search.py)
+    query = request.GET.get('q', '').strip()
     if query:
-        books = books.filter(
-            Q(title__icontains=query) |
-            Q(author__icontains=query) |
-            Q(isbn__icontains=query) |
-            Q(book_id__icontains=query)
-        )
+        ranked = [pk for pk, score in search.search(query)]
+        books = books.filter(pk__in=ranked).annotate(search_rank=Case(
+            *[When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ranked)],
+            output_field=IntegerField(),
+        ))
 
     # Filter by category
     category_id = request.GET.get('category', '')
-    if category_id:
+    if category_id.isdigit():
         books = books.filter(category__id=category_id)
 
     # Filter by availability
     availability = request.GET.get('availability', '')
     if availability == 'available':
-        books = books.filter(available_copies__gt=0)
+        books = books.available()
     elif availability == 'unavailable':
-        books = books.filter(available_copies=0)
+        books = books.unavailable()
+
+    # Filter by average rating (stored on Book, see reviews/ratings.py)
+    min_rating = request.GET.get('rating', '')
+    if min_rating in RATING_FILTERS:
+        books = books.filter(rating_avg__gte=int(min_rating))
+
+    return books, query, category_id, availability, min_rating
+
+
+def paginate_books(request, books, query):
+    # Best match first when searching, highest average first for "top rated",
+    # otherwise newest first keyed on the primary key so every page is an
+    # index seek
+    if query:
+        ordering = ('search_rank', 'id')
+    elif request.GET.get('sort') == 'top_rated':
+        ordering = ('-rating_avg', '-rating_count', '-id')
+    else:
+        ordering = ('-id',)
+    return KeysetPaginator(books, ordering=ordering, per_page=BOOKS_PER_PAGE).page(
+        request.GET.get('cursor')
+    )
+
+
+@login_required
+def book_list(request):
+    books, query, category_id, availability, min_rating = filter_books(request)
+    page = paginate_books(request, books, query)
 
     return render(request, 'books/book_list.html', {
-        'books': books,
-        'categories': categories,
+        'books': page.items,
+        'page': page,
+        'filter_qs': filter_querystring(request),
+        'categories': Category.objects.all(),
         'query': query,
         'selected_category': category_id,
         'selected_availability': availability,
+        'selected_rating': min_rating,
+        'selected_sort': request.GET.get('sort', ''),
+        'rating_filters': RATING_FILTERS,
     })
 
 
+@login_required
+def book_list_more(request):
+    """The "load more" partial: the next page of book cards for the same filters."""
+    books, query, *_ = filter_books(request)
+    page = paginate_books(request, books, query)
+
+    response = render(request, 'books/_book_cards.html', {'books': page.items})
+    response['X-Next-Cursor'] = page.next_cursor or ''
+    return response
+
+
 # ─────────────────────────────────────────
 # BOOK DETAIL
 # ─────────────────────────────────────────
 @login_required
 def book_detail(request, pk):
-    book = get_object_or_404(Book, pk=pk)
-    return render(request, 'books/book_detail.html', {'book': book})
+    book = get_object_or_404(Book.objects.with_copies(), pk=pk)
+    copies = None
+    if request.user.is_admin_user or request.user.is_librarian_user:
+        # Which physical copy is where, and who has the ones that are out
+        borrowers = {loan.copy_id: loan.student for loan in IssuedBook.objects.filter(
+            book=book, copy__isnull=False, status__in=ACTIVE_STATUSES).select_related('student')}
+        copies = [(copy, borrowers.get(copy.pk)) for copy in book.copies.order_by('barcode')]
+    return render(request, 'books/book_detail.html', {
+        'book': book,
+        'copies': copies,
+        'also_borrowed': recommendations.also_borrowed(book, limit=ALSO_BORROWED_SHOWN),
+        'similar_books': similarity.similar_books(book, limit=ALSO_BORROWED_SHOWN),
+    })
 
 
 # ─────────────────────────────────────────
@@ -67,8 +131,9 @@ def book_add(request):
     if request.method == 'POST':
         if form.is_valid():
             book = form.save()
-            messages.success(request, f'Book "{book.title}" added successfully! ID: {book.book_id}')
-            return redirect('books:book_list')
+            if book is not None:
+                messages.success(request, f'Book "{book.title}" added successfully! ID: {book.book_id}')
+                return redirect('books:book_list')
 
     return render(request, 'books/book_form.html', {
         'form': form,
@@ -77,6 +142,26 @@ def book_add(request):
     })
 
 
+# ─────────────────────────────────────────
+# BULK IMPORT
+# ─────────────────────────────────────────
+@login_required
+def book_import(request):
+    if not (request.user.is_admin_user or request.user.is_librarian_user):
+        messages.error(request, 'Access denied.')
+        return redirect('books:book_list')
+
+    form = CatalogImportForm(request.POST or None, request.FILES or None)
+    report = None
+    if request.method == 'POST' and form.is_valid():
+        dry_run = form.cleaned_data['dry_run']
+        report = import_file(form.cleaned_data['file'], form.cleaned_data['format'], dry_run=dry_run)
+        if report.created and not dry_run:
+            messages.success(request, f'Imported {report.created} book(s).')
+
+    return render(request, 'books/book_import.html', {'form': form, 'report': report})
+
+
 # ─────────────────────────────────────────
 # EDIT BOOK
 # ─────────────────────────────────────────
@@ -86,13 +171,13 @@ def book_edit(request, pk):
         messages.error(request, 'Access denied.')
         return redirect('books:book_list')
 
-    book = get_object_or_404(Book, pk=pk)
+    book = get_object_or_404(Book.objects.with_copies(), pk=pk)
     form = BookForm(request.POST or None, request.FILES or None, instance=book)
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
-            messages.success(request, f'Book "{book.title}" updated successfully!')
-            return redirect('books:book_detail', pk=book.pk)
+            if form.save() is not None:
+                messages.success(request, f'Book "{book.title}" updated successfully!')
+                return redirect('books:book_detail', pk=book.pk)
 
     return render(request, 'books/book_form.html', {
         'form': form,
@@ -126,7 +211,7 @@ def book_delete(request, pk):
 # ─────────────────────────────────────────
 @login_required
 def category_list(request):
-    categories = Category.objects.all()
+    categories = Category.objects.annotate(book_count=Count('book'))
     form = CategoryForm(request.POST or None)
     if request.method == 'POST':
         if form.is_valid():
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import IssuedBook, Fine, FineSettings
+from .models import IssuedBook, Fine, FineSettings, OverdueSweep
 
 
 @admin.register(IssuedBook)
@@ -19,4 +19,8 @@ class FineAdmin(admin.ModelAdmin):
 
 @admin.register(FineSettings)
 class FineSettingsAdmin(admin.ModelAdmin):
-    list_display = ('fine_per_day', 'loan_period_days', 'updated_at')
\ No newline at end of file
+    list_display = ('fine_per_day', 'loan_period_days', 'updated_at')
+
+@admin.register(OverdueSweep)
+class OverdueSweepAdmin(admin.ModelAdmin):
+    list_display = ('finished_at', 'watermark', 'rows_updated', 'batches')
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CirculationConfig(AppConfig):
     name = 'circulation'
+
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,83 @@
+"""
+Prefix search behind the issue form's student and book pickers.
+
+The issue form no longer ships every student and every available book as
+``<option>``s; the pickers ask ``/circulation/autocomplete/...`` as the
+librarian types and the form only validates the primary keys sent back.
+
+Each indexed column is searched on its own with ``LIKE 'term%'`` and a
+``LIMIT``, so every query is a short range scan of one index rather than a
+scan of the table for an ``OR``.  Results are merged in column order (ID
+matches before name matches) until the limit is reached.  ``istartswith``
+compiles to a plain ``LIKE`` under MySQL's case-insensitive collations, so
+the indexes stay usable.
+"""
+
+from accounts.models import User
+from books.models import Book
+
+LIMIT = 10
+MAX_LIMIT = 25
+
+STUDENT_FIELDS = ('id', 'username', 'membership_id', 'first_name', 'last_name')
+BOOK_FIELDS = ('id', 'book_id', 'isbn', 'title', 'author')
+
+
+def student_label(user):
+    name = user.get_full_name() or user.username
+    ids = ' · '.join(filter(None, [user.username, user.membership_id]))
+    return f'{name} ({ids})'
+
+
+def book_label(book):
+    return f'{book.title} — {book.book_id} ({book.available_copies} available)'
+
+
+def _prefix_search(queryset, lookups, limit):
+    """Up to ``limit`` rows matching any of ``lookups``, taken in lookup order."""
+    found = {}
+    for lookup, ordering in lookups:
+        if len(found) >= limit:
+            break
+        rows = queryset.filter(**lookup).exclude(pk__in=list(found)).order_by(*ordering)
+        for obj in rows[:limit - len(found)]:
+            found[obj.pk] = obj
+    return list(found.values())
+
+
+def search_students(term, limit=LIMIT):
+    term = term.strip()
+    if not term:
+        return []
+    words = term.split()
+    lookups = [
+        ({'membership_id__istartswith': term}, ['membership_id']),
+        ({'username__istartswith': term}, ['username']),
+    ]
+    if len(words) > 1:
+        # "asha sh" → first name "asha…", last name "sh…"
+        lookups.append(({'first_name__istartswith': words[0], 'last_name__istartswith': ' '.join(words[1:])},
+                        ['first_name', 'last_name']))
+    else:
+        lookups += [
+            ({'first_name__istartswith': term}, ['first_name', 'last_name']),
+            ({'last_name__istartswith': term}, ['last_name', 'first_name']),
+        ]
+    students = _prefix_search(User.objects.filter(role='student').only(*STUDENT_FIELDS), lookups, limit)
+    return [{'id': u.pk, 'text': student_label(u), 'username': u.username,
+             'membership_id': u.membership_id, 'name': u.get_full_name()} for u in students]
+
+
+def search_books(term, limit=LIMIT):
+    """Books with a copy on the shelf, matched on book ID, ISBN or title."""
+    term = term.strip()
+    if not term:
+        return []
+    lookups = [
+        ({'book_id__istartswith': term}, ['book_id']),
+        ({'isbn__istartswith': term}, ['isbn']),
+        ({'title__istartswith': term}, ['title']),
+    ]
+    books = _prefix_search(Book.objects.available().with_copies().only(*BOOK_FIELDS), lookups, limit)
+    return [{'id': b.pk, 'text': book_label(b), 'book_id': b.book_id, 'isbn': b.isbn,
+             'title': b.title, 'author': b.author, 'available_copies': b.available_copies} for b in books]
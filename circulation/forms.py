@@ -1,25 +1,56 @@
 from django import forms
-from django.utils import timezone
-from datetime import timedelta
+from django.urls import reverse_lazy
 from .models import IssuedBook, FineSettings
+from .policy import get_policy
+from . import autocomplete
 from books.models import Book
 from accounts.models import User
 
 
+class AutocompleteSelect(forms.Select):
+    """
+    A ``<select>`` holding only the chosen option; the rest are fetched from
+    ``url`` as the user types (see circulation/autocomplete.py).  Rendering
+    never iterates the field's queryset, and validation stays with the
+    ``ModelChoiceField``: one lookup of the submitted primary key.
+    """
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = str(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        chosen = [v for v in value if v not in (None, '')]
+        try:
+            selected = list(field.queryset.filter(pk__in=chosen)) if chosen else []
+        except (TypeError, ValueError):     # a tampered, non-numeric value
+            selected = []
+        self.choices = [('', field.empty_label or '')] + [(obj.pk, field.label_from_instance(obj))
+                                                           for obj in selected]
+        return super().optgroups(name, value, attrs)
+
+
 class IssueBookForm(forms.ModelForm):
     student = forms.ModelChoiceField(
-        queryset=User.objects.filter(role='student').order_by('first_name'),
-        widget=forms.Select(attrs={'class': 'form-select select2'}),
+        queryset=User.objects.filter(role='student'),
+        widget=AutocompleteSelect(reverse_lazy('circulation:student_autocomplete'),
+                                  attrs={'class': 'form-select'}),
         label='Student'
     )
     book = forms.ModelChoiceField(
-        queryset=Book.objects.filter(available_copies__gt=0).order_by('title'),
-        widget=forms.Select(attrs={'class': 'form-select select2'}),
+        queryset=Book.objects.available(),
+        widget=AutocompleteSelect(reverse_lazy('circulation:book_autocomplete'),
+                                  attrs={'class': 'form-select'}),
         label='Book'
     )
     due_date = forms.DateField(
         widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
-        initial=timezone.now().date() + timedelta(days=14),
         label='Due Date'
     )
     notes = forms.CharField(
@@ -33,7 +64,9 @@ class IssueBookForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['due_date'].initial = (timezone.now() + timedelta(days=14)).date()
+        self.fields['due_date'].initial = get_policy().due_date()
+        self.fields['student'].label_from_instance = autocomplete.student_label
+        self.fields['book'].label_from_instance = autocomplete.book_label
 
 
 class FineSettingsForm(forms.ModelForm):
@@ -0,0 +1,81 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from accounts.models import User
+from books.copies import add_copies
+from books.models import Book, BookCopy
+from circulation import services
+from circulation.models import IssuedBook
+
+
+class Command(BaseCommand):
+    help = ('Fire many concurrent checkouts at one book and verify no copy is ever issued twice. '
+            'Creates throwaway students and a book, and deletes them afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=300, help='Concurrent checkout attempts.')
+        parser.add_argument('--copies', type=int, default=25, help='Copies of the test book.')
+        parser.add_argument('--threads', type=int, default=50)
+        parser.add_argument('--keep', action='store_true', help="Don't delete the test data.")
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        copies, attempts = options['copies'], options['checkouts']
+
+        book = Book.objects.create(title=f'Stress test {tag}', author='stress', isbn=f'STRESS-{tag}')
+        add_copies(book, copies)
+        User.objects.bulk_create([
+            User(username=f'stress-{tag}-{i}', role='student') for i in range(attempts)
+        ])
+        students = list(User.objects.filter(username__startswith=f'stress-{tag}-'))
+        due = timezone.now().date() + timedelta(days=14)
+
+        def checkout(student):
+            try:
+                services.issue_book(student, book, None, due)
+                return 'issued'
+            except services.CirculationError:
+                return 'refused'
+            except Exception as e:   # e.g. lock timeouts; reported, not hidden
+                return f'error: {type(e).__name__}'
+            finally:
+                connections.close_all()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = Counter(pool.map(checkout, students))
+        elapsed = time.monotonic() - started
+
+        issued_rows = IssuedBook.objects.filter(book=book).count()
+        issued_copies = IssuedBook.objects.filter(book=book).values('copy').distinct().count()
+        on_loan = BookCopy.objects.filter(book=book, state=BookCopy.ON_LOAN).count()
+
+        for outcome, count in sorted(results.items()):
+            self.stdout.write(f'{outcome:>12}: {count}')
+        self.stdout.write(f'{attempts} checkouts in {elapsed:.2f}s '
+                          f'({attempts / elapsed:.0f}/s); {copies - on_loan} copies left on the shelf')
+
+        problems = []
+        if issued_rows > copies:
+            problems.append(f'oversold: {issued_rows} loans for {copies} copies')
+        if issued_copies != issued_rows:
+            problems.append(f'{issued_rows} loans share {issued_copies} copies')
+        if on_loan != issued_rows:
+            problems.append(f'{on_loan} copies marked on loan for {issued_rows} loans')
+        if results['issued'] != issued_rows:
+            problems.append(f"{results['issued']} successes reported but {issued_rows} loans stored")
+
+        if not options['keep']:
+            book.delete()
+            User.objects.filter(username__startswith=f'stress-{tag}-').delete()
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('No oversell: every copy was issued at most once.'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from circulation.overdue import sweep_overdue, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Mark issued books past their due date as overdue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--every', type=int, default=0, metavar='SECONDS',
+                            help='Keep running, sweeping every SECONDS (0 = run once).')
+
+    def handle(self, *args, **options):
+        while True:
+            sweep = sweep_overdue(batch_size=options['batch_size'])
+            self.stdout.write(
+                f'Marked {sweep.rows_updated} loan(s) overdue in {sweep.batches} batch(es) '
+                f'(due before {sweep.watermark}).'
+            )
+            if not options['every']:
+                break
+            time.sleep(options['every'])
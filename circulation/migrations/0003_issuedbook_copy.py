@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+BATCH = 5000
+ACTIVE_STATUSES = ['issued', 'overdue']
+
+
+def explode_copies(apps, schema_editor):
+    """
+    Turn each book's ``total_copies`` into BookCopy rows, in bulk, and link
+    every active loan to an on-loan copy of its own.  The loans are trusted
+    over the counters: ``available_copies`` is not read, and a book with
+    more loans out than counted copies gets a copy per loan.
+    """
+    Book = apps.get_model('books', 'Book')
+    BookCopy = apps.get_model('books', 'BookCopy')
+    IssuedBook = apps.get_model('circulation', 'IssuedBook')
+
+    loans = defaultdict(list)
+    for pk, book_id in (IssuedBook.objects.filter(status__in=ACTIVE_STATUSES)
+                        .order_by('pk').values_list('pk', 'book_id').iterator()):
+        loans[book_id].append(pk)
+
+    last = 0
+    while True:
+        chunk = list(Book.objects.filter(pk__gt=last).order_by('pk')
+                     .values_list('pk', 'book_id', 'total_copies')[:BATCH])
+        if not chunk:
+            break
+        last = chunk[-1][0]
+        BookCopy.objects.bulk_create([
+            BookCopy(book_id=pk, barcode=f'{book_id}-{n:03d}',
+                     state='on_loan' if n <= len(loans[pk]) else 'available')
+            for pk, book_id, total in chunk
+            for n in range(1, max(total, len(loans[pk])) + 1)
+        ], batch_size=BATCH)
+
+        on_loan = defaultdict(list)
+        for copy_pk, book_pk in (BookCopy.objects.filter(book_id__in=[row[0] for row in chunk], state='on_loan')
+                                 .order_by('pk').values_list('pk', 'book_id')):
+            on_loan[book_pk].append(copy_pk)
+        IssuedBook.objects.bulk_update([
+            IssuedBook(pk=loan_pk, copy_id=copy_pk)
+            for book_pk, copy_pks in on_loan.items()
+            for loan_pk, copy_pk in zip(loans[book_pk], copy_pks)
+        ], ['copy'], batch_size=1000)
+
+
+def restore_counts(apps, schema_editor):
+    """
+    Write the copies' states back into the counters and remove the copies,
+    so that migrating forwards again makes them afresh from the counters.
+    """
+    Book = apps.get_model('books', 'Book')
+    BookCopy = apps.get_model('books', 'BookCopy')
+    Book.objects.update(total_copies=0, available_copies=0)
+    rows = BookCopy.objects.values('book').order_by().annotate(
+        total=Count('id', filter=Q(state__in=['available', 'on_loan'])),
+        available=Count('id', filter=Q(state='available')),
+    )
+    for row in rows.iterator():
+        Book.objects.filter(pk=row['book']).update(total_copies=row['total'], available_copies=row['available'])
+    BookCopy.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_book_copies'),
+        ('circulation', '0002_overdue_sweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issuedbook',
+            name='copy',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loans', to='books.bookcopy'),
+        ),
+        migrations.RunPython(explode_copies, restore_counts),
+    ]
@@ -4,8 +4,7 @@
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
-from books.models import Book
-from datetime import timedelta
+from books.models import Book, BookCopy
 
 
 class IssuedBook(models.Model):
@@ -17,6 +16,8 @@ class IssuedBook(models.Model):
 
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='issued_books')
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='issued_records')
+    # The physical copy handed out; empty only on loans returned before copies were tracked
+    copy = models.ForeignKey(BookCopy, on_delete=models.SET_NULL, null=True, blank=True, related_name='loans')
     issued_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='issued_by_staff')
     issue_date = models.DateField(default=timezone.now)
     due_date = models.DateField()
@@ -26,7 +27,8 @@ class IssuedBook(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.due_date:
-            self.due_date = timezone.now().date() + timedelta(days=14)
+            from .policy import get_policy
+            self.due_date = get_policy().due_date()
         super().save(*args, **kwargs)
 
     @property
@@ -35,6 +37,16 @@ class IssuedBook(models.Model):
             return False
         return timezone.now().date() > self.due_date
 
+    @property
+    def effective_status(self):
+        """Status as of today, even if the overdue sweeper hasn't run yet."""
+        if self.status == 'issued' and self.is_overdue:
+            return 'overdue'
+        return self.status
+
+    def get_effective_status_display(self):
+        return dict(self.STATUS_CHOICES)[self.effective_status]
+
     @property
     def overdue_days(self):
         if self.status == 'returned' and self.return_date:
@@ -50,6 +62,9 @@ class IssuedBook(models.Model):
 
     class Meta:
         ordering = ['-issue_date']
+        indexes = [
+            models.Index(fields=['status', 'due_date']),   # overdue sweeper
+        ]
 
 
 class Fine(models.Model):
@@ -87,4 +102,19 @@ class FineSettings(models.Model):
 
     class Meta:
         verbose_name = "Fine Setting"
-        verbose_name_plural = "Fine Settings"
\ No newline at end of file
+        verbose_name_plural = "Fine Settings"
+
+
+class OverdueSweep(models.Model):
+    """One run of ``manage.py sweep_overdue`` (see circulation/overdue.py)."""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    watermark = models.DateField(help_text="Loans due before this date were marked overdue.")
+    rows_updated = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Sweep {self.finished_at:%d %b %Y %H:%M} — {self.rows_updated} marked overdue"
+
+    class Meta:
+        ordering = ['-finished_at']
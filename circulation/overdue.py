@@ -0,0 +1,70 @@
+"""
+Overdue status maintenance.
+
+Loans are flipped from ``issued`` to ``overdue`` by a sweeper
+(``manage.py sweep_overdue``) in bounded batches on the (status, due_date)
+index, instead of by an UPDATE on every list page view.  Between sweeps,
+reads use ``overdue_q()`` / ``IssuedBook.effective_status`` so a loan that
+fell due this morning still shows as overdue.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import IssuedBook, OverdueSweep
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def overdue_q(today=None):
+    today = today or timezone.now().date()
+    return Q(status='overdue') | Q(status='issued', due_date__lt=today)
+
+
+def issued_q(today=None):
+    """Loans out and not yet due: the complement of ``overdue_q()`` among active loans."""
+    today = today or timezone.now().date()
+    return Q(status='issued', due_date__gte=today)
+
+
+def filter_by_status(queryset, status, today=None):
+    """Filter loans on their status as of ``today`` (see ``effective_status``)."""
+    today = today or timezone.now().date()
+    if status == 'overdue':
+        return queryset.filter(overdue_q(today))
+    if status == 'issued':
+        return queryset.filter(issued_q(today))
+    return queryset.filter(status=status)
+
+
+def last_sweep():
+    return OverdueSweep.objects.first()
+
+
+def sweep_overdue(batch_size=DEFAULT_BATCH_SIZE, today=None):
+    """Mark past-due loans overdue, ``batch_size`` rows per transaction."""
+    started = timezone.now()
+    today = today or timezone.now().date()
+    updated = batches = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                IssuedBook.objects.filter(status='issued', due_date__lt=today)
+                .order_by('due_date', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Re-check the status so a loan returned meanwhile isn't touched
+            updated += IssuedBook.objects.filter(pk__in=ids, status='issued').update(status='overdue')
+            batches += 1
+
+    return OverdueSweep.objects.create(
+        started_at=started,
+        finished_at=timezone.now(),
+        watermark=today,
+        rows_updated=updated,
+        batches=batches,
+    )
@@ -0,0 +1,72 @@
+"""
+Loan policy (fine rate and loan period) served from process memory.
+
+``FineSettings`` is read from the database once per process and kept until
+its cache version changes.  Saving or deleting the settings bumps the version
+once the change commits (see circulation/signals.py), and every worker
+reloads on its next read; in between, reads cost no queries.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+VERSION_KEY = 'circulation:loan_policy:version'
+
+
+@dataclass(frozen=True)
+class LoanPolicy:
+    fine_per_day: Decimal
+    loan_period_days: int
+
+    def due_date(self, issue_date: date | None = None) -> date:
+        return (issue_date or timezone.now().date()) + timedelta(days=self.loan_period_days)
+
+
+DEFAULT_POLICY = LoanPolicy(fine_per_day=Decimal('2.00'), loan_period_days=14)
+
+_lock = threading.Lock()
+_loaded: tuple[int, LoanPolicy] | None = None
+
+
+def current_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1, so a version evicted and re-added
+        # can't collide with one a worker already has loaded.
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # key missing or evicted
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def load_policy() -> LoanPolicy:
+    from .models import FineSettings
+
+    row = FineSettings.objects.order_by('pk').first()
+    if row is None:
+        return DEFAULT_POLICY
+    return LoanPolicy(fine_per_day=row.fine_per_day, loan_period_days=row.loan_period_days)
+
+
+def get_policy() -> LoanPolicy:
+    global _loaded
+    version = current_version()
+    loaded = _loaded
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+    with _lock:
+        if _loaded is None or _loaded[0] != version:
+            _loaded = (version, load_policy())
+        return _loaded[1]
@@ -0,0 +1,268 @@
+"""
+Issue and return as single atomic operations.
+
+Availability lives on the physical copies (``books.BookCopy``), not on the
+Book row.  A checkout claims one copy with a conditional UPDATE on that
+single row (``UPDATE ... SET state = 'on_loan' WHERE id = ... AND state =
+'available'``), found through the (book, state) index; a return flips the
+loan's own copy back.  Two desks can never hand out the same copy, and
+concurrent checkouts of one title contend on different rows, not on the
+Book.  No row is read and then written back from Python.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import User
+from books.models import Book, BookCopy
+from .models import IssuedBook, Fine
+from .signals import circulation_changed
+
+ACTIVE_STATUSES = ['issued', 'overdue']
+
+
+class CirculationError(Exception):
+    pass
+
+
+def take_copy(book_id, copy_id=None):
+    """
+    Claim an available copy of the book (``copy_id`` for a scanned one).
+    Returns the claimed copy's pk, or None if no copy is left.
+    """
+    if copy_id is not None:
+        return copy_id if _claim(book_id, copy_id) else None
+    tried = []
+    while True:
+        pk = (BookCopy.objects.filter(book_id=book_id, state=BookCopy.AVAILABLE)
+              .exclude(pk__in=tried).order_by('pk').values_list('pk', flat=True).first())
+        if pk is None or _claim(book_id, pk):
+            return pk
+        tried.append(pk)    # another desk got it first; try the next one
+
+
+def _claim(book_id, copy_id):
+    return BookCopy.objects.filter(pk=copy_id, book_id=book_id, state=BookCopy.AVAILABLE).update(
+        state=BookCopy.ON_LOAN
+    ) == 1
+
+
+def put_back_copies(copy_ids):
+    BookCopy.objects.filter(pk__in=[pk for pk in copy_ids if pk], state=BookCopy.ON_LOAN).update(
+        state=BookCopy.AVAILABLE
+    )
+
+
+def issue_book(student, book, issued_by, due_date, notes='', copy=None):
+    with transaction.atomic():
+        if IssuedBook.objects.filter(student=student, book=book, status__in=ACTIVE_STATUSES).exists():
+            raise CirculationError(f"{student.get_full_name()} already has '{book.title}' issued.")
+        copy_id = take_copy(book.pk, copy.pk if copy else None)
+        if copy_id is None:
+            raise CirculationError(f"'{copy.barcode}' is not on the shelf." if copy
+                                   else f"'{book.title}' has no available copies.")
+
+        issued = IssuedBook.objects.create(
+            student=student, book=book, copy_id=copy_id, issued_by=issued_by,
+            due_date=due_date, notes=notes,
+        )
+    circulation_changed.send(sender=IssuedBook, action='issue', issued=[issued])
+    return issued
+
+
+def calculate_fine(issued, fine_per_day, today=None):
+    """Return ``(overdue_days, amount)`` for returning ``issued`` on ``today``."""
+    today = today or timezone.now().date()
+    overdue_days = max(0, (today - issued.due_date).days)
+    return overdue_days, Decimal(overdue_days) * fine_per_day
+
+
+def return_book(issued, fine_per_day, today=None):
+    """Mark ``issued`` returned, restock the copy and create any fine. Returns the Fine or None."""
+    today = today or timezone.now().date()
+    overdue_days, amount = calculate_fine(issued, fine_per_day, today)
+
+    with transaction.atomic():
+        # Only the first of two concurrent returns wins the status flip
+        won = IssuedBook.objects.filter(pk=issued.pk, status__in=ACTIVE_STATUSES).update(
+            status='returned', return_date=today
+        )
+        if not won:
+            raise CirculationError("This book has already been returned.")
+        put_back_copies([issued.copy_id])
+
+        fine = None
+        if overdue_days > 0:
+            fine = Fine.objects.create(
+                issued_book=issued,
+                student_id=issued.student_id,
+                amount=amount,
+                overdue_days=overdue_days,
+                fine_per_day=fine_per_day,
+                status='unpaid',
+            )
+
+    issued.status, issued.return_date = 'returned', today
+    circulation_changed.send(sender=IssuedBook, action='return', issued=[issued])
+    return fine
+
+
+# ─────────────────────────────────────────
+# BATCH CHECKOUT / RETURN (desk scanner sessions)
+# ─────────────────────────────────────────
+
+def _resolve_books(codes):
+    """
+    Map each scanned code to ``(book, copy)``: a copy barcode gives that
+    copy, a book_id / ISBN gives ``(book, None)``.  One query each.
+    """
+    codes = {str(c).strip() for c in codes if c}
+    found = {}
+    for book in Book.objects.filter(Q(book_id__in=codes) | Q(isbn__in=codes)):
+        found[book.book_id] = found[book.isbn] = (book, None)
+    for copy in BookCopy.objects.filter(barcode__in=codes - set(found)).select_related('book'):
+        found[copy.barcode] = (copy.book, copy)
+    return found
+
+
+def _resolve_students(codes):
+    """Map each scanned username / membership ID to its student with one query."""
+    codes = {str(c).strip() for c in codes if c}
+    found = {}
+    for user in User.objects.filter(Q(username__in=codes) | Q(membership_id__in=codes), role='student'):
+        found[user.username] = user
+        if user.membership_id:
+            found[user.membership_id] = user
+    return found
+
+
+def batch_issue(scans, issued_by, due_date):
+    """
+    Issue many ``{'student': ..., 'book': ...}`` scans in one transaction.
+    ``book`` is a copy barcode, or a book ID / ISBN to take any shelf copy.
+
+    Lookups are set-based (one query each for students, books, shelf copies
+    and existing loans); the shelf copies are locked rather than the Book
+    rows, loans are inserted with ``bulk_create`` and the claimed copies
+    flipped with one UPDATE.  Returns one result dict per scan, in order.
+    """
+    students = _resolve_students(s.get('student') for s in scans)
+    books = _resolve_books(s.get('book') for s in scans)
+    results = [None] * len(scans)
+
+    with transaction.atomic():
+        book_pks = {book.pk for book, _ in books.values()}
+        shelf, barcodes = defaultdict(list), {}
+        for pk, book_id, barcode in (BookCopy.objects.select_for_update()
+                                     .filter(book__in=book_pks, state=BookCopy.AVAILABLE)
+                                     .order_by('pk').values_list('pk', 'book_id', 'barcode')):
+            shelf[book_id].append(pk)
+            barcodes[pk] = barcode
+        active = set(IssuedBook.objects.filter(
+            student__in={s.pk for s in students.values()}, book__in=book_pks,
+            status__in=ACTIVE_STATUSES,
+        ).values_list('student_id', 'book_id'))
+
+        to_create = []
+        for i, scan in enumerate(scans):
+            student = students.get(str(scan.get('student', '')).strip())
+            book, copy = books.get(str(scan.get('book', '')).strip(), (None, None))
+            if student is None:
+                results[i] = {'status': 'error', 'message': f"Unknown student '{scan.get('student')}'."}
+            elif book is None:
+                results[i] = {'status': 'error', 'message': f"Unknown book '{scan.get('book')}'."}
+            elif (student.pk, book.pk) in active:
+                results[i] = {'status': 'error',
+                              'message': f"{student.get_full_name() or student.username} already has '{book.title}' issued."}
+            elif copy is not None and copy.pk not in shelf[book.pk]:
+                results[i] = {'status': 'error', 'message': f"Copy '{copy.barcode}' is not on the shelf."}
+            elif not shelf[book.pk]:
+                results[i] = {'status': 'error', 'message': f"'{book.title}' has no available copies."}
+            else:
+                copy_id = copy.pk if copy is not None else shelf[book.pk][0]
+                shelf[book.pk].remove(copy_id)
+                active.add((student.pk, book.pk))
+                to_create.append((i, IssuedBook(student=student, book=book, copy_id=copy_id,
+                                                issued_by=issued_by, due_date=due_date)))
+
+        created = IssuedBook.objects.bulk_create([loan for i, loan in to_create])
+        if any(loan.pk is None for loan in created):    # backends without RETURNING (MySQL)
+            # Each claimed copy has exactly one active loan: the one just inserted
+            pks = dict(IssuedBook.objects.filter(copy__in=[loan.copy_id for loan in created],
+                                                 status__in=ACTIVE_STATUSES).values_list('copy_id', 'pk'))
+            for loan in created:
+                loan.pk = pks[loan.copy_id]
+        BookCopy.objects.filter(pk__in=[loan.copy_id for loan in created]).update(state=BookCopy.ON_LOAN)
+
+    for (i, _), loan in zip(to_create, created):
+        results[i] = {'status': 'issued', 'issued_id': loan.pk, 'book': loan.book.book_id,
+                      'copy': barcodes[loan.copy_id], 'student': loan.student.username,
+                      'due_date': str(loan.due_date)}
+    if created:
+        circulation_changed.send(sender=IssuedBook, action='issue', issued=created)
+    return results
+
+
+def batch_return(scans, fine_per_day, today=None):
+    """
+    Return many scanned books in one transaction. Each scan is ``{'book':
+    ...}``, a copy barcode or a book ID / ISBN, plus an optional
+    ``'student'`` to pick the loan when a title scan matches several.
+    """
+    today = today or timezone.now().date()
+    books = _resolve_books(s.get('book') for s in scans)
+    results = [None] * len(scans)
+
+    with transaction.atomic():
+        loans_by_book = defaultdict(list)
+        for loan in (IssuedBook.objects.select_for_update()
+                     .filter(book__in={book.pk for book, _ in books.values()}, status__in=ACTIVE_STATUSES)
+                     .select_related('student', 'book')
+                     .order_by('due_date', 'id')):
+            loans_by_book[loan.book_id].append(loan)
+
+        returned, fines = [], []
+        for i, scan in enumerate(scans):
+            book, copy = books.get(str(scan.get('book', '')).strip(), (None, None))
+            if book is None:
+                results[i] = {'status': 'error', 'message': f"Unknown book '{scan.get('book')}'."}
+                continue
+            candidates = loans_by_book[book.pk]
+            if copy is not None:
+                candidates = [l for l in candidates if l.copy_id == copy.pk]
+            who = str(scan.get('student') or '').strip()
+            if who:
+                candidates = [l for l in candidates if who in (l.student.username, l.student.membership_id)]
+            if not candidates:
+                what = f"Copy '{copy.barcode}'" if copy is not None else f"'{book.title}'"
+                results[i] = {'status': 'error', 'message': f"{what} is not issued{' to ' + who if who else ''}."}
+                continue
+            if len(candidates) > 1 and not who:
+                results[i] = {'status': 'error',
+                              'message': f"'{book.title}' is issued to {len(candidates)} students; "
+                                         f"scan the copy or the student too."}
+                continue
+
+            loan = candidates[0]
+            loans_by_book[book.pk].remove(loan)
+            overdue_days, amount = calculate_fine(loan, fine_per_day, today)
+            if overdue_days > 0:
+                fines.append(Fine(issued_book=loan, student_id=loan.student_id, amount=amount,
+                                  overdue_days=overdue_days, fine_per_day=fine_per_day, status='unpaid'))
+            returned.append(loan)
+            results[i] = {'status': 'returned', 'issued_id': loan.pk, 'book': book.book_id,
+                          'student': loan.student.username, 'fine': str(amount) if overdue_days else None}
+
+        IssuedBook.objects.filter(pk__in=[l.pk for l in returned]).update(status='returned', return_date=today)
+        Fine.objects.bulk_create(fines)
+        put_back_copies(loan.copy_id for loan in returned)
+
+    for loan in returned:
+        loan.status, loan.return_date = 'returned', today
+    if returned:
+        circulation_changed.send(sender=IssuedBook, action='return', issued=returned)
+    return results
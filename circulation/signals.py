@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from books import barcodes
+from . import policy
+from .models import FineSettings
+
+# Sent after issue/return writes that bypass model save() (conditional
+# UPDATEs in circulation/services.py).  Arguments: action, issued (list of
+# IssuedBook).
+circulation_changed = Signal()
+
+
+@receiver([post_save, post_delete], sender=FineSettings)
+def invalidate_loan_policy(sender, **kwargs):
+    # After the commit, or a worker could cache the old row under the new version
+    transaction.on_commit(policy.invalidate)
+
+
+@receiver(circulation_changed)
+def update_barcode_index(sender, issued, **kwargs):
+    # Copies were counted with UPDATEs that Book's own signals never see
+    barcodes.changed({loan.book_id for loan in issued})
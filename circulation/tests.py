@@ -1,3 +1,238 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from books import barcodes, copies
+from books.models import Book, BookCopy
+from . import policy, services
+from .models import Fine, FineSettings, IssuedBook, OverdueSweep
+from .overdue import sweep_overdue
+from .services import batch_issue, batch_return, issue_book, take_copy
+from .signals import circulation_changed
+
+
+class CirculationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = User.objects.create_user('desk', role='librarian')
+        cls.asha = User.objects.create_user('asha', role='student', membership_id='M-1')
+        cls.ravi = User.objects.create_user('ravi', role='student', membership_id='M-2')
+        cls.book = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593')
+        copies.add_copies(cls.book, 2)
+        cls.due = timezone.now().date() + timedelta(days=14)
+
+
+class LoanPolicyTests(TestCase):
+    def test_settings_change_is_published_after_commit(self):
+        cache.clear()
+        self.assertEqual(policy.get_policy(), policy.DEFAULT_POLICY)
+        version = policy.current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            FineSettings.objects.create(fine_per_day=Decimal('5.00'), loan_period_days=7)
+            self.assertEqual(policy.current_version(), version)
+            self.assertEqual(policy.get_policy(), policy.DEFAULT_POLICY)
+        self.assertEqual(policy.get_policy().fine_per_day, Decimal('5.00'))
+
+
+class TakeCopyTests(CirculationTestCase):
+    def test_moves_on_when_another_desk_claims_the_copy_first(self):
+        first, second = self.book.copies.order_by('pk').values_list('pk', flat=True)
+        claim = services._claim
+
+        def beaten_to_first(book_id, copy_id):
+            if copy_id == first:
+                BookCopy.objects.filter(pk=first).update(state=BookCopy.ON_LOAN)    # the other desk
+            return claim(book_id, copy_id)
+
+        with mock.patch.object(services, '_claim', beaten_to_first):
+            self.assertEqual(take_copy(self.book.pk), second)
+            self.assertIsNone(take_copy(self.book.pk))
+        self.assertEqual(self.book.copies.filter(state=BookCopy.ON_LOAN).count(), 2)
+
+    def test_scanned_copy_is_taken_only_once(self):
+        copy = self.book.copies.first()
+        self.assertEqual(take_copy(self.book.pk, copy.pk), copy.pk)
+        self.assertIsNone(take_copy(self.book.pk, copy.pk))
+
+
+class BatchIssueTests(CirculationTestCase):
+    def issue(self, scans):
+        sent = []
+        def receiver(sender, action, issued, **kwargs):
+            sent.extend(issued)
+        circulation_changed.connect(receiver)
+        try:
+            return batch_issue(scans, self.librarian, self.due), sent
+        finally:
+            circulation_changed.disconnect(receiver)
+
+    def test_results_carry_loan_pks_without_returning(self):
+        scans = [{'student': 'M-1', 'book': self.book.isbn}, {'student': 'ravi', 'book': self.book.book_id}]
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            results, sent = self.issue(scans)
+        loans = dict(IssuedBook.objects.values_list('student__username', 'pk'))
+        self.assertEqual([r['issued_id'] for r in results], [loans['asha'], loans['ravi']])
+        self.assertEqual(sorted(loan.pk for loan in sent), sorted(loans.values()))
+
+    def test_copy_and_title_scans(self):
+        second = self.book.copies.order_by('pk').last()
+        results, sent = self.issue([
+            {'student': 'asha', 'book': second.barcode},
+            {'student': 'ravi', 'book': second.barcode},
+            {'student': 'ravi', 'book': self.book.book_id},
+            {'student': 'ravi', 'book': self.book.isbn},
+        ])
+        self.assertEqual([r['status'] for r in results], ['issued', 'error', 'issued', 'error'])
+        self.assertEqual(results[0]['copy'], second.barcode)
+        self.assertIn('not on the shelf', results[1]['message'])
+        self.assertIn('already has', results[3]['message'])
+        self.assertEqual(dict(IssuedBook.objects.values_list('student__username', 'copy__barcode')),
+                         {'asha': second.barcode, 'ravi': f'{self.book.book_id}-001'})
+        self.assertFalse(self.book.copies.filter(state=BookCopy.AVAILABLE).exists())
+
+    def test_title_scan_with_no_copy_left(self):
+        self.book.copies.update(state=BookCopy.ON_LOAN)
+        results, sent = self.issue([{'student': 'asha', 'book': self.book.book_id}])
+        self.assertIn('no available copies', results[0]['message'])
+        self.assertEqual(sent, [])
+
+
+class BatchReturnTests(CirculationTestCase):
+    def setUp(self):
+        self.first, self.second = self.book.copies.order_by('pk')
+        self.asha_loan = issue_book(self.asha, self.book, self.librarian, self.due, copy=self.first)
+        self.ravi_loan = issue_book(self.ravi, self.book, self.librarian, self.due, copy=self.second)
+
+    def test_copy_scan_picks_the_loan(self):
+        results = batch_return([{'book': self.second.barcode}, {'book': self.second.barcode}], Decimal('2'))
+        self.assertEqual(results[0]['issued_id'], self.ravi_loan.pk)
+        self.assertIn('is not issued', results[1]['message'])
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.state, BookCopy.AVAILABLE)
+        self.assertEqual(IssuedBook.objects.get(pk=self.asha_loan.pk).status, 'issued')
+
+    def test_title_scan_needs_the_student_when_several_are_out(self):
+        late = self.due + timedelta(days=3)
+        results = batch_return([{'book': self.book.isbn}, {'book': self.book.book_id, 'student': 'M-1'}],
+                               Decimal('2'), today=late)
+        self.assertIn('scan the copy or the student', results[0]['message'])
+        self.assertEqual((results[1]['issued_id'], results[1]['fine']), (self.asha_loan.pk, '6'))
+        self.assertEqual(Fine.objects.get().issued_book_id, self.asha_loan.pk)
+        self.assertEqual(BookCopy.objects.get(pk=self.first.pk).state, BookCopy.AVAILABLE)
+
+
+class ScanTests(CirculationTestCase):
+    def setUp(self):
+        cache.clear()
+        barcodes._index = None
+        self.client.force_login(self.librarian)
+
+    def scan(self, code):
+        return self.client.get(reverse('circulation:scan'), {'code': code})
+
+    def test_copy_barcode_reports_the_copy_and_follows_its_state(self):
+        copy = self.book.copies.order_by('pk').first()
+        response = self.scan(copy.barcode.lower())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['copy'], copy.pk)
+        self.assertEqual(response.json()['state'], BookCopy.AVAILABLE)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            issue_book(self.asha, self.book, self.librarian, self.due, copy=copy)
+        result = self.scan(copy.barcode).json()
+        self.assertEqual((result['state'], result['available'], result['available_copies']),
+                         (BookCopy.ON_LOAN, False, 1))
+
+    def test_title_codes_and_unknown_codes(self):
+        result = self.scan(self.book.isbn.replace('-', '')).json()
+        self.assertEqual((result['book'], result['available_copies']), (self.book.pk, 2))
+        self.assertNotIn('copy', result)
+        self.assertEqual(self.scan(f'{self.book.book_id}-999').status_code, 404)
+
+
+class SweepOverdueTests(CirculationTestCase):
+    def test_flips_only_past_due_issued_loans_a_batch_at_a_time(self):
+        today = date(2026, 10, 18)
+
+        def loan(days_late, status='issued'):
+            return IssuedBook.objects.create(student=self.asha, book=self.book, status=status,
+                                             due_date=today - timedelta(days=days_late)).pk
+
+        late = [loan(days) for days in (1, 2, 3, 4, 5)]
+        current = [loan(0), loan(-3)]
+        returned = loan(7, 'returned')
+        overdue = loan(9, 'overdue')
+
+        with CaptureQueriesContext(connection) as ctx:
+            sweep = sweep_overdue(batch_size=2, today=today)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+
+        self.assertEqual((sweep.rows_updated, sweep.batches, sweep.watermark), (5, 3, today))
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(OverdueSweep.objects.get(), sweep)
+        statuses = dict(IssuedBook.objects.values_list('pk', 'status'))
+        self.assertEqual({pk: statuses[pk] for pk in late}, dict.fromkeys(late, 'overdue'))
+        self.assertEqual({pk: statuses[pk] for pk in current}, dict.fromkeys(current, 'issued'))
+        self.assertEqual((statuses[returned], statuses[overdue]), ('returned', 'overdue'))
+
+        self.assertEqual(sweep_overdue(batch_size=2, today=today).rows_updated, 0)
+
+
+class ExplodeCopiesMigrationTests(TransactionTestCase):
+    before = [('books', '0008_book_copies'), ('circulation', '0002_overdue_sweep')]
+    after = [('books', '0009_remove_book_copy_counters'), ('circulation', '0003_issuedbook_copy')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        executor.loader.build_graph()
+        # Models as of every migration now applied, not only the targets' ancestors
+        return executor.loader.project_state(list(executor.loader.applied_migrations)).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_forwards_and_backwards(self):
+        apps = self.migrate(self.before)
+        Book, IssuedBook = apps.get_model('books', 'Book'), apps.get_model('circulation', 'IssuedBook')
+        student = apps.get_model('accounts', 'User').objects.create(username='asha', role='student')
+        shelf = Book.objects.create(book_id='LIB-0001', title='Dune', author='Herbert', isbn='1',
+                                    total_copies=3, available_copies=2)
+        # The counters drifted: two loans out of a single counted copy
+        drifted = Book.objects.create(book_id='LIB-0002', title='Emma', author='Austen', isbn='2',
+                                      total_copies=1, available_copies=0)
+        Book.objects.create(book_id='LIB-0003', title='Ulysses', author='Joyce', isbn='3',
+                            total_copies=0, available_copies=0)
+        due = date(2026, 1, 31)
+        out = IssuedBook.objects.create(student=student, book=shelf, due_date=due)
+        back = IssuedBook.objects.create(student=student, book=shelf, due_date=due, status='returned')
+        overdue = [IssuedBook.objects.create(student=student, book=drifted, due_date=due, status=status)
+                   for status in ('issued', 'overdue')]
+
+        apps = self.migrate(self.after)
+        BookCopy, IssuedBook = apps.get_model('books', 'BookCopy'), apps.get_model('circulation', 'IssuedBook')
+        self.assertEqual(sorted(BookCopy.objects.values_list('barcode', 'state')), [
+            ('LIB-0001-001', 'on_loan'), ('LIB-0001-002', 'available'), ('LIB-0001-003', 'available'),
+            ('LIB-0002-001', 'on_loan'), ('LIB-0002-002', 'on_loan'),
+        ])
+        copies = dict(IssuedBook.objects.values_list('pk', 'copy__barcode'))
+        self.assertEqual(copies[out.pk], 'LIB-0001-001')
+        self.assertIsNone(copies[back.pk])
+        self.assertEqual(sorted(copies[loan.pk] for loan in overdue), ['LIB-0002-001', 'LIB-0002-002'])
+
+        apps = self.migrate(self.before)
+        self.assertEqual(sorted(apps.get_model('books', 'Book').objects.values_list(
+            'book_id', 'total_copies', 'available_copies')),
+            [('LIB-0001', 3, 2), ('LIB-0002', 2, 0), ('LIB-0003', 0, 0)])
+        self.assertFalse(apps.get_model('books', 'BookCopy').objects.exists())
@@ -5,9 +5,14 @@ app_name = 'circulation'
 
 urlpatterns = [
     path('issue/', views.issue_book, name='issue_book'),
+    path('autocomplete/students/', views.student_autocomplete, name='student_autocomplete'),
+    path('autocomplete/books/', views.book_autocomplete, name='book_autocomplete'),
     path('issued/', views.issued_list, name='issued_list'),
     path('issued/<int:pk>/', views.issued_book_detail, name='issued_book_detail'),
     path('return/<int:pk>/', views.return_book, name='return_book'),
+    path('scan/', views.scan, name='scan'),
+    path('batch/issue/', views.batch_issue, name='batch_issue'),
+    path('batch/return/', views.batch_return, name='batch_return'),
     path('fines/', views.fine_list, name='fine_list'),
     path('fines/<int:pk>/paid/', views.mark_fine_paid, name='mark_fine_paid'),
     path('fines/<int:pk>/waive/', views.waive_fine, name='waive_fine'),
@@ -1,12 +1,19 @@
+import json
+from datetime import date
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from django.utils import timezone
 from django.db.models import Q
-from decimal import Decimal
-from .models import IssuedBook, Fine, FineSettings
+from .models import IssuedBook, Fine
 from .forms import IssueBookForm
-from books.models import Book
+from .overdue import filter_by_status
+from .policy import get_policy
+from . import autocomplete, services
+from books import barcodes
+from books.models import Book, BookCopy
 from accounts.models import User
 
 
@@ -18,11 +25,6 @@ def log(user, action, desc, request=None):
         pass
 
 
-def get_fine_per_day():
-    settings = FineSettings.objects.first()
-    return settings.fine_per_day if settings else Decimal('2.00')
-
-
 @login_required
 def issue_book(request):
     if not (request.user.is_admin_user or request.user.is_librarian_user):
@@ -34,24 +36,13 @@ def issue_book(request):
         book = form.cleaned_data['book']
         student = form.cleaned_data['student']
 
-        already_issued = IssuedBook.objects.filter(
-            student=student, book=book, status__in=['issued', 'overdue']
-        ).exists()
-        if already_issued:
-            messages.error(request, f"{student.get_full_name()} already has '{book.title}' issued.")
+        try:
+            issued = services.issue_book(student, book, request.user,
+                                         form.cleaned_data['due_date'], form.cleaned_data['notes'])
+        except services.CirculationError as e:
+            messages.error(request, str(e))
             return render(request, 'circulation/issue_book.html', {'form': form})
 
-        if book.available_copies <= 0:
-            messages.error(request, f"'{book.title}' has no available copies.")
-            return render(request, 'circulation/issue_book.html', {'form': form})
-
-        issued = form.save(commit=False)
-        issued.issued_by = request.user
-        issued.save()
-
-        book.available_copies -= 1
-        book.save()
-
         log(request.user, 'book_issued',
             f'Issued "{book.title}" to {student.get_full_name()} (Due: {issued.due_date})', request)
 
@@ -61,18 +52,131 @@ def issue_book(request):
     return render(request, 'circulation/issue_book.html', {'form': form})
 
 
+def _autocomplete(request, search):
+    if not (request.user.is_admin_user or request.user.is_librarian_user):
+        return JsonResponse({'error': 'Permission denied.'}, status=403)
+    try:
+        limit = min(max(int(request.GET.get('limit', autocomplete.LIMIT)), 1), autocomplete.MAX_LIMIT)
+    except ValueError:
+        limit = autocomplete.LIMIT
+    return JsonResponse({'results': search(request.GET.get('q', ''), limit)})
+
+
+@login_required
+def student_autocomplete(request):
+    """``?q=`` prefix of a student's membership ID, username, first or last name."""
+    return _autocomplete(request, autocomplete.search_students)
+
+
+@login_required
+def book_autocomplete(request):
+    """``?q=`` prefix of an available book's book ID, ISBN or title."""
+    return _autocomplete(request, autocomplete.search_books)
+
+
+@login_required
+def scan(request):
+    """
+    Desk scanner lookup: ``?code=`` a copy barcode, book ID or ISBN,
+    answered from the in-process barcode index (books/barcodes.py) without a
+    catalog query.  A copy barcode also reports that copy and its state.
+    """
+    if not (request.user.is_admin_user or request.user.is_librarian_user):
+        return JsonResponse({'error': 'Permission denied.'}, status=403)
+    code = request.GET.get('code', '')
+    hit = barcodes.lookup(code)
+    if hit is None:
+        return JsonResponse({'code': code, 'error': 'Unknown barcode.'}, status=404)
+    result = {'code': code, 'book': hit.pk, 'book_id': hit.book_id, 'isbn': hit.isbn,
+              'available_copies': hit.available_copies, 'available': hit.available_copies > 0}
+    if hit.copy_id is not None:
+        result.update(copy=hit.copy_id, barcode=hit.barcode, state=hit.state,
+                      available=hit.state == BookCopy.AVAILABLE)
+    return JsonResponse(result)
+
+
+BATCH_MAX_SCANS = 200
+
+
+def _batch_payload(request):
+    """Parse a desk batch request body; returns (payload, error_response)."""
+    if not (request.user.is_admin_user or request.user.is_librarian_user):
+        return None, JsonResponse({'error': 'Permission denied.'}, status=403)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return None, JsonResponse({'error': 'Request body must be JSON.'}, status=400)
+    scans = payload.get('scans') if isinstance(payload, dict) else None
+    if not isinstance(scans, list) or not all(isinstance(s, dict) for s in scans):
+        return None, JsonResponse({'error': '"scans" must be a list of objects.'}, status=400)
+    if len(scans) > BATCH_MAX_SCANS:
+        return None, JsonResponse({'error': f'At most {BATCH_MAX_SCANS} scans per batch.'}, status=400)
+    return payload, None
+
+
+def _batch_response(results):
+    done = sum(1 for r in results if r['status'] != 'error')
+    return JsonResponse({'processed': done, 'failed': len(results) - done, 'results': results})
+
+
+@login_required
+@require_POST
+def batch_issue(request):
+    """
+    Desk scanner checkout: ``{"scans": [{"student": ..., "book": ...}], "due_date": "YYYY-MM-DD"}``.
+    Students are matched by username or membership ID; books by a copy barcode
+    (that copy is issued) or by book ID / ISBN (any copy on the shelf).
+    """
+    payload, error = _batch_payload(request)
+    if error:
+        return error
+    try:
+        due_date = (date.fromisoformat(payload['due_date']) if payload.get('due_date')
+                    else get_policy().due_date())
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid due_date.'}, status=400)
+
+    results = services.batch_issue(payload['scans'], request.user, due_date)
+    for r in results:
+        if r['status'] == 'issued':
+            log(request.user, 'book_issued',
+                f'Issued {r["book"]} to {r["student"]} (Due: {r["due_date"]}) [batch]', request)
+    return _batch_response(results)
+
+
+@login_required
+@require_POST
+def batch_return(request):
+    """
+    Desk scanner return: ``{"scans": [{"book": ..., "student": ...}]}``.
+    ``book`` is a copy barcode, or a book ID / ISBN plus ``student`` when
+    several copies of the title are out.
+    """
+    payload, error = _batch_payload(request)
+    if error:
+        return error
+
+    results = services.batch_return(payload['scans'], get_policy().fine_per_day)
+    for r in results:
+        if r['status'] == 'returned':
+            fine = f'Fine: ₹{r["fine"]}' if r['fine'] else 'No fine'
+            log(request.user, 'book_returned',
+                f'Returned {r["book"]} from {r["student"]} — {fine} [batch]', request)
+    return _batch_response(results)
+
+
 @login_required
 def issued_list(request):
     queryset = IssuedBook.objects.select_related('student', 'book', 'issued_by').all()
 
+    # Overdue flags are maintained by `manage.py sweep_overdue`; this page only reads
     today = timezone.now().date()
-    queryset.filter(status='issued', due_date__lt=today).update(status='overdue')
 
     status_filter = request.GET.get('status', '')
     search = request.GET.get('search', '')
 
     if status_filter:
-        queryset = queryset.filter(status=status_filter)
+        queryset = filter_by_status(queryset, status_filter, today)
     if search:
         queryset = queryset.filter(
             Q(student__first_name__icontains=search) |
@@ -103,27 +207,17 @@ def return_book(request, pk):
         return redirect('circulation:issued_list')
 
     today = timezone.now().date()
-    fine_per_day = get_fine_per_day()
-    overdue_days = max(0, (today - issued.due_date).days)
-    calculated_fine = Decimal(overdue_days) * fine_per_day
+    fine_per_day = get_policy().fine_per_day
+    overdue_days, calculated_fine = services.calculate_fine(issued, fine_per_day, today)
 
     if request.method == 'POST':
-        issued.return_date = today
-        issued.status = 'returned'
-        issued.save()
-
-        issued.book.available_copies += 1
-        issued.book.save()
-
-        if overdue_days > 0:
-            Fine.objects.create(
-                issued_book=issued,
-                student=issued.student,
-                amount=calculated_fine,
-                overdue_days=overdue_days,
-                fine_per_day=fine_per_day,
-                status='unpaid'
-            )
+        try:
+            fine = services.return_book(issued, fine_per_day, today)
+        except services.CirculationError as e:
+            messages.warning(request, str(e))
+            return redirect('circulation:issued_list')
+
+        if fine:
             log(request.user, 'book_returned',
                 f'Returned "{issued.book.title}" from {issued.student.get_full_name()} — Fine: ₹{calculated_fine}', request)
             messages.warning(request, f"Book returned! Fine of ₹{calculated_fine} applied for {overdue_days} overdue days.")
@@ -146,7 +240,7 @@ def return_book(request, pk):
 
 @login_required
 def issued_book_detail(request, pk):
-    issued = get_object_or_404(IssuedBook, pk=pk)
+    issued = get_object_or_404(IssuedBook.objects.select_related('copy'), pk=pk)
     fine = Fine.objects.filter(issued_book=issued).first()
     return render(request, 'circulation/issued_book_detail.html', {'issued': issued, 'fine': fine})
 
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from books.models import Book, BookCopy
+from circulation.models import IssuedBook, Fine
+from circulation.signals import circulation_changed
+from . import snapshot
+
+
+@receiver(circulation_changed)
+@receiver([post_save, post_delete], sender=IssuedBook)
+@receiver([post_save, post_delete], sender=Fine)
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=BookCopy)
+def invalidate_dashboard(sender, **kwargs):
+    snapshot.invalidate()
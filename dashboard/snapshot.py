@@ -0,0 +1,92 @@
+"""
+Dashboard metrics, computed with a handful of grouped/conditional aggregates
+and cached as a versioned snapshot.
+
+The snapshot key embeds a version number that is bumped whenever circulation
+data changes (see dashboard/signals.py), so a write makes the next page load
+recompute instead of waiting for the TTL to run out.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from accounts.models import User
+from books.models import Book, Category, has_available_copy
+from circulation.models import IssuedBook, Fine
+from circulation.overdue import issued_q, overdue_q
+
+VERSION_KEY = 'dashboard:snapshot:version'
+TOP_CATEGORIES = 8
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # key missing or evicted
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def compute_snapshot(today=None):
+    today = today or date.today()
+
+    books = Book.objects.aggregate(
+        total=Count('id'),
+        available=Count('id', filter=Q(has_available_copy())),
+    )
+    users = User.objects.aggregate(
+        total=Count('id'),
+        students=Count('id', filter=Q(role='student')),
+    )
+    issues = IssuedBook.objects.aggregate(
+        # Past-due loans the sweeper hasn't flipped yet count as overdue only
+        issued=Count('id', filter=issued_q(today)),
+        overdue=Count('id', filter=overdue_q(today)),
+        returned=Count('id', filter=Q(status='returned')),
+    )
+    fines = Fine.objects.filter(status='unpaid').aggregate(
+        count=Count('id'),
+        amount=Sum('amount'),
+    )
+    categories = list(
+        Category.objects.annotate(num_books=Count('book'))
+        .order_by('-num_books', 'name')
+        .values_list('name', 'num_books')[:TOP_CATEGORIES]
+    )
+
+    return {
+        'date': today,
+        'total_books': books['total'],
+        'total_available': books['available'],
+        'total_users': users['total'],
+        'total_students': users['students'],
+        'total_issued': issues['issued'],
+        'total_overdue': issues['overdue'],
+        'total_returned': issues['returned'],
+        'total_unpaid_fines': fines['count'],
+        'total_fine_amount': fines['amount'] or Decimal('0.00'),
+        'cat_labels': [name for name, count in categories],
+        'cat_counts': [count for name, count in categories],
+    }
+
+
+def get_snapshot():
+    today = date.today()
+    key = f'dashboard:snapshot:{current_version()}'
+    snapshot = cache.get(key)
+    # Overdue counts depend on the date, so a snapshot never outlives its day
+    if snapshot is None or snapshot['date'] != today:
+        snapshot = compute_snapshot(today)
+        cache.set(key, snapshot, timeout=settings.DASHBOARD_CACHE_TTL)
+    return snapshot
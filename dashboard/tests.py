@@ -1,3 +1,22 @@
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from books.models import Book
+from circulation.models import IssuedBook
+from .snapshot import compute_snapshot
+
+
+class SnapshotTests(TestCase):
+    def test_unswept_past_due_loan_is_counted_once(self):
+        today = date(2026, 10, 18)
+        student = User.objects.create_user('asha', role='student')
+        book = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593')
+        for due, status in [(today, 'issued'), (today - timedelta(days=1), 'issued'),
+                            (today - timedelta(days=9), 'overdue'), (today - timedelta(days=9), 'returned')]:
+            IssuedBook.objects.create(student=student, book=book, due_date=due, status=status)
+
+        snapshot = compute_snapshot(today)
+        self.assertEqual((snapshot['total_issued'], snapshot['total_overdue'], snapshot['total_returned']),
+                         (1, 2, 1))
@@ -5,4 +5,5 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('queries/', views.query_stats, name='query_stats'),
 ]
\ No newline at end of file
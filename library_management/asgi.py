@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
 
 application = get_asgi_application()
+
+# Load the circulation desk's barcode index before the first scan
+from books import barcodes  # noqa: E402
+
+barcodes.warm()
@@ -0,0 +1,190 @@
+"""
+Per-request query and latency instrumentation, on when
+``QUERY_INSTRUMENTATION = True``.
+
+While a request is handled, every database query passes through a
+``connection.execute_wrapper`` that times it and files it under a
+fingerprint: the SQL with literals and ``IN (...)`` lists collapsed, so one
+statement run with different parameters is one shape.  A shape repeated
+``QUERY_N_PLUS_ONE_THRESHOLD`` times or more in a single request is flagged
+as a suspected N+1, which is usually a template reaching through
+``loan.book`` or ``fine.student`` in a loop without ``select_related``.
+
+Each response gets an ``X-Query-Stats`` header and a ``Server-Timing``
+header (shown by browser dev tools).  The last
+``QUERY_INSTRUMENTATION_HISTORY`` requests are kept in memory, per process,
+for the admin summary page at ``/dashboard/queries/``.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN\s*\(\s*(?:%s|\?|[\d.]+|\'(?:[^\']|\'\')*\')(?:\s*,\s*(?:%s|\?|[\d.]+|\'(?:[^\']|\'\')*\'))*\s*\)', re.I)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """``sql`` with its literals replaced, so queries differing only in parameters match."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql.replace('%s', '?')).strip()
+
+
+@dataclass
+class RequestStats:
+    method: str
+    path: str
+    view: str
+    status: int = 0
+    queries: int = 0
+    duplicates: int = 0        # queries identical (SQL and parameters) to an earlier one
+    db_ms: float = 0.0
+    total_ms: float = 0.0
+    suspects: list = field(default_factory=list)     # [(fingerprint, times)] suspected N+1
+    at: float = field(default_factory=time.time)
+
+
+class QueryRecorder:
+    """An ``execute_wrapper`` collecting one request's queries."""
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.exact = Counter()
+        self.db_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.shapes[fingerprint(sql)] += 1
+            try:
+                self.exact[(sql, repr(params))] += 1
+            except Exception:       # parameters without a usable repr
+                pass
+
+    def fill(self, stats, threshold):
+        stats.queries = sum(self.shapes.values())
+        stats.duplicates = sum(n - 1 for n in self.exact.values())
+        stats.db_ms = self.db_seconds * 1000
+        stats.suspects = [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+# ─────────────────────────────────────────
+# ROLLING HISTORY
+# ─────────────────────────────────────────
+class History:
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.requests = deque(maxlen=size)
+
+    def add(self, stats):
+        with self.lock:
+            self.requests.append(stats)
+
+    def clear(self):
+        with self.lock:
+            self.requests.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.requests)
+
+    def summary(self):
+        """Per-view aggregates, busiest first, and N+1 suspects across requests."""
+        requests = self.snapshot()
+        by_view = defaultdict(list)
+        for stats in requests:
+            by_view[stats.view].append(stats)
+
+        views = []
+        for view, group in by_view.items():
+            times = sorted(s.total_ms for s in group)
+            views.append({
+                'view': view,
+                'requests': len(group),
+                'avg_ms': sum(times) / len(times),
+                'p95_ms': times[min(len(times) - 1, int(len(times) * 0.95))],
+                'max_ms': times[-1],
+                'avg_db_ms': sum(s.db_ms for s in group) / len(group),
+                'avg_queries': sum(s.queries for s in group) / len(group),
+                'max_queries': max(s.queries for s in group),
+                'flagged': sum(1 for s in group if s.suspects),
+                'total_ms': sum(times),
+            })
+        views.sort(key=lambda v: v['total_ms'], reverse=True)
+
+        suspects = {}
+        for stats in requests:
+            for shape, times in stats.suspects:
+                entry = suspects.setdefault((stats.view, shape), {
+                    'view': stats.view, 'fingerprint': shape, 'requests': 0, 'max_repeats': 0,
+                    'example': stats.path,
+                })
+                entry['requests'] += 1
+                entry['max_repeats'] = max(entry['max_repeats'], times)
+        return {
+            'requests': len(requests),
+            'views': views,
+            'suspects': sorted(suspects.values(), key=lambda e: (e['requests'], e['max_repeats']), reverse=True),
+            'recent': requests[::-1][:25],
+        }
+
+
+history = History(settings.QUERY_INSTRUMENTATION_HISTORY)
+
+
+# ─────────────────────────────────────────
+# MIDDLEWARE
+# ─────────────────────────────────────────
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        stats = RequestStats(
+            method=request.method, path=request.path,
+            view=(match.view_name or match._func_path) if match else request.path,
+            status=response.status_code,
+            total_ms=(time.perf_counter() - started) * 1000,
+        )
+        recorder.fill(stats, self.threshold)
+
+        response['X-Query-Stats'] = (
+            f'queries={stats.queries}; duplicates={stats.duplicates}; db_ms={stats.db_ms:.1f}; '
+            f'total_ms={stats.total_ms:.1f}; n_plus_one={len(stats.suspects)}'
+        )
+        response['Server-Timing'] = (f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries", '
+                                      f'total;dur={stats.total_ms:.1f}')
+        if stats.suspects:
+            shape, times = stats.suspects[0]
+            logger.warning("Suspected N+1 in %s %s: %d queries like %s",
+                           stats.method, stats.path, times, shape[:200])
+        history.add(stats)
+        return response
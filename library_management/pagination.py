@@ -0,0 +1,216 @@
+"""
+Keyset (cursor) pagination shared by the list views.
+
+Instead of OFFSET, each page remembers the ordering values of its last row and
+the next page asks for rows strictly "after" them.  With an index on the
+ordering columns every page costs the same as the first one.
+"""
+
+import base64
+import datetime
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts datetimes to milliseconds; a cursor needs every
+    # microsecond, or rows between the cut value and the real one are skipped
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, direction='next'):
+    payload = json.dumps({'v': values, 'd': direction}, cls=CursorEncoder,
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (values, direction) for a cursor token, or None if it is invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values, direction = data['v'], data['d']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return None
+    return values, direction
+
+
+def filter_querystring(request):
+    """The current query string minus the cursor, for building page links."""
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    return params.urlencode()
+
+
+def table_row_estimate(model, using='default'):
+    """
+    The database's own row estimate for ``model``'s table, or None where the
+    backend keeps none.  Free to read, but only approximate.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                           "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [table])
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+def estimate_count(queryset, cap=1000, unfiltered=False):
+    """
+    Return ``(count, exact)`` without a full COUNT(*) over large result sets.
+
+    An unfiltered queryset uses the table statistics; otherwise rows are
+    counted only up to ``cap``, so ``(cap, False)`` reads as "cap+".
+    """
+    if unfiltered:
+        estimate = table_row_estimate(queryset.model, queryset.db)
+        if estimate is not None and estimate > cap:
+            return estimate, False
+    counted = queryset.order_by().values('pk')[:cap + 1].count()
+    if counted > cap:
+        return cap, False
+    return counted, True
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` on ``ordering`` (e.g. ``('-timestamp', '-id')``).
+
+    The last ordering field must be unique (normally the primary key) so that
+    every row has a distinct position.
+    """
+
+    def __init__(self, queryset, ordering=('-id',), per_page=24):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [f.lstrip('-') for f in self.ordering]
+
+    def _row_values(self, obj):
+        concrete = {f.name: f.attname for f in obj._meta.concrete_fields}
+        # Annotations (e.g. a computed rank) are read off the instance as-is
+        return [getattr(obj, concrete.get(f, f)) for f in self.fields]
+
+    def _coerce(self, values):
+        """
+        The cursor's values as their fields' Python types, or None if any
+        does not parse: a cursor is user input and may have been edited.
+        """
+        model, annotations = self.queryset.model, self.queryset.query.annotations
+        coerced = []
+        for name, value in zip(self.fields, values):
+            if name in annotations:
+                field = annotations[name].output_field
+            else:
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except (ValueError, TypeError, ValidationError):
+                return None
+            if value is None:
+                return None
+            coerced.append(value)
+        return coerced
+
+    def _after(self, values, reverse):
+        # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), per field direction
+        clauses = []
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            equal = {self.fields[j]: values[j] for j in range(i)}
+            clauses.append(Q(**equal) & Q(**{lookup: values[i]}))
+        return reduce(lambda a, b: a | b, clauses)
+
+    def page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        if decoded and len(decoded[0]) != len(self.fields):
+            decoded = None
+        if decoded:
+            values = self._coerce(decoded[0])
+            decoded = (values, decoded[1]) if values is not None else None
+
+        reverse = bool(decoded) and decoded[1] == 'prev'
+        ordering = self.ordering
+        if reverse:
+            ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in ordering]
+
+        qs = self.queryset.order_by(*ordering)
+        if decoded:
+            qs = qs.filter(self._after(decoded[0], reverse))
+
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        # Going forward, "more" means a next page; going backward it means a
+        # previous one.  The other direction exists whenever we came from it.
+        if reverse:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, decoded is not None
+
+        next_cursor = prev_cursor = None
+        if rows:
+            if has_next:
+                next_cursor = encode_cursor(self._row_values(rows[-1]), 'next')
+            if has_prev:
+                prev_cursor = encode_cursor(self._row_values(rows[0]), 'prev')
+        return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+def keyset_chunks(queryset, ordering=('id',), chunk_size=1000):
+    """
+    Yield every row of ``queryset`` in ``ordering``, ``chunk_size`` rows per
+    query.  Unlike ``.iterator()``, memory stays bounded on MySQL too, whose
+    default client cursor buffers the whole result set.
+    """
+    paginator = KeysetPaginator(queryset, ordering=ordering, per_page=chunk_size)
+    page = paginator.page()
+    while True:
+        yield from page
+        if not page.has_next:
+            return
+        page = paginator.page(page.next_cursor)
@@ -2,6 +2,7 @@
 Django settings for library_management project.
 """
 
+import sys
 from pathlib import Path
 from decouple import config
 
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'library_management.instrumentation.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -95,6 +97,71 @@ DATABASES = {
 }
 
 
+# ==============================================================
+# CACHE
+# ==============================================================
+# Local memory is per process; point this at Redis/Memcached in production so
+# every worker shares cached snapshots and their version keys.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='library-cache'),
+    }
+}
+
+# Seconds a dashboard metrics snapshot is served before being recomputed
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=60, cast=int)
+
+
+# ==============================================================
+# CATALOG
+# ==============================================================
+# book_id numbers each process reserves at a time (see books/sequences.py)
+BOOK_ID_BLOCK_SIZE = config('BOOK_ID_BLOCK_SIZE', default=50, cast=int)
+# Where `manage.py build_similarity_index` writes the "similar titles" matrix
+SIMILARITY_INDEX_DIR = config('SIMILARITY_INDEX_DIR', default=str(BASE_DIR / 'var'))
+
+
+# ==============================================================
+# BACKGROUND REPORTS  (manage.py run_report_worker)
+# ==============================================================
+REPORT_WORKER_PROCESSES = config('REPORT_WORKER_PROCESSES', default=2, cast=int)
+REPORT_JOBS_PER_USER = config('REPORT_JOBS_PER_USER', default=2, cast=int)        # queued + running
+REPORT_JOB_TIMEOUT = config('REPORT_JOB_TIMEOUT', default=1800, cast=int)         # seconds
+REPORT_ARTIFACT_MAX_AGE_HOURS = config('REPORT_ARTIFACT_MAX_AGE_HOURS', default=24, cast=int)
+
+
+# ==============================================================
+# ACTIVITY LOG  (see activitylog/buffer.py)
+# ==============================================================
+# Buffer log entries and write them from a background thread. Tests write
+# synchronously so entries are visible inside the test transaction.
+ACTIVITY_LOG_ASYNC = config('ACTIVITY_LOG_ASYNC', default='test' not in sys.argv, cast=bool)
+ACTIVITY_LOG_BATCH_SIZE = config('ACTIVITY_LOG_BATCH_SIZE', default=100, cast=int)
+ACTIVITY_LOG_FLUSH_INTERVAL = config('ACTIVITY_LOG_FLUSH_INTERVAL', default=2.0, cast=float)   # seconds
+# Whole months kept in the database; older ones go to media/activitylog/archive/
+ACTIVITY_LOG_RETENTION_MONTHS = config('ACTIVITY_LOG_RETENTION_MONTHS', default=6, cast=int)
+
+
+# ==============================================================
+# THUMBNAILS  (see library_management/thumbnails.py)
+# ==============================================================
+# Render cover / profile picture sizes in worker processes after upload.
+# Tests render inline so the digest is set when save() returns.
+THUMBNAIL_ASYNC = config('THUMBNAIL_ASYNC', default='test' not in sys.argv, cast=bool)
+THUMBNAIL_WORKERS = config('THUMBNAIL_WORKERS', default=2, cast=int)
+
+
+# ==============================================================
+# QUERY INSTRUMENTATION  (see library_management/instrumentation.py)
+# ==============================================================
+# Time every request's queries, flag repeated query shapes as suspected
+# N+1s and keep a rolling summary for admins at /dashboard/queries/
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', default=False, cast=bool)
+QUERY_INSTRUMENTATION_HISTORY = config('QUERY_INSTRUMENTATION_HISTORY', default=500, cast=int)   # requests
+QUERY_N_PLUS_ONE_THRESHOLD = config('QUERY_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+
+
 # ==============================================================
 # CUSTOM USER MODEL
 # ==============================================================
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from activitylog.models import ActivityLog
+from library_management.pagination import KeysetPaginator, encode_cursor
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Closer together than a millisecond, two of them sharing a timestamp
+        start = timezone.now().replace(microsecond=500)
+        stamps = [start + timedelta(microseconds=100 * i) for i in range(10)] + [start + timedelta(microseconds=400)]
+        ActivityLog.objects.bulk_create(
+            ActivityLog(action='user_login', description=f'entry {i}', timestamp=ts) for i, ts in enumerate(stamps))
+        cls.expected = list(ActivityLog.objects.order_by('-timestamp', '-id').values_list('pk', flat=True))
+
+    def paginator(self):
+        return KeysetPaginator(ActivityLog.objects.all(), ordering=('-timestamp', '-id'), per_page=3)
+
+    def test_walks_every_row_forward_and_back(self):
+        pages, page = [], self.paginator().page()
+        pages.append(page)
+        while page.has_next:
+            page = self.paginator().page(page.next_cursor)
+            pages.append(page)
+        self.assertEqual([log.pk for p in pages for log in p], self.expected)
+
+        back = [pages[-1]]
+        while back[-1].has_previous:
+            back.append(self.paginator().page(back[-1].prev_cursor))
+        self.assertEqual([[log.pk for log in p] for p in reversed(back)],
+                         [[log.pk for log in p] for p in pages])
+
+    def test_edited_cursor_reads_as_the_first_page(self):
+        first = [log.pk for log in self.paginator().page()]
+        for values in (['x', 1], ['2026-01-01T00:00:00+00:00', 'y'], [None, 1], [[1], {}]):
+            with self.subTest(values=values):
+                page = self.paginator().page(encode_cursor(values))
+                self.assertEqual([log.pk for log in page], first)
+                self.assertFalse(page.has_previous)
+
+    def test_list_views_ignore_an_edited_cursor(self):
+        self.client.force_login(User.objects.create_user('admin', role='admin'))
+        cursor = encode_cursor(['x'])
+        for view in ('books:book_list', 'books:book_list_more', 'activitylog:activity_log_list'):
+            with self.subTest(view=view):
+                self.assertEqual(self.client.get(reverse(view), {'cursor': cursor}).status_code, 200)
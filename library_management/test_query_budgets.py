@@ -0,0 +1,167 @@
+"""
+Query-budget regression tests for every routed view.
+
+Each view in ``query_budgets.json`` is requested against the same synthetic
+dataset (benchmarks/data.py) at two sizes.  A view passes when
+
+* it makes the same number of queries at both sizes: the count must not
+  grow with the number of rows on the page or related to the object, and
+* that number is within its declared ``max_queries``.
+
+A failure lists the SQL fingerprints whose count grew between the sizes,
+which points straight at the per-row query (usually a missing
+``select_related`` / ``prefetch_related``).
+
+Budget entries::
+
+    "books:book_detail": {"max_queries": 9, "kwargs": {"pk": "book"}}
+    "circulation:my_books": {"max_queries": 6, "user": "student"}
+    "accounts:logout": {"skip": "ends the session"}
+
+``kwargs`` values name an object from ``fixture_objects()``; ``user`` is
+``admin`` (default), ``student`` or ``anonymous``; ``query`` is a query
+string as a dict; ``status`` is the expected response status (default 200).
+Every named URL outside the admin must appear in the file, so a new view
+cannot slip in without a budget.
+"""
+
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, TestCase, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+
+from benchmarks import data
+from books import similarity
+from library_management.instrumentation import fingerprint
+
+BUDGET_FILE = Path(__file__).with_name('query_budgets.json')
+
+SMALL = {'loans': 6, 'books': 6, 'students': 3, 'reservations': 4, 'reviews': 6, 'logs': 8, 'categories': 2}
+LARGE = {'loans': 60, 'books': 40, 'students': 12, 'reservations': 30, 'reviews': 60, 'logs': 80, 'categories': 8}
+
+
+def url_names(patterns=None, namespace=None):
+    """Every named, non-admin URL as ``namespace:name``."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace != 'admin':
+                yield from url_names(pattern.url_patterns, pattern.namespace or namespace)
+        elif pattern.name:
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+def fixture_objects():
+    """The objects budget ``kwargs`` can refer to: the busiest of each kind, so related rows grow with size."""
+    from accounts.models import User
+    from books.models import Book, BookCopy, Category
+    from circulation.models import Fine, IssuedBook
+    from reports.models import ReportJob
+    from reservation.models import Reservation
+    from reviews.models import Review
+
+    admin = User.objects.get(username='bench-admin')
+    book = Book.objects.annotate(n=Count('issued_records') + Count('reviews', distinct=True)).order_by('-n', 'pk')[0]
+    student = User.objects.filter(role='student').annotate(n=Count('issued_books')).order_by('-n', 'pk')[0]
+    # Reserving is only offered for books with no copy on the shelf
+    unavailable = Book.objects.annotate(n=Count('reservations')).order_by('-n', 'pk')[0]
+    BookCopy.objects.filter(book=unavailable, state=BookCopy.AVAILABLE).update(state=BookCopy.WITHDRAWN)
+    loan = (IssuedBook.objects.filter(status__in=['issued', 'overdue']).order_by('pk').first()
+            or IssuedBook.objects.order_by('pk').first())
+    return {
+        'admin': admin,
+        'student': student,
+        'book': book,
+        'unavailable_book': unavailable,
+        'category': Category.objects.annotate(n=Count('book')).order_by('-n', 'pk')[0],
+        'loan': loan,
+        'fine': Fine.objects.order_by('pk').first(),
+        'reservation': Reservation.objects.order_by('pk').first(),
+        'review': Review.objects.filter(book=book).order_by('pk').first() or Review.objects.order_by('pk').first(),
+        'report_job': ReportJob.objects.create(user=admin, kind=ReportJob.KIND_CHOICES[0][0]),
+    }
+
+
+class ShapeRecorder:
+    def __init__(self):
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.shapes[fingerprint(sql)] += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetTests(TestCase):
+    budgets = json.loads(BUDGET_FILE.read_text())
+
+    @classmethod
+    def measure(cls, counts):
+        """``{view: (status, Counter of query shapes)}`` for every budgeted view at one size."""
+        results = {}
+        with transaction.atomic():
+            data.generate(counts['loans'], counts=counts, history_days=40, progress=lambda *a: None)
+            similarity.build()
+            objects = fixture_objects()
+            clients = {'anonymous': Client()}
+            for role in ('admin', 'student'):
+                clients[role] = Client()
+                clients[role].force_login(objects[role])
+
+            for view, budget in cls.budgets.items():
+                if 'skip' in budget:
+                    continue
+                url = reverse(view, kwargs={k: objects[v].pk for k, v in budget.get('kwargs', {}).items()})
+                if 'query' in budget:
+                    url += '?' + urlencode(budget['query'])
+                client = clients[budget.get('user', 'admin')]
+                client.get(url)             # warm per-process caches (content types, policy, ...)
+                cache.clear()               # ... but measure without the shared cache's help
+                recorder = ShapeRecorder()
+                with connection.execute_wrapper(recorder):
+                    response = client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                results[view] = (response.status_code, recorder.shapes)
+            transaction.set_rollback(True)
+        return results
+
+    @classmethod
+    def setUpTestData(cls):
+        # The similar-titles index is a file: build one per dataset in a scratch directory
+        scratch = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(SIMILARITY_INDEX_DIR=scratch))
+        cls.small = cls.measure(SMALL)
+        cls.large = cls.measure(LARGE)
+
+    def test_every_view_has_a_budget(self):
+        missing = sorted(set(url_names()) - set(self.budgets))
+        self.assertFalse(missing, f"Add these views to {BUDGET_FILE.name}: {', '.join(missing)}")
+        unknown = sorted(set(self.budgets) - set(url_names()))
+        self.assertFalse(unknown, f"{BUDGET_FILE.name} lists views that no longer exist: {', '.join(unknown)}")
+
+    def test_query_counts(self):
+        for view, budget in self.budgets.items():
+            if 'skip' in budget:
+                continue
+            with self.subTest(view=view):
+                (small_status, small), (large_status, large) = self.small[view], self.large[view]
+                expected = budget.get('status', 200)
+                self.assertEqual((small_status, large_status), (expected, expected), f'{view} status')
+
+                small_total, large_total = sum(small.values()), sum(large.values())
+                if large_total != small_total:
+                    grew = [f'  {small[shape]} -> {n}x  {shape[:300]}'
+                            for shape, n in large.most_common() if n > small[shape]]
+                    self.fail(f'{view}: {small_total} queries with the small dataset but {large_total} '
+                              f'with the large one. Per-row queries:\n' + '\n'.join(grew))
+                self.assertLessEqual(
+                    large_total, budget['max_queries'],
+                    f"{view} makes {large_total} queries, over its budget of {budget['max_queries']}:\n"
+                    + '\n'.join(f'  {n}x  {shape[:300]}' for shape, n in large.most_common()),
+                )
@@ -0,0 +1,194 @@
+"""
+Pre-rendered thumbnails for uploaded images (book covers, profile pictures).
+
+Originals are kept as uploaded, but list pages should never serve them.
+After an upload is saved, a pool of worker processes decodes it once with
+Pillow and writes each configured width as WebP and JPEG under
+``MEDIA_ROOT/thumbs/``.  Files are named after a hash of the source bytes
+(``thumbs/3f/3fa41c…-320.webp``), so a name never changes meaning, can be
+cached forever, and re-uploading the same picture reuses the files.
+
+The hash is written to the row (e.g. ``Book.cover_digest``) only once every
+derivative exists, so templates never point at a missing file; until then
+``{% thumbnail %}`` falls back to the original.  Existing media is handled
+by ``manage.py build_thumbnails``.
+
+Models opt in with ``watch(Model, 'image_field', 'digest_field', widths)``
+from their app's signals module.  Derivatives are written next to the
+originals, so this assumes local file storage.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_save, pre_save
+
+logger = logging.getLogger(__name__)
+
+# (extension, MIME type, Pillow format, save options); the first is preferred
+FORMATS = (
+    ('webp', 'image/webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'image/jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+DIGEST_LENGTH = 20
+
+
+class Spec(NamedTuple):
+    model: type
+    field: str
+    digest_field: str
+    widths: tuple
+
+
+SPECS = {}      # (model label, field name) → Spec
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def thumb_name(digest, width, ext):
+    """Storage name of one derivative, relative to MEDIA_ROOT."""
+    return f'thumbs/{digest[:2]}/{digest}-{width}.{ext}'
+
+
+# ─────────────────────────────────────────
+# RENDERING (runs in the worker processes; no Django or database access)
+# ─────────────────────────────────────────
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+
+def render(source, media_root, widths):
+    """Write every derivative of ``source`` that is missing; returns the content digest."""
+    from PIL import Image, ImageOps
+
+    digest = file_digest(source)
+    wanted = [w for w in widths
+              if not all(os.path.exists(os.path.join(media_root, thumb_name(digest, w, ext)))
+                         for ext, *_ in FORMATS)]
+    if not wanted:
+        return digest
+
+    with Image.open(source) as original:
+        # JPEG sources decode straight at a reduced scale (1/2 … 1/8), which
+        # is most of the saving for large camera images
+        largest = max(wanted)
+        if original.width > largest:
+            original.draft('RGB', (largest, round(original.height * largest / original.width)))
+        img = ImageOps.exif_transpose(original)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info else 'RGB')
+
+        # Largest first, each size scaled down from the previous one
+        for width in sorted(wanted, reverse=True):
+            img.thumbnail((width, width * 4), Image.LANCZOS)
+            flat = img
+            if img.mode == 'RGBA':
+                flat = Image.new('RGB', img.size, 'white')
+                flat.paste(img, mask=img.getchannel('A'))
+            for ext, _, pil_format, options in FORMATS:
+                path = os.path.join(media_root, thumb_name(digest, width, ext))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                (img if pil_format == 'WEBP' else flat).save(tmp, pil_format, **options)
+                os.replace(tmp, path)
+    return digest
+
+
+# ─────────────────────────────────────────
+# SCHEDULING
+# ─────────────────────────────────────────
+def get_pool():
+    """The process-wide worker pool, recreated after a fork."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # Spawned, not forked: the web process has threads and open
+            # database connections that a forked child must not inherit
+            _pool = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def record(spec, pk, name, digest):
+    """Store ``digest`` on the row, unless its image has been replaced meanwhile."""
+    return spec.model._default_manager.filter(pk=pk, **{spec.field: name}).update(
+        **{spec.digest_field: digest}
+    )
+
+
+def _store(spec, pk, name, get_digest):
+    try:
+        record(spec, pk, name, get_digest())
+    except Exception:
+        # Not fatal: pages keep serving the original
+        logger.exception("Could not render thumbnails for %s %s (%s)", spec.model.__name__, pk, name)
+
+
+def _finished(spec, pk, name, future):
+    try:
+        _store(spec, pk, name, future.result)
+    finally:
+        connections.close_all()     # this runs on the pool's own thread
+
+
+def generate(spec, pk, name, source):
+    if settings.THUMBNAIL_ASYNC:
+        future = get_pool().submit(render, source, str(settings.MEDIA_ROOT), spec.widths)
+        future.add_done_callback(partial(_finished, spec, pk, name))
+    else:
+        _store(spec, pk, name, partial(render, source, str(settings.MEDIA_ROOT), spec.widths))
+
+
+def watch(model, field, digest_field, widths):
+    """Render thumbnails for ``model.field`` whenever a new image is uploaded."""
+    spec = Spec(model, field, digest_field, tuple(sorted(widths)))
+    SPECS[(model._meta.label, field)] = spec
+
+    def before_save(sender, instance, **kwargs):
+        image = getattr(instance, field)
+        changed = not image or not image._committed      # cleared, or a fresh upload
+        instance._thumbnail_pending = bool(image) and changed
+        if changed:
+            setattr(instance, digest_field, '')
+
+    def after_save(sender, instance, update_fields=None, **kwargs):
+        if getattr(instance, '_thumbnail_pending', False):
+            instance._thumbnail_pending = False
+            image = getattr(instance, field)
+            transaction.on_commit(partial(generate, spec, instance.pk, image.name, image.path))
+
+    uid = f'thumbnails:{model._meta.label}.{field}'
+    pre_save.connect(before_save, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(after_save, sender=model, weak=False, dispatch_uid=uid)
+    return spec
+
+
+# ─────────────────────────────────────────
+# LOOKUP (used by the template tags)
+# ─────────────────────────────────────────
+def spec_for(image):
+    return SPECS.get((image.instance._meta.label, image.field.name))
+
+
+def variants(image):
+    """``[(ext, mime, [(url, width), ...])]`` for a FieldFile, or [] if not rendered yet."""
+    spec = spec_for(image) if image else None
+    digest = getattr(image.instance, spec.digest_field, '') if spec else ''
+    if not digest:
+        return []
+    return [(ext, mime, [(settings.MEDIA_URL + thumb_name(digest, w, ext), w) for w in spec.widths])
+            for ext, mime, *_ in FORMATS]
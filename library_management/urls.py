@@ -13,4 +13,5 @@ urlpatterns = [
     path('reports/', include('reports.urls')),
     path('reservation/', include('reservation.urls')),
     path('reviews/', include('reviews.urls')),
+    path('activity/', include('activitylog.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,337 @@
+"""
+Report builders shared by the download views and the background job worker.
+
+Every builder has the signature ``build(out, params)`` and writes the finished
+file into the binary file object ``out``.  ``EXPORTS`` maps a report kind to
+its builder and download metadata.
+"""
+
+from datetime import date
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+from reportlab.lib.enums import TA_CENTER
+
+from circulation.models import IssuedBook, Fine
+from circulation.overdue import overdue_q
+from circulation.policy import get_policy
+from books.models import Book
+from library_management.pagination import keyset_chunks
+
+
+# ─────────────────────────────────────────
+# EXCEL EXPORTS
+# ─────────────────────────────────────────
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_CONTENT_TYPE = 'application/pdf'
+EXPORT_CHUNK_SIZE = 2000            # rows fetched per query
+
+
+def add_named_styles(wb, fill_color, alt_color):
+    """Register the few styles every cell shares instead of styling each cell."""
+    center = Alignment(horizontal="center", vertical="center")
+    wb.add_named_style(NamedStyle(name='report_title', font=Font(bold=True, size=14, color="1a56db"),
+                                  alignment=center))
+    wb.add_named_style(NamedStyle(name='report_date', font=Font(italic=True, color="666666"),
+                                  alignment=Alignment(horizontal="center")))
+    wb.add_named_style(NamedStyle(name='report_header', font=Font(bold=True, color="FFFFFF", size=11),
+                                  fill=PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid"),
+                                  alignment=center))
+    wb.add_named_style(NamedStyle(name='report_row', alignment=Alignment(horizontal="center")))
+    wb.add_named_style(NamedStyle(name='report_row_alt', alignment=Alignment(horizontal="center"),
+                                  fill=PatternFill(start_color=alt_color, end_color=alt_color, fill_type="solid")))
+
+
+def styled_row(ws, values, style):
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        cells.append(cell)
+    return cells
+
+
+def write_excel(out, sheet_title, title, headers, col_widths, rows,
+                fill_color="1a56db", alt_color="EEF2FF"):
+    """
+    Build the report with openpyxl's write-only workbook, which flushes rows
+    to disk as they are appended, and save it into ``out``.
+
+    ``rows`` is an iterable of row value lists; it is consumed lazily so the
+    queryset behind it should be read with ``keyset_chunks()``.
+    """
+    num_cols = len(headers)
+    wb = openpyxl.Workbook(write_only=True)
+    add_named_styles(wb, fill_color, alt_color)
+    ws = wb.create_sheet(sheet_title)
+
+    for i, width in enumerate(col_widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    last_col = get_column_letter(num_cols)
+    ws.merged_cells.add(f"A1:{last_col}1")
+    ws.merged_cells.add(f"A2:{last_col}2")
+    ws.row_dimensions[1].height = 30
+
+    ws.append(styled_row(ws, [title], 'report_title'))
+    ws.append(styled_row(ws, [f"Generated on: {date.today().strftime('%d %B %Y')}"], 'report_date'))
+    ws.append(styled_row(ws, headers, 'report_header'))
+    for i, values in enumerate(rows, 1):
+        ws.append(styled_row(ws, values, 'report_row_alt' if i % 2 == 0 else 'report_row'))
+
+    wb.save(out)
+
+
+def issued_excel_rows(queryset):
+    for i, item in enumerate(keyset_chunks(queryset, ('-id',), EXPORT_CHUNK_SIZE), 1):
+        yield [
+            i,
+            item.student.get_full_name(),
+            item.book.title,
+            item.book.book_id,
+            item.issue_date.strftime('%d-%m-%Y') if item.issue_date else '',
+            item.due_date.strftime('%d-%m-%Y') if item.due_date else '',
+            item.return_date.strftime('%d-%m-%Y') if item.return_date else 'Not Returned',
+            item.get_status_display(),
+        ]
+
+
+def build_issued_excel(out, params):
+    status_filter = params.get('status', '')
+    queryset = IssuedBook.objects.select_related('student', 'book').all()
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    write_excel(
+        out, "Issued Books",
+        "Library Management System — Issued Books Report",
+        ["#", "Student Name", "Book Title", "Book ID", "Issue Date", "Due Date", "Return Date", "Status"],
+        [5, 22, 30, 12, 14, 14, 14, 12],
+        issued_excel_rows(queryset),
+    )
+
+
+def fines_excel_rows(queryset):
+    for i, fine in enumerate(keyset_chunks(queryset, ('-id',), EXPORT_CHUNK_SIZE), 1):
+        yield [
+            i,
+            fine.student.get_full_name(),
+            fine.issued_book.book.title,
+            fine.overdue_days,
+            float(fine.fine_per_day),
+            float(fine.amount),
+            fine.get_status_display(),
+        ]
+
+
+def build_fines_excel(out, params):
+    fines = Fine.objects.select_related('student', 'issued_book__book').all()
+
+    write_excel(
+        out, "Fines Report",
+        "Library Management System — Fines Report",
+        ["#", "Student Name", "Book Title", "Overdue Days", "Fine/Day (₹)", "Total Fine (₹)", "Status"],
+        [5, 22, 30, 14, 14, 16, 12],
+        fines_excel_rows(fines),
+        fill_color="c0392b", alt_color="FDEDEC",
+    )
+
+
+def books_excel_rows(queryset):
+    for i, book in enumerate(keyset_chunks(queryset, ('id',), EXPORT_CHUNK_SIZE), 1):
+        yield [
+            i,
+            book.book_id,
+            book.title,
+            book.author,
+            book.category.name if book.category else '—',
+            book.total_copies,
+            book.available_copies,
+            book.rack_number or '—',
+        ]
+
+
+def build_books_excel(out, params):
+    books = Book.objects.select_related('category').with_copies()
+
+    write_excel(
+        out, "Books",
+        "Library Management System — Books Catalog",
+        ["#", "Book ID", "Title", "Author", "Category", "Total Copies", "Available", "Rack No."],
+        [5, 12, 35, 22, 16, 14, 12, 10],
+        books_excel_rows(books),
+        fill_color="1e8449", alt_color="EAFAF1",
+    )
+
+
+# ─────────────────────────────────────────
+# PDF EXPORTS
+# ─────────────────────────────────────────
+
+def get_pdf_styles():
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Title'],
+                                  fontSize=18, textColor=colors.HexColor('#1a56db'),
+                                  spaceAfter=4, alignment=TA_CENTER)
+    subtitle_style = ParagraphStyle('Subtitle', parent=styles['Normal'],
+                                     fontSize=10, textColor=colors.grey,
+                                     spaceAfter=20, alignment=TA_CENTER)
+    return title_style, subtitle_style
+
+
+def build_issued_pdf(out, params):
+    doc = SimpleDocTemplate(out, pagesize=landscape(A4),
+                             rightMargin=1.5*cm, leftMargin=1.5*cm,
+                             topMargin=1.5*cm, bottomMargin=1.5*cm)
+
+    title_style, subtitle_style = get_pdf_styles()
+    elements = []
+    elements.append(Paragraph("Library Management System", title_style))
+    elements.append(Paragraph(f"Issued Books Report — {date.today().strftime('%d %B %Y')}", subtitle_style))
+
+    headers = ["#", "Student", "Book Title", "Book ID", "Issue Date", "Due Date", "Return Date", "Status"]
+    data = [headers]
+
+    queryset = IssuedBook.objects.select_related('student', 'book').all()
+    for i, item in enumerate(queryset, 1):
+        data.append([
+            str(i),
+            item.student.get_full_name(),
+            item.book.title[:35],
+            item.book.book_id,
+            item.issue_date.strftime('%d-%m-%Y') if item.issue_date else '',
+            item.due_date.strftime('%d-%m-%Y') if item.due_date else '',
+            item.return_date.strftime('%d-%m-%Y') if item.return_date else 'Pending',
+            item.get_status_display(),
+        ])
+
+    table = Table(data, colWidths=[1*cm, 4.5*cm, 6*cm, 2.5*cm, 2.8*cm, 2.8*cm, 2.8*cm, 2.5*cm])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#1a56db')),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 10),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#EEF2FF')]),
+        ('FONTSIZE', (0,1), (-1,-1), 9),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor('#dee2e6')),
+        ('ROWHEIGHT', (0,0), (-1,-1), 22),
+        ('TOPPADDING', (0,0), (-1,-1), 6),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 6),
+    ]))
+    elements.append(table)
+
+    doc.build(elements)
+
+
+def build_fines_pdf(out, params):
+    doc = SimpleDocTemplate(out, pagesize=A4,
+                             rightMargin=1.5*cm, leftMargin=1.5*cm,
+                             topMargin=1.5*cm, bottomMargin=1.5*cm)
+
+    title_style, subtitle_style = get_pdf_styles()
+    elements = []
+    elements.append(Paragraph("Library Management System", title_style))
+    elements.append(Paragraph(f"Fines Report — {date.today().strftime('%d %B %Y')}", subtitle_style))
+
+    headers = ["#", "Student", "Book", "Overdue Days", "Fine/Day", "Total Fine", "Status"]
+    data = [headers]
+
+    fines = Fine.objects.select_related('student', 'issued_book__book').all()
+    total_unpaid = sum(f.amount for f in fines if f.status == 'unpaid')
+
+    for i, fine in enumerate(fines, 1):
+        data.append([
+            str(i),
+            fine.student.get_full_name(),
+            fine.issued_book.book.title[:30],
+            str(fine.overdue_days),
+            f"Rs.{fine.fine_per_day}",
+            f"Rs.{fine.amount}",
+            fine.get_status_display(),
+        ])
+
+    data.append(['', '', '', '', '', f"Total Unpaid: Rs.{total_unpaid}", ''])
+
+    table = Table(data, colWidths=[1*cm, 5*cm, 5.5*cm, 3*cm, 2.5*cm, 3.5*cm, 2.5*cm])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#c0392b')),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 10),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0,1), (-1,-2), [colors.white, colors.HexColor('#FDEDEC')]),
+        ('FONTSIZE', (0,1), (-1,-1), 9),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor('#dee2e6')),
+        ('ROWHEIGHT', (0,0), (-1,-1), 22),
+        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0,-1), (-1,-1), colors.HexColor('#FDEDEC')),
+    ]))
+    elements.append(table)
+
+    doc.build(elements)
+
+
+def build_overdue_pdf(out, params):
+    doc = SimpleDocTemplate(out, pagesize=landscape(A4),
+                             rightMargin=1.5*cm, leftMargin=1.5*cm,
+                             topMargin=1.5*cm, bottomMargin=1.5*cm)
+
+    title_style, subtitle_style = get_pdf_styles()
+    elements = []
+    elements.append(Paragraph("Library Management System", title_style))
+    elements.append(Paragraph(f"Overdue Books Report — {date.today().strftime('%d %B %Y')}", subtitle_style))
+
+    headers = ["#", "Student", "Contact", "Book Title", "Book ID", "Due Date", "Days Overdue", "Est. Fine"]
+    data = [headers]
+
+    fine_per_day = get_policy().fine_per_day
+    overdue = IssuedBook.objects.filter(overdue_q()).select_related('student', 'book')
+    for i, item in enumerate(overdue, 1):
+        data.append([
+            str(i),
+            item.student.get_full_name(),
+            item.student.phone or '—',
+            item.book.title[:35],
+            item.book.book_id,
+            item.due_date.strftime('%d-%m-%Y'),
+            str(item.overdue_days),
+            f"Rs.{item.overdue_days * fine_per_day}",
+        ])
+
+    table = Table(data, colWidths=[1*cm, 4.5*cm, 3*cm, 6*cm, 2.5*cm, 3*cm, 3*cm, 2.5*cm])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#e67e22')),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 10),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#FEF9E7')]),
+        ('FONTSIZE', (0,1), (-1,-1), 9),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor('#dee2e6')),
+        ('ROWHEIGHT', (0,0), (-1,-1), 22),
+    ]))
+    elements.append(table)
+
+    doc.build(elements)
+
+
+# Report kind → download name, content type and builder (kinds match ReportJob.KIND_CHOICES)
+EXPORTS = {
+    'issued_excel': {'filename': 'issued_books_report.xlsx', 'content_type': XLSX_CONTENT_TYPE, 'build': build_issued_excel},
+    'fines_excel':  {'filename': 'fines_report.xlsx',        'content_type': XLSX_CONTENT_TYPE, 'build': build_fines_excel},
+    'books_excel':  {'filename': 'books_catalog.xlsx',       'content_type': XLSX_CONTENT_TYPE, 'build': build_books_excel},
+    'issued_pdf':   {'filename': 'issued_books_report.pdf',  'content_type': PDF_CONTENT_TYPE,  'build': build_issued_pdf},
+    'fines_pdf':    {'filename': 'fines_report.pdf',         'content_type': PDF_CONTENT_TYPE,  'build': build_fines_pdf},
+    'overdue_pdf':  {'filename': 'overdue_report.pdf',       'content_type': PDF_CONTENT_TYPE,  'build': build_overdue_pdf},
+}
@@ -0,0 +1,121 @@
+"""
+Background report jobs.
+
+Staff enqueue a ``ReportJob``; ``manage.py run_report_worker`` claims queued
+jobs and renders them in a local process pool, saving the file to media
+storage.  No external broker: the ``reports_reportjob`` table is the queue.
+"""
+
+import os
+import traceback
+from datetime import timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .exports import EXPORTS
+from .models import ReportJob
+
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+def enqueue(user, kind, params=None):
+    if kind not in EXPORTS:
+        raise ValueError(f"Unknown report kind: {kind}")
+
+    with transaction.atomic():
+        # Lock the user's row so two concurrent requests can't both pass the
+        # count below and go over the limit
+        get_user_model().objects.select_for_update().filter(pk=user.pk).exists()
+        active = ReportJob.objects.filter(user=user, status__in=ReportJob.ACTIVE_STATUSES).count()
+        if active >= settings.REPORT_JOBS_PER_USER:
+            raise JobLimitExceeded(
+                f"You already have {active} report(s) in progress. Please wait for them to finish."
+            )
+        return ReportJob.objects.create(user=user, kind=kind, params=params or {})
+
+
+def claim_jobs(limit):
+    """
+    Atomically move up to ``limit`` queued jobs to running and return their ids.
+
+    The claim is a conditional UPDATE, so two workers racing for the same job
+    can't both win and no row lock is held while the report renders.
+    """
+    claimed = []
+    candidates = (ReportJob.objects.filter(status='queued')
+                  .order_by('created_at')
+                  .values_list('pk', flat=True)[:limit * 2])
+    for pk in candidates:
+        if len(claimed) >= limit:
+            break
+        won = ReportJob.objects.filter(pk=pk, status='queued').update(
+            status='running', started_at=timezone.now()
+        )
+        if won:
+            claimed.append(pk)
+    return claimed
+
+
+def run_job(job_id):
+    """Render one claimed job. Runs inside a worker process (see reports/worker.py)."""
+    close_old_connections()
+    job = ReportJob.objects.get(pk=job_id)
+    spec = EXPORTS[job.kind]
+    try:
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            spec['build'](spool, job.params)
+            spool.seek(0)
+            name, ext = os.path.splitext(spec['filename'])
+            job.file.save(f"{name}_{job.pk}{ext}", File(spool), save=False)
+        finished = {'status': 'done', 'file': job.file.name}
+    except Exception:
+        finished = {'status': 'failed', 'error': traceback.format_exc(limit=5)}
+    # Only a job that is still ours: cleanup() may have failed it as timed
+    # out while it rendered, and that verdict stands
+    won = ReportJob.objects.filter(pk=job.pk, status='running').update(finished_at=timezone.now(), **finished)
+    if not won and job.file:
+        job.file.delete(save=False)
+    close_old_connections()
+    return finished['status'] if won else 'failed (timed out)'
+
+
+def mark_failed(job_id, error):
+    ReportJob.objects.filter(pk=job_id, status='running').update(
+        status='failed', error=error, finished_at=timezone.now()
+    )
+
+
+def cleanup(now=None):
+    """
+    Delete finished jobs (and their files) older than the retention window and
+    fail jobs stuck in "running" because their worker died.
+    Returns ``(deleted, failed)``.
+    """
+    now = now or timezone.now()
+
+    stale = ReportJob.objects.filter(
+        status='running',
+        started_at__lt=now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT),
+    )
+    failed = stale.update(status='failed', error='Worker timed out.', finished_at=now)
+
+    expired = ReportJob.objects.filter(
+        status__in=['done', 'failed'],
+        finished_at__lt=now - timedelta(hours=settings.REPORT_ARTIFACT_MAX_AGE_HOURS),
+    )
+    deleted = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted, failed
@@ -0,0 +1,63 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports import jobs, worker
+
+
+class Command(BaseCommand):
+    help = 'Render queued report jobs in a local process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.REPORT_WORKER_PROCESSES)
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Seconds to wait between queue checks.')
+        parser.add_argument('--cleanup-every', type=float, default=300.0,
+                            help='Seconds between artifact cleanup passes.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling forever.')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        # "spawn" gives each worker its own DB connection instead of a forked copy
+        pool = ProcessPoolExecutor(max_workers=processes,
+                                   mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=worker.init_worker)
+        self.stdout.write(f'Report worker started with {processes} process(es).')
+
+        in_flight = {}
+        last_cleanup = 0.0
+        try:
+            while True:
+                for future in [f for f in in_flight if f.done()]:
+                    job_id = in_flight.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as exc:  # the worker process itself died
+                        status = f'crashed ({exc})'
+                        jobs.mark_failed(job_id, status)
+                    self.stdout.write(f'Job #{job_id}: {status}')
+
+                free = processes - len(in_flight)
+                claimed = jobs.claim_jobs(free) if free else []
+                for job_id in claimed:
+                    in_flight[pool.submit(worker.render_job, job_id)] = job_id
+
+                if time.monotonic() - last_cleanup >= options['cleanup_every']:
+                    deleted, failed = jobs.cleanup()
+                    if deleted or failed:
+                        self.stdout.write(f'Cleanup: removed {deleted} old job(s), failed {failed} stale job(s).')
+                    last_cleanup = time.monotonic()
+
+                if options['once'] and not in_flight and not claimed:
+                    break
+                close_old_connections()
+                time.sleep(options['poll'] if not claimed else 0.1)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping report worker...')
+        finally:
+            pool.shutdown(wait=True)
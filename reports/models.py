@@ -1,3 +1,50 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class ReportJob(models.Model):
+    """An export rendered in the background by ``manage.py run_report_worker``."""
+
+    KIND_CHOICES = [
+        ('issued_excel', 'Issued Books (Excel)'),
+        ('issued_pdf', 'Issued Books (PDF)'),
+        ('fines_excel', 'Fines Report (Excel)'),
+        ('fines_pdf', 'Fines Report (PDF)'),
+        ('books_excel', 'Books Catalog (Excel)'),
+        ('overdue_pdf', 'Overdue Report (PDF)'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_jobs'
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    file = models.FileField(upload_to='reports/%Y/%m/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),   # worker queue scan
+            models.Index(fields=['user', 'status']),         # per-user limit check
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.user} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
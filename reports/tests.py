@@ -1,3 +1,131 @@
-from django.test import TestCase
+import io
+import tempfile
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from books.models import Book
+from . import exports, jobs
+from .management.commands import run_report_worker
+from .models import ReportJob
+
+
+class ExcelExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Book.objects.create(title=f'Book {i}', author='Author', isbn=f'isbn-{i}')
+
+    def test_rows_are_read_a_chunk_at_a_time(self):
+        out = io.BytesIO()
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 2), CaptureQueriesContext(connection) as ctx:
+            exports.build_books_excel(out, {})
+        reads = [q['sql'] for q in ctx.captured_queries if 'FROM "books_book"' in q['sql']]
+        self.assertEqual(len(reads), 3)
+        self.assertTrue(all('LIMIT 3' in sql for sql in reads))
+
+        rows = list(openpyxl.load_workbook(out).active.iter_rows(min_row=4, values_only=True))
+        self.assertEqual([row[:3] for row in rows],
+                         [(i + 1, book_id, title) for i, (book_id, title)
+                          in enumerate(Book.objects.order_by('pk').values_list('book_id', 'title'))])
+
+
+def build_text(out, params):
+    out.write(b'report')
+
+
+def build_broken(out, params):
+    raise RuntimeError('no data')
+
+
+class InlineExecutor:
+    """Stands in for the worker's process pool: runs each job on submit."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@override_settings(REPORT_JOBS_PER_USER=2, REPORT_JOB_TIMEOUT=60)
+class ReportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('desk', role='librarian')
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.enterContext(mock.patch.dict(jobs.EXPORTS, {
+            'books_excel': {'filename': 'books.txt', 'build': build_text},
+            'fines_excel': {'filename': 'fines.txt', 'build': build_broken},
+        }))
+        # The worker closes its connections between jobs; here that would
+        # drop the test transaction
+        self.enterContext(mock.patch.object(jobs, 'close_old_connections'))
+        self.enterContext(mock.patch.object(run_report_worker, 'close_old_connections'))
+
+    def test_enqueue_stops_at_the_per_user_limit(self):
+        jobs.enqueue(self.user, 'books_excel')
+        jobs.enqueue(self.user, 'books_excel')
+        with self.assertRaises(jobs.JobLimitExceeded):
+            jobs.enqueue(self.user, 'books_excel')
+
+        ReportJob.objects.filter(user=self.user).update(status='done')
+        self.assertEqual(jobs.enqueue(self.user, 'books_excel').status, 'queued')
+
+    def test_job_runs_to_done_with_its_file(self):
+        job = jobs.enqueue(self.user, 'books_excel')
+        self.assertEqual(jobs.claim_jobs(5), [job.pk])
+        self.assertEqual(jobs.claim_jobs(5), [])
+
+        self.assertEqual(jobs.run_job(job.pk), 'done')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertIsNotNone(job.finished_at)
+        with job.file.open('rb') as fh:
+            self.assertEqual(fh.read(), b'report')
+
+    def test_failing_build_marks_the_job_failed(self):
+        job = jobs.enqueue(self.user, 'fines_excel')
+        jobs.claim_jobs(1)
+
+        self.assertEqual(jobs.run_job(job.pk), 'failed')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('no data', job.error)
+
+    def test_timed_out_job_is_not_revived_by_a_late_worker(self):
+        job = jobs.enqueue(self.user, 'books_excel')
+        jobs.claim_jobs(1)
+        ReportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(jobs.cleanup(), (0, 1))
+
+        self.assertEqual(jobs.run_job(job.pk), 'failed (timed out)')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.file.name), ('failed', 'Worker timed out.', ''))
+
+    def test_worker_command_drains_the_queue(self):
+        done = jobs.enqueue(self.user, 'books_excel')
+        failed = jobs.enqueue(self.user, 'fines_excel')
+        out = io.StringIO()
+        with mock.patch.object(run_report_worker, 'ProcessPoolExecutor', InlineExecutor):
+            call_command('run_report_worker', '--once', '--poll=0', stdout=out)
+
+        self.assertEqual(dict(ReportJob.objects.values_list('pk', 'status')),
+                         {done.pk: 'done', failed.pk: 'failed'})
+        self.assertIn(f'Job #{done.pk}: done', out.getvalue())
+        self.assertIn(f'Job #{failed.pk}: failed', out.getvalue())
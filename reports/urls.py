@@ -11,4 +11,7 @@ urlpatterns = [
     path('export/fines/pdf/', views.export_fines_pdf, name='export_fines_pdf'),
     path('export/books/excel/', views.export_books_excel, name='export_books_excel'),
     path('export/overdue/pdf/', views.export_overdue_pdf, name='export_overdue_pdf'),
+    path('jobs/enqueue/', views.enqueue_report, name='enqueue_report'),
+    path('jobs/<int:pk>/status/', views.report_job_status, name='report_job_status'),
+    path('jobs/<int:pk>/download/', views.report_job_download, name='report_job_download'),
 ]
\ No newline at end of file
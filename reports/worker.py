@@ -0,0 +1,16 @@
+"""
+Entry points for report worker processes.
+
+Kept free of model imports: a spawned process unpickles these functions
+before Django is set up, and ``init_worker`` is what sets it up.
+"""
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def render_job(job_id):
+    from .jobs import run_job
+    return run_job(job_id)
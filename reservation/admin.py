@@ -1,3 +1,7 @@
 from django.contrib import admin
+from .models import ExpiryRun
 
-# Register your models here.
+
+@admin.register(ExpiryRun)
+class ExpiryRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'cutoff', 'rows_expired', 'duration_ms')
@@ -0,0 +1,46 @@
+"""
+Reservation expiry.
+
+Expired reservations are flipped by a single set-based UPDATE on the
+(status, expires_on) index, run from ``manage.py expire_reservations``,
+rather than by checking and saving each row on every list page view.
+"""
+
+import time
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Reservation, ExpiryRun
+
+
+def expired_q(now=None):
+    """Reservations that are expired as of ``now``, swept or not."""
+    now = now or timezone.now()
+    return Q(status='expired') | Q(status__in=Reservation.ACTIVE_STATUSES, expires_on__lt=now)
+
+
+def filter_by_status(queryset, status, now=None):
+    now = now or timezone.now()
+    if status == 'expired':
+        return queryset.filter(expired_q(now))
+    if status in Reservation.ACTIVE_STATUSES:
+        return queryset.filter(status=status, expires_on__gte=now)
+    return queryset.filter(status=status)
+
+
+def expire_reservations(now=None):
+    started = timezone.now()
+    now = now or started
+    clock = time.monotonic()
+
+    expired = Reservation.objects.filter(
+        status__in=Reservation.ACTIVE_STATUSES, expires_on__lt=now
+    ).update(status='expired')
+
+    return ExpiryRun.objects.create(
+        started_at=started,
+        cutoff=now,
+        rows_expired=expired,
+        duration_ms=int((time.monotonic() - clock) * 1000),
+    )
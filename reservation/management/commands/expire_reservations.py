@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservation.expiry import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Expire pending/ready reservations past their expiry time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=0, metavar='SECONDS',
+                            help='Keep running, expiring every SECONDS (0 = run once).')
+
+    def handle(self, *args, **options):
+        while True:
+            run = expire_reservations()
+            self.stdout.write(f'Expired {run.rows_expired} reservation(s) in {run.duration_ms} ms.')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
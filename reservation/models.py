@@ -28,8 +28,13 @@ class Reservation(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     notes = models.TextField(blank=True)
 
+    ACTIVE_STATUSES = ('pending', 'ready')
+
     class Meta:
         ordering = ['-reserved_on']
+        indexes = [
+            models.Index(fields=['status', 'expires_on']),   # expiry engine
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} → {self.book.title} ({self.status})"
@@ -49,4 +54,23 @@ class Reservation(models.Model):
         self.save()
 
     def is_expired(self):
-        return self.expires_on < timezone.now() and self.status not in ('fulfilled', 'cancelled', 'expired')
\ No newline at end of file
+        return self.expires_on < timezone.now() and self.status not in ('fulfilled', 'cancelled', 'expired')
+
+    @property
+    def effective_status(self):
+        """Status as of now, even if the expiry engine hasn't run yet."""
+        return 'expired' if self.is_expired() else self.status
+
+
+class ExpiryRun(models.Model):
+    """Statistics for one run of ``manage.py expire_reservations``."""
+    started_at = models.DateTimeField()
+    cutoff = models.DateTimeField(help_text="Active reservations expiring before this were expired.")
+    rows_expired = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Expiry run {self.started_at:%d %b %Y %H:%M} — {self.rows_expired} expired"
\ No newline at end of file
@@ -1,3 +1,55 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from books.models import Book
+from .expiry import expire_reservations, filter_by_status
+from .models import ExpiryRun, Reservation
+
+
+class ExpiryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('asha', role='student')
+        book = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593')
+        now = timezone.now()
+
+        def reserve(status, days_left):
+            return Reservation.objects.create(user=user, book=book, status=status,
+                                              expires_on=now + timedelta(days=days_left))
+
+        cls.lapsed = [reserve('pending', -2), reserve('ready', -1)]
+        cls.live = [reserve('pending', 3), reserve('ready', 1)]
+        cls.closed = [reserve('cancelled', -5), reserve('fulfilled', -5)]
+
+    def statuses(self, reservations):
+        return [Reservation.objects.get(pk=r.pk).status for r in reservations]
+
+    def test_unswept_reservations_already_show_as_expired(self):
+        self.assertEqual([r.effective_status for r in self.lapsed], ['expired', 'expired'])
+        self.assertEqual([r.effective_status for r in self.live], ['pending', 'ready'])
+        self.assertEqual([r.effective_status for r in self.closed], ['cancelled', 'fulfilled'])
+
+        reservations = Reservation.objects.all()
+        self.assertCountEqual(filter_by_status(reservations, 'expired'), self.lapsed)
+        self.assertEqual(list(filter_by_status(reservations, 'pending')), self.live[:1])
+        self.assertEqual(list(filter_by_status(reservations, 'ready')), self.live[1:])
+
+    def test_expire_reservations_flips_lapsed_ones_in_one_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            run = expire_reservations()
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]), 1)
+
+        self.assertEqual(run.rows_expired, 2)
+        self.assertEqual(ExpiryRun.objects.get(), run)
+        self.assertEqual(self.statuses(self.lapsed), ['expired', 'expired'])
+        self.assertEqual(self.statuses(self.live), ['pending', 'ready'])
+        self.assertEqual(self.statuses(self.closed), ['cancelled', 'fulfilled'])
 
-# Create your tests here.
+        # What the list showed before the sweep is what it shows after
+        self.assertCountEqual(filter_by_status(Reservation.objects.all(), 'expired'), self.lapsed)
+        self.assertEqual(expire_reservations().rows_expired, 0)
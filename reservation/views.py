@@ -3,6 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from .models import Reservation
+from .expiry import filter_by_status
 from books.models import Book
 
 try:
@@ -22,15 +23,10 @@ def reservation_list(request):
     else:
         reservations = Reservation.objects.select_related('user', 'book').filter(user=request.user)
 
-    # Auto-expire old ones
-    for r in reservations:
-        if r.is_expired():
-            r.status = 'expired'
-            r.save()
-
+    # Expiry is applied by `manage.py expire_reservations`; this page only reads
     status_filter = request.GET.get('status', '')
     if status_filter:
-        reservations = reservations.filter(status=status_filter)
+        reservations = filter_by_status(reservations, status_filter)
 
     return render(request, 'reservation/reservation_list.html', {
         'reservations': reservations,
@@ -43,12 +39,13 @@ def reservation_list(request):
 # ─────────────────────────────────────────
 @login_required
 def reserve_book(request, book_id):
-    book = get_object_or_404(Book, pk=book_id)
+    book = get_object_or_404(Book.objects.with_copies(), pk=book_id)
 
     # Check if already reserved
     active_statuses = ['pending', 'ready']
     already_reserved = Reservation.objects.filter(
-        user=request.user, book=book, status__in=active_statuses
+        user=request.user, book=book, status__in=active_statuses,
+        expires_on__gte=timezone.now(),
     ).exists()
 
     if already_reserved:
@@ -29,4 +29,19 @@ class Review(models.Model):
         return f"{self.user.get_full_name()} — {self.book.title} ({self.rating}★)"
 
     def star_range(self):
-        return range(1, 6)
\ No newline at end of file
+        return range(1, 6)
+
+    # The book and rating as last stored, so reviews/signals.py can move the
+    # old rating out of the book's aggregates when a review is edited
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_state()
+        return instance
+
+    def remember_state(self):
+        self._stored_state = (self.__dict__.get('book_id'), self.__dict__.get('rating'))
+
+    @property
+    def loaded_state(self):
+        return getattr(self, '_stored_state', (None, None))
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Per-book rating aggregates stored on ``Book``.
+
+Each review save or delete moves its rating into or out of the book's
+count, sum and 1–5 histogram with one conditional ``F()`` UPDATE, so
+average ratings, "top rated" ordering and rating filters read plain columns
+instead of aggregating ``Review`` rows.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Greatest
+
+from books.models import Book
+from .models import Review
+
+STARS = range(1, 6)
+
+
+def _average():
+    return Case(
+        When(rating_count=0, then=Value(0.0)),
+        default=Cast('rating_sum', FloatField()) / F('rating_count'),
+        output_field=FloatField(),
+    )
+
+
+def apply_change(book_id, added=None, removed=None):
+    """
+    Add rating ``added`` to and/or remove rating ``removed`` from a book's
+    aggregates (an edit passes both).
+    """
+    # Ratings arrive as strings from ReviewForm's ChoiceField
+    added, removed = int(added or 0), int(removed or 0)
+    if added == removed:
+        return
+    deltas = Counter()
+    if added:
+        deltas.update({'rating_count': 1, 'rating_sum': added, f'rating_{added}': 1})
+    if removed:
+        deltas.subtract({'rating_count': 1, 'rating_sum': removed, f'rating_{removed}': 1})
+
+    # Clamp at zero so a counter that has drifted can't violate its
+    # unsigned column; `reconcile_ratings` repairs the drift.
+    updates = {field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items() if delta}
+    with transaction.atomic():
+        Book.objects.filter(pk=book_id).update(**updates)
+        Book.objects.filter(pk=book_id).update(rating_avg=_average())
+
+
+def rebuild(batch_size=500):
+    """
+    Recompute every book's aggregates from ``Review`` in one grouped query
+    and write back the ones that differ.  Returns the number of books fixed.
+    """
+    stats = {
+        row.pop('book'): row
+        for row in Review.objects.values('book').order_by().annotate(
+            rating_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_{i}': Count('id', filter=Q(rating=i)) for i in STARS},
+        )
+    }
+    empty = dict.fromkeys(['rating_count', 'rating_sum'] + [f'rating_{i}' for i in STARS], 0)
+
+    changed, fixed = [], 0
+    for book in Book.objects.only('pk', *Book.RATING_FIELDS).iterator(chunk_size=batch_size):
+        expected = stats.get(book.pk, empty)
+        average = expected['rating_sum'] / expected['rating_count'] if expected['rating_count'] else 0.0
+        if (any(getattr(book, f) != v for f, v in expected.items())
+                or abs(book.rating_avg - average) > 1e-9):
+            for field, value in expected.items():
+                setattr(book, field, value)
+            book.rating_avg = average
+            changed.append(book)
+        if len(changed) >= batch_size:
+            Book.objects.bulk_update(changed, Book.RATING_FIELDS)
+            fixed += len(changed)
+            changed = []
+    if changed:
+        Book.objects.bulk_update(changed, Book.RATING_FIELDS)
+        fixed += len(changed)
+    return fixed
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Review
+from . import ratings
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_book, old_rating = instance.loaded_state
+    if created:
+        ratings.apply_change(instance.book_id, added=instance.rating)
+    elif old_rating is None:
+        # Saved over a row this instance never loaded; the previous rating is
+        # unknown, so leave it to `manage.py reconcile_ratings`
+        pass
+    elif old_book != instance.book_id:
+        ratings.apply_change(old_book, removed=old_rating)
+        ratings.apply_change(instance.book_id, added=instance.rating)
+    else:
+        ratings.apply_change(instance.book_id, added=instance.rating, removed=old_rating)
+    instance.remember_state()
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    book_id, rating = instance.loaded_state
+    if rating is None:
+        book_id, rating = instance.book_id, instance.rating
+    ratings.apply_change(book_id, removed=rating)
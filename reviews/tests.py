@@ -1,3 +1,85 @@
+from django.db.models import Count, Q, Sum
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from books.models import Book
+from . import ratings
+from .models import Review
+
+
+class RatingCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.readers = [User.objects.create_user(name, role='student') for name in ('asha', 'ravi', 'mina')]
+        cls.dune = Book.objects.create(title='Dune', author='Frank Herbert', isbn='978-0441013593')
+        cls.emma = Book.objects.create(title='Emma', author='Jane Austen', isbn='978-0141439587')
+
+    def review(self, reader, book, rating):
+        return Review.objects.create(user=self.readers[reader], book=book, rating=rating)
+
+    def assertMatchesRecount(self):
+        """Every book's stored counters equal a full recount of its reviews."""
+        for book in Book.objects.all():
+            recount = Review.objects.filter(book=book).aggregate(
+                rating_count=Count('id'), rating_sum=Sum('rating', default=0),
+                **{f'rating_{i}': Count('id', filter=Q(rating=i)) for i in ratings.STARS},
+            )
+            stored = {field: getattr(book, field) for field in recount}
+            self.assertEqual(stored, recount, book.title)
+            average = recount['rating_sum'] / recount['rating_count'] if recount['rating_count'] else 0.0
+            self.assertAlmostEqual(book.rating_avg, average, msg=book.title)
+        self.assertEqual(ratings.rebuild(), 0)
+
+    def test_new_reviews(self):
+        self.review(0, self.dune, 5)
+        self.review(1, self.dune, 3)
+        self.review(2, self.emma, 4)
+        self.assertMatchesRecount()
+
+    def test_edited_rating(self):
+        review = self.review(0, self.dune, 5)
+        self.review(1, self.dune, 3)
+
+        review.rating = 2
+        review.save()
+        self.assertMatchesRecount()
+        # Edited again on the same instance, and once more with the string a form posts
+        review.rating = 4
+        review.save()
+        loaded = Review.objects.get(pk=review.pk)
+        loaded.rating = '1'
+        loaded.save()
+        self.assertMatchesRecount()
+
+    def test_edit_that_keeps_the_rating(self):
+        review = self.review(0, self.dune, 5)
+        review.comment = 'Still great'
+        review.save()
+        self.assertMatchesRecount()
+
+    def test_review_moved_to_another_book(self):
+        review = self.review(0, self.dune, 5)
+        self.review(1, self.emma, 2)
+
+        review.book = self.emma
+        review.rating = 3
+        review.save()
+        self.assertMatchesRecount()
+
+    def test_deleted_reviews(self):
+        first = self.review(0, self.dune, 5)
+        self.review(1, self.dune, 3)
+        self.review(2, self.dune, 3)
+        self.review(2, self.emma, 1)
+
+        first.delete()
+        self.assertMatchesRecount()
+        Review.objects.filter(rating=3).delete()
+        self.assertMatchesRecount()
+
+    def test_edited_then_deleted(self):
+        review = self.review(0, self.dune, 5)
+        review.rating = 1
+        review.save()
+        review.delete()
+        self.assertMatchesRecount()
@@ -1,7 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg
 from .models import Review
 from .forms import ReviewForm
 from books.models import Book
@@ -70,7 +69,6 @@ def delete_review(request, pk):
 def book_reviews(request, book_id):
     book = get_object_or_404(Book, pk=book_id)
     reviews = Review.objects.filter(book=book).select_related('user')
-    avg_rating = reviews.aggregate(avg=Avg('rating'))['avg'] or 0
     user_review = None
     if request.user.is_authenticated:
         user_review = reviews.filter(user=request.user).first()
@@ -78,7 +76,7 @@ def book_reviews(request, book_id):
     return render(request, 'reviews/book_reviews.html', {
         'book': book,
         'reviews': reviews,
-        'avg_rating': round(avg_rating, 1),
+        'avg_rating': round(book.rating_avg, 1),
         'user_review': user_review,
         'rating_range': range(1, 6),
     })
\ No newline at end of file